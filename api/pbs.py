@@ -1,38 +1,160 @@
 from config import (
     PBS_TV_SCHEDULE_API_KEY,
     PBS_TV_SCHEDULE_ENDPOINT,
-    STATION_CALL_SIGN
+    STATION_CALL_SIGN,
+    PBS_MAX_IN_FLIGHT,
+    PBS_TIMEOUT,
+    PBS_RETRIES,
+    PBS_BACKOFF,
+    PBS_FRESHNESS_HOURS
 )
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import requests
 import json
 
-def get_schedule_day(start_url, date, headers):
+def create_session(api_key, max_in_flight=PBS_MAX_IN_FLIGHT, retries=PBS_RETRIES, backoff=PBS_BACKOFF):
     """
-    Retrieves TV schedule for a specific day using the PBS TV schedule API.
+    Creates a keep-alive session for the PBS TV schedule API, shared by all requests for a schedule.
+
+    Args:
+        api_key (str): The PBS TV schedule API key, sent in the X-PBSAUTH header.
+        max_in_flight (int, optional): Size of the connection pool, matching the number of requests in flight.
+            Default is `PBS_MAX_IN_FLIGHT` in config.py.
+        retries (int, optional): Number of retries for connection errors and 429/5xx responses.
+            Default is `PBS_RETRIES` in config.py.
+        backoff (float, optional): Backoff factor in seconds, doubled after each retry, unless the response
+            sends a Retry-After header. Default is `PBS_BACKOFF` in config.py.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=['GET'],
+        respect_retry_after_header=True,
+        raise_on_status=False  # return the last response, so its status can be reported
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'X-PBSAUTH': api_key})
+    return session
+
+def load_day(store_dir, date):
+    """
+    Loads a stored TVSS response for one day.
+
+    Args:
+        store_dir (Path): Directory of per-day responses.
+        date (str): The date, formatted as 'YYYYMMDD'.
+
+    Returns:
+        dict: The stored entry, with "fetched_at", "etag", "last_modified" and "data" keys, or None if not stored.
+    """
+
+    path = Path(store_dir) / f'{date}.json'
+    if not path.exists(): return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_day(store_dir, date, entry):
+    """
+    Saves a TVSS response for one day, with its fetch time and validators.
+
+    Args:
+        store_dir (Path): Directory of per-day responses.
+        date (str): The date, formatted as 'YYYYMMDD'.
+        entry (dict): The entry to store, from `get_schedule_day`.
+    """
+
+    Path(store_dir).mkdir(parents=True, exist_ok=True)
+    path = Path(store_dir) / f'{date}.json'
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+    tmp_path.replace(path)
+
+def is_fresh(entry, freshness_hours):
+    """
+    Checks whether a stored entry was fetched within the last `freshness_hours` hours.
+
+    Args:
+        entry (dict): A stored entry, or None.
+        freshness_hours (float): Freshness TTL in hours.
+
+    Returns:
+        bool: True if the entry exists and is younger than the TTL.
+    """
+
+    if not entry: return False
+    age = datetime.now() - datetime.fromisoformat(entry['fetched_at'])
+    return age < timedelta(hours=freshness_hours)
+
+def get_schedule_day(start_url, date, session, entry=None, timeout=PBS_TIMEOUT):
+    """
+    Retrieves TV schedule for a specific day using the PBS TV schedule API, as a conditional request
+    when there is a stored entry with validators.
 
     Args:
         start_url (str): Base URL for the PBS TV schedule API endpoint. 
         date (str): The date for the schedule, formatted as 'YYYYMMDD', which gets appended to start_url.
-        headers (dict): The headers to include in the API request (e.g., authorization).
+        session (requests.Session): Session to send the request with, from `create_session`.
+        entry (dict, optional): The stored entry for the day, whose ETag and Last-Modified are sent back.
+        timeout (float, optional): Seconds to wait to connect and for each read. Default is `PBS_TIMEOUT` in config.py.
 
     Returns:
-        dict: The parsed JSON response if the request is successful (status code 200).
-        None: If the request fails, an error message is printed with the HTTP status code and response text.
+        dict: An entry with "fetched_at", "etag", "last_modified" and "data" keys. On a 304 response, this is
+            the stored entry with a new fetch time.
+        None: If the request fails, or the response is not valid JSON, an error message is printed with the
+            HTTP status code and response text, or the JSON error.
 
     Example:
-        headers = {'X-PBSAUTH': 'your_api_key'}
-        schedule = get_schedule_day("https://tvss.services.pbs.org/tvss/klrn/day/", '20250311', headers)
+        session = create_session('your_api_key')
+        entry = get_schedule_day("https://tvss.services.pbs.org/tvss/klrn/day/", '20250311', session)
     """
 
     url = start_url + date
-    response = requests.get(url, headers=headers)
+    headers = {}
+    if entry and entry.get('etag'): headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'): headers['If-Modified-Since'] = entry['last_modified']
+
+    try:
+        response = session.get(url, headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        print(f'Error for {date}: {e}')
+        return None
+
+    fetched_at = datetime.now().isoformat(timespec='seconds')
+
+    if response.status_code == 304 and entry:
+        print(f'Unchanged json for {date}')
+        return {**entry, 'fetched_at': fetched_at}
 
     if response.status_code == 200:
+        try:
+            data = response.json()
+        except ValueError as e: # requests.JSONDecodeError, for a truncated or non-JSON body
+            print(f'Error for {date}: invalid json, {e}')
+            return None
+
         print(f'Retrieved json for {date}')
-        return response.json()        
-    else:
-        print(f'Error: {response.status_code}, {response.text}')
+        return {
+            'fetched_at': fetched_at,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'data': data
+        }
+
+    print(f'Error for {date}: {response.status_code}, {response.text}')
 
 def get_schedule(    
     output_path,
@@ -40,10 +162,14 @@ def get_schedule(
     days=7,
     api_endpoint=PBS_TV_SCHEDULE_ENDPOINT,
     station=STATION_CALL_SIGN,
-    api_key=PBS_TV_SCHEDULE_API_KEY
+    api_key=PBS_TV_SCHEDULE_API_KEY,
+    max_in_flight=PBS_MAX_IN_FLIGHT,
+    freshness_hours=PBS_FRESHNESS_HOURS,
+    store_dir=None
 ):
     """
-    Retrieves a TV schedule for the specified number of days from the PBS TV Schedule API.
+    Syncs a TV schedule for the specified number of days from the PBS TV Schedule API into a per-day
+    store, and builds a JSON file of the schedule from it.
 
     Args:
         output_path (str): The directory path where the output JSON file will be saved.
@@ -52,10 +178,21 @@ def get_schedule(
         api_endpoint (str, optional): The PBS TV schedule API endpoint. Default is `PBS_TV_SCHEDULE_ENDPOINT` in config.py.
         station (str, optional): The PBS station call sign. Default is `STATION_CALL_SIGN` in config.py.
         api_key (str, optional): The PBS TV schedule API key for authorization. Default is set in .env.
+        max_in_flight (int, optional): Maximum number of days requested at once. Default is `PBS_MAX_IN_FLIGHT` in config.py.
+        freshness_hours (float, optional): Stored days fetched within this many hours are not requested again.
+            Use 0 to refresh every day. Default is `PBS_FRESHNESS_HOURS` in config.py.
+        store_dir (Path, optional): Directory of per-day responses. Defaults to `pbs_days` next to `output_path`.
 
     Returns:
         None: The function saves the schedule to a JSON file at the specified output path.
 
+    Notes:
+        - Only days that are missing from the store, or older than the freshness TTL, are requested. Stale
+          days are requested conditionally, with their stored ETag and Last-Modified validators.
+        - Days are fetched by a thread pool sharing one keep-alive session, with timeouts and retries.
+        - Days are saved in date order, whatever order they finish in. A day that still fails after
+          retries keeps its stored response, or is saved as `null` if there is none, and is listed at the end.
+
     Example:
         get_schedule('path/to/output/', days=7)
     """    
@@ -68,13 +205,31 @@ def get_schedule(
         day = datetime.strptime(startdate, '%Y%m%d')
 
     start_url = f'{api_endpoint}{station}/day/'  
-    headers = {'X-PBSAUTH': api_key}
-    result = {"start_date": startdate}
+    store_dir = store_dir or Path(output_path).parent / 'pbs_days'
+    day_strs = [(day + timedelta(days=x)).strftime('%Y%m%d') for x in range(days)]
 
-    print()
-    for x in range(days):
-        day_str = (day + timedelta(days=x)).strftime('%Y%m%d')
-        result[day_str] = get_schedule_day(start_url, day_str, headers)         
+    # request only missing or stale days
+    entries = {day_str: load_day(store_dir, day_str) for day_str in day_strs}
+    to_fetch = [day_str for day_str in day_strs if not is_fresh(entries[day_str], freshness_hours)]
+    print(f'\n{len(day_strs) - len(to_fetch)} days are fresh in {store_dir}, requesting {len(to_fetch)}')
+
+    failed = []
+    if to_fetch:
+        with create_session(api_key, max_in_flight) as session:
+            with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+                fetched = executor.map(lambda day_str: get_schedule_day(start_url, day_str, session, entries[day_str]), to_fetch)
+
+                for day_str, entry in zip(to_fetch, fetched):
+                    if entry is None: failed.append(day_str); continue
+                    save_day(store_dir, day_str, entry)
+                    entries[day_str] = entry
+
+    if failed: print(f'\nNOTE: Could not retrieve {len(failed)} days, kept stored data or saved as null: {", ".join(failed)}')
+
+    # build schedule from store
+    result = {"start_date": startdate}
+    for day_str in day_strs:
+        result[day_str] = entries[day_str]['data'] if entries[day_str] else None
 
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(result, f, indent=2) 
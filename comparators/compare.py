@@ -1,9 +1,284 @@
 from pathlib import Path
 import pandas as pd
+from config import COMPARE_TOLERANCE_SECONDS, TITLE_MATCH_THRESHOLD, SCHEDULE_STORE
+from comparators.titles import title_scores
+from parsers.normalize import title_key
+from parsers.columnar import share_categories
+from utils import profiler
 
-def compare_tv_schedules(path_1, path_2, output_path, channel='9.1', start_date=None, end_date=None):
+COMPARE_VERSION = 3 # bump when a change here changes results, so results cached by earlier runs are not reused
+
+def from_compact(df, channels=None):
+    """
+    Gets the rows of a schedule in the compact schema from `parsers.columnar.compact` that comparisons use.
+
+    Args:
+        df (pd.DataFrame): Schedule in the compact schema, with "Channel" (category) and "Slot" (datetime64) columns.
+        channels (list[str], optional): TV channels to filter for. Defaults to all channels.
+
+    Returns:
+        pd.DataFrame: The schedule, still in the compact schema, with "Slot" named "DateTime", and without "Date".
+
+    Notes:
+        - Columns keep their types, so slots are compared as datetime64 values, and channels, program names, Nola
+          episodes and title keys by their codes. Dates and start times are only formatted for rows in the results.
+    """
+
+    if channels is not None: df = df[df['Channel'].isin(channels)]
+    df = df.drop(columns=['Date'], errors='ignore') # dates of rows without a slot, which are not compared
+    return df.rename(columns={'Slot': 'DateTime'}).reset_index(drop=True)
+
+def read_schedule(path, channels=None):
+    """
+    Reads a parsed TV schedule for one or more channels, from the schedule store when it holds the source,
+    else from its Parquet copy in the compact schema when that is fresh, or else from the CSV file.
+
+    Args:
+        path (str): Path to the parsed CSV file, named after its source (e.g., 'output/pbs.csv').
+        channels (str | list[str], optional): TV channel, or channels, to filter for. Defaults to all channels.
+
+    Returns:
+        pd.DataFrame: The schedule for `channels`, from `from_compact`.
+
+    Notes:
+        - The store holds every slot a source has been parsed for, so it can have more history than the CSV file.
+    """
+
+    from parsers.columnar import read_parquet_if_fresh, read_csv
+    from parsers import store
+
+    if isinstance(channels, str): channels = [channels]
+    source = Path(path).stem
+
+    if SCHEDULE_STORE and store.get_columns(source) is not None:
+        return from_compact(store.read_slots(source, channels))
+
+    df = read_parquet_if_fresh(path)
+    if df is None: df = read_csv(path) # build slots from Date and Start Time strings
+    return from_compact(df, channels)
+
+def slot_bounds(df):
+    """
+    Gets the first and last slot of a schedule on each channel.
+
+    Arg:
+        df (pd.DataFrame): Schedule, with "Channel" and "DateTime" columns.
+
+    Returns:
+        pd.DataFrame: "min" and "max" of DateTime, indexed by channel.
+    """
+
+    return df.groupby('Channel')['DateTime'].agg(['min', 'max'])
+
+def get_time_frames(bounds_1, bounds_2, channels, start_date=None, end_date=None):
+    """
+    Gets the time frame shared by two schedules for each channel, narrowed by optional start and end dates.
+
+    Args:
+        bounds_1 (pd.DataFrame): First and last slot of the first schedule, from `slot_bounds`.
+        bounds_2 (pd.DataFrame): First and last slot of the second schedule, from `slot_bounds`.
+        channels (list[str]): Channels to get time frames for.
+        start_date (datetime, optional): Used as the start if it is later than the shared start. Defaults to `None`.
+        end_date (datetime, optional): Used as the end if it is earlier than the shared end. Defaults to `None`.
+
+    Returns:
+        Tuple[pd.Series, pd.Series]: Start and end of the time frame, indexed by channel.
+
+    Notes:
+        - The shared time frame is the later of the two starts and the earlier of the two ends. A side with
+          no rows for a channel has no start or end (NaT), and does not narrow the other side's time frame.
+    """
+
+    frames_1 = bounds_1.reindex(channels)
+    frames_2 = bounds_2.reindex(channels)
+
+    # comparisons with NaT are False, so a missing side keeps the other side's value
+    datetime_start = frames_1['min'].mask(frames_2['min'] > frames_1['min'], frames_2['min'])
+    datetime_end = frames_1['max'].mask(frames_2['max'] < frames_1['max'], frames_2['max'])
+
+    # if user set start and end dates, use those if they are, respectively, later and earlier
+    if start_date: datetime_start = datetime_start.mask(start_date > datetime_start, start_date)
+    if end_date: datetime_end = datetime_end.mask(end_date < datetime_end, end_date)
+
+    return datetime_start, datetime_end
+
+def in_time_frames(df, datetime_start, datetime_end):
+    """
+    Finds the rows of a schedule, or of merged schedules, in their channel's time frame.
+
+    Args:
+        df (pd.DataFrame): Rows with "Channel" and "DateTime" columns.
+        datetime_start (pd.Series): First slot of each channel's time frame, indexed by channel.
+        datetime_end (pd.Series): Last slot of each channel's time frame, indexed by channel.
+
+    Returns:
+        pd.Series: True for each row from the start to the end of its channel's time frame.
+
+    Notes:
+        - A categorical channel is mapped to its time frame once per category, which can give a categorical
+          of datetimes, so the bounds are cast back to datetime64 to compare with each row's slot.
+    """
+
+    starts = df['Channel'].map(datetime_start).astype(datetime_start.dtype)
+    ends = df['Channel'].map(datetime_end).astype(datetime_end.dtype)
+    return (df['DateTime'] >= starts) & (df['DateTime'] <= ends)
+
+def align_nearest(df, suffixes, tolerance):
+    """
+    Matches slots that only one of two merged schedules has to the nearest such slot in the other schedule,
+    on the same channel and within a tolerance, and joins each matched pair into one row.
+
+    Args:
+        df (pd.DataFrame): Outer merge of two schedules, with a "_merge" indicator column, and columns from
+            each schedule ending in that schedule's suffix.
+        suffixes (list[str]): Column suffixes of the first and second schedule.
+        tolerance (pd.Timedelta): Largest difference in start times for two slots to be matched.
+
+    Returns:
+        pd.DataFrame: `df`, with each matched pair replaced by one row that keeps the first schedule's channel
+        and slot, and an "Offset" column with the second schedule's start time minus the first's, in seconds.
+
+    Notes:
+        - Uses sorted as-of joins, one from each side, so matching stays O(n log n). A pair is only matched when
+          each slot is the other's nearest slot, so no slot is matched twice.
+        - Slots with exactly the same start time are already matched by the merge, and keep an offset of 0.
+        - Slots without a start time (NaT) are never matched, and stay as they are.
+    """
+
+    df['Offset'] = pd.Series(0.0, index=df.index).where(df['_merge'] == 'both')
+
+    # nearest slot on the other side, for slots that only one side has, and a start time to match on
+    left = df.loc[df['_merge'] == 'left_only', ['Channel', 'DateTime']].dropna(subset=['DateTime'])
+    right = df.loc[df['_merge'] == 'right_only', ['Channel', 'DateTime']].dropna(subset=['DateTime'])
+    left = left.reset_index(names='left_index')
+    right = right.reset_index(names='right_index')
+    if left.empty or right.empty: return df
+
+    left = left.sort_values('DateTime')
+    right = right.sort_values('DateTime')
+    options = {'on': 'DateTime', 'by': 'Channel', 'direction': 'nearest', 'tolerance': tolerance}
+    left_to_right = pd.merge_asof(left, right, **options).dropna(subset=['right_index'])
+    right_to_left = pd.merge_asof(right, left, **options).dropna(subset=['left_index'])
+
+    # keep pairs where each slot is the other's nearest
+    pairs = left_to_right[['left_index', 'right_index']].astype(int).merge(
+        right_to_left[['left_index', 'right_index']].astype(int))
+    if pairs.empty: return df
+
+    # join each pair into the first side's row, with the second side's columns and time offset
+    rows = df.loc[pairs['left_index']].copy()
+    for col in [col for col in df.columns if col.endswith(suffixes[1])]:
+        rows[col] = df.loc[pairs['right_index'], col].array # keeps categorical columns categorical
+    offsets = df.loc[pairs['right_index'], 'DateTime'].to_numpy() - rows['DateTime'].to_numpy()
+    rows['Offset'] = pd.to_timedelta(offsets).total_seconds()
+    rows['_merge'] = 'both'
+
+    return pd.concat([df.drop(index=pd.concat([pairs['left_index'], pairs['right_index']])), rows])
+
+def compare_frames(df_1, df_2, file_names, datetime_start, datetime_end, tolerance, threshold):
+    """
+    Merges two schedules and checks each slot for a mismatch, as described in `compare_tv_schedules`.
+
+    Args:
+        df_1 (pd.DataFrame): Schedule with the correct programs, from `read_schedule` or `from_compact`.
+        df_2 (pd.DataFrame): Schedule to check for any mismatches, with the same layout, and the same
+            categories in categorical columns, from `columnar.share_categories`.
+        file_names (list[str]): Names of the first and second file (e.g., 'protrack'), added to their columns.
+        datetime_start (pd.Series): First slot of each channel's time frame, indexed by channel.
+        datetime_end (pd.Series): Last slot of each channel's time frame, indexed by channel.
+        tolerance (float): Seconds start times can differ and still be matched to the nearest slot, or 0.
+        threshold (float): Lowest similarity score, from 0 to 1, for two program names to match.
+
+    Returns:
+        pd.DataFrame: The merged schedules in each channel's time frame, with a MISMATCH column first, then
+        Channel, Date (datetime64) and Start Time ('HH:MM:SS'), sorted by channel and the DateTime column, which is kept.
+
+    Notes:
+        - Rows are only matched within a channel, and a row's match only depends on rows at most two tolerances
+          away, so schedules cut to a few days, plus a day on each side, give the same rows for those days.
+    """
+
+    # create column suffixes
+    file_1_name, file_2_name = file_names
+    suffixes = [f' - {file_1_name}', f' - {file_2_name}']
+
+    # add suffixes to unique columns in each df
+    merge_cols = ['Channel', 'DateTime']
+    df_1_unique = [col for col in df_1.columns if col not in df_2.columns and col not in merge_cols]
+    df_2_unique = [col for col in df_2.columns if col not in df_1.columns and col not in merge_cols]
+    df_1 = df_1.rename(columns={col: col + suffixes[0] for col in df_1_unique})
+    df_2 = df_2.rename(columns={col: col + suffixes[1] for col in df_2_unique}) 
+
+    # merge on Channel and DateTime, by channel code and datetime64 slot
+    with profiler.stage('compare.merge') as stage:
+        df = pd.merge(df_1, df_2, on=merge_cols, how='outer', suffixes=suffixes, indicator=True)
+        stage.rows = len(df)
+
+    # match slots that only one file has to the nearest slot in the other file, within tolerance
+    with profiler.stage('compare.align_nearest') as stage:
+        if tolerance: df = align_nearest(df, suffixes, pd.Timedelta(seconds=tolerance))
+        df.drop(columns=['_merge'], inplace=True)
+        stage.rows = len(df)
+
+    # trim for each channel's time frame, sort by Channel and DateTime, and then add dates and start times
+    with profiler.stage('compare.trim_sort') as stage:
+        df = df[in_time_frames(df, datetime_start, datetime_end)]
+        df = df.sort_values(by=['Channel', 'DateTime'], kind='stable')
+        df.insert(1, 'Date', df['DateTime'].dt.normalize())
+        df.insert(2, 'Start Time', df['DateTime'].dt.strftime('%H:%M:%S'))
+        stage.rows = len(df)
+
+    # check each slot, in order: Nola Episode, Episode Number, and then program names
+    with profiler.stage('compare.check') as stage:
+        # create MISMATCH column
+        df.insert(0, 'MISMATCH', '')
+
+        # Compare Nola Episode, if both columns exist
+        nola_episode_col_1 = f'Nola Episode - {file_1_name}'
+        nola_episode_col_2 = f'Nola Episode - {file_2_name}'
+        if nola_episode_col_1 in df.columns and nola_episode_col_2 in df.columns:
+            mask_nola_episode_exist = df[f'Nola Episode - {file_1_name}'].notna() & df[f'Nola Episode - {file_2_name}'].notna()
+            mask_nola_episode = df[f'Nola Episode - {file_1_name}'] != df[f'Nola Episode - {file_2_name}']
+
+            # set MISMATCH column to 'NO' or 'YES'
+            df.loc[mask_nola_episode_exist, 'MISMATCH'] = 'NO'
+            df.loc[mask_nola_episode_exist & mask_nola_episode, 'MISMATCH'] = 'YES'
+
+        # compare Episode Number, if both columns exist, and only if no Nola Episode mismatch was found
+        episode_col_1 = f'Episode Number - {file_1_name}'
+        episode_col_2 = f'Episode Number - {file_2_name}'
+        if episode_col_1 in df.columns and episode_col_2 in df.columns:
+            mask_not_checked_yet = df['MISMATCH'] == ''
+            mask_episodes_exist = df[episode_col_1].notna() & df[episode_col_2].notna()
+            mask_episodes = df[episode_col_1] != df[episode_col_2]
+
+            # set MISMATCH column to 'NO' or 'YES'
+            df.loc[mask_not_checked_yet & mask_episodes_exist, 'MISMATCH'] = 'NO'
+            df.loc[mask_not_checked_yet & mask_episodes_exist & mask_episodes, 'MISMATCH'] = 'YES'
+
+        # score program names, using the Title Key column from parsers if both files have it
+        if f'Title Key - {file_1_name}' in df.columns and f'Title Key - {file_2_name}' in df.columns:
+            keys_1, keys_2 = df[f'Title Key - {file_1_name}'], df[f'Title Key - {file_2_name}']
+        else: keys_1, keys_2 = title_key(df[f'Program Name - {file_1_name}']), title_key(df[f'Program Name - {file_2_name}'])
+        with profiler.stage('compare.title_scores'): df['Title Score'] = title_scores(keys_1, keys_2)
+
+        # compare program names, only if no mismatch was found in either Nola Episode or Episode Number
+        mask_not_checked_yet = df['MISMATCH'] == ''
+        mask_names = ~(df['Title Score'] >= threshold) # a missing name is a mismatch
+        df.loc[mask_not_checked_yet & mask_names, 'MISMATCH'] = 'YES' # set MISMATCH column to 'YES' or leave as ''
+
+        # convert each 'NO' value in MISMATCH column back to an empty string
+        df.loc[df['MISMATCH'] == 'NO', 'MISMATCH'] = ''
+        stage.rows = len(df)
+
+    return df
+
+def compare_tv_schedules(path_1, path_2, output_path, channel='9.1', start_date=None, end_date=None,
+                         tolerance=COMPARE_TOLERANCE_SECONDS, threshold=TITLE_MATCH_THRESHOLD, use_cache=True, schedules=None):
     """
     Compares two CSV files with TV schedules to identify day and time slots that do not match, and outputs a CSV file.
+    Each source is read from the schedule store instead, when it holds both sources, or else from each file's 
+    Parquet copy in the compact schema, when it is fresh.
     
     Args:
         path_1 (str): Path to the CSV file with the correct TV schedule:
@@ -19,12 +294,25 @@ def compare_tv_schedules(path_1, path_2, output_path, channel='9.1', start_date=
             - Has same structure as path_1 file.
 
         output_path (str): Path where the output CSV file will be saved.
-        channel (str, optional): TV channel to filter the comparison. Defaults to '9.1'.
+        channel (str | list[str], optional): TV channel to filter the comparison, a list of channels, or 'all' 
+            for every channel in either file. Defaults to '9.1'.
         start_date (datetime, optional): The start date for retrieving data. Defaults to `None`.
         end_date (datetime, optional): The end date for retrieving data. Defaults to `None`.        
+        tolerance (float, optional): Seconds a start time in path_2 can differ from one in path_1, for a slot 
+            only one file has to be matched to the nearest slot in the other. Defaults to `COMPARE_TOLERANCE_SECONDS` 
+            in config.py, and 0 matches exact start times only.
+        threshold (float, optional): Lowest similarity score, from 0 to 1, for two program names to match.
+            Defaults to `TITLE_MATCH_THRESHOLD` in config.py, and 1 matches equal title keys only.
+        use_cache (bool, optional): Reuse results from earlier runs for days whose rows are unchanged. Defaults to True.
+        schedules (tuple[pd.DataFrame], optional): Parsed schedules to compare, as returned by the parsers, instead of
+            reading them. `path_1` and `path_2` then only name the sources. Defaults to `None`.
     
     Output:
-        A CSV file at `output_path` containing the combined TV schedules and a `MISMATCH` column:
+        For one channel, a CSV file at `output_path`, and its mismatches at `<output_path name>_mismatches.csv`. 
+        For several channels, a CSV file per channel at `<output_path name>_<channel>.csv`, with its mismatches at
+        `<output_path name>_<channel>_mismatches.csv`, and mismatches for all channels at `<output_path name>_mismatches.csv`.
+
+        Each CSV file contains the combined TV schedules and a `MISMATCH` column:
             - Channel (str): The TV channel.
             - Date (datetime): The broadcast date.
             - Start Time (datetime): The program's start time.
@@ -36,11 +324,27 @@ def compare_tv_schedules(path_1, path_2, output_path, channel='9.1', start_date=
             - Episode Number - Comparison (str, optional): The episode number being checked, if available.
             - MISMATCH (str): Indicates 'YES' if there is a mismatch between program names or episode numbers, 
               or an empty string if they match.
+            - Offset (float): Only with a tolerance. Seconds the path_2 start time is after the path_1 start time, 
+              or empty if the slot is in only one file.
+            - Title Score (float): Similarity of the two program names, from 0 to 1, or empty if either is missing.
+
+        If the last run with the same output name compared any of the same days, mismatches on those days from both
+        runs are saved at `<output_path name>_changes.csv`, with a CHANGE column ('NEW', 'RESOLVED' or 'STILL PRESENT')
+        instead of MISMATCH. A resolved mismatch has the last run's row.
 
     Notes:
-        - CSV files are merged into a DataFrame on the columns: Channel, Date, and Start Time as keys.
+        - Schedules are read into the compact schema from `parsers.columnar.compact`, and merged on Channel and DateTime
+          (the slot) as keys, by channel code and datetime64 value.
         - All other columns are included with names concatenated with either " - (file 1 name)" or " - (file 2 name)".
-        - A DateTime column is added to filter by timeframes, and then sort by date and time, before being dropped.
+        - With a tolerance, slots only one file has are then matched to the nearest such slot in the other file, with 
+          `align_nearest`, and each matched pair is kept as one row, with the path_1 date and start time.
+        - The DateTime column is used to filter by each channel's timeframe, and then sort by channel, date and time, and Date and
+          Start Time columns are formatted from it, before it is dropped.
+        - All channels are read, merged and checked together, in one pass.
+        - From the schedule store, each channel's time frame is found from the first and last slots on its index, and 
+          only rows in those time frames are read, so a short comparison does not read a long history.
+        - Each channel and day is fingerprinted from both files' rows, and results are cached per day in cache/compare, so
+          a rerun only merges and checks days whose fingerprint changed, with `incremental.compare_days`.
         - A MISMATCH column is added, and comparisons are performed in the following order:
             1. "Nola Episode - (file 1 name)" and "Nola Episode - (file 2 name)" are compared if both columns exist and have values:
                 - If they match, the row is marked as checked by setting the value of MISMATCH to 'NO'.
@@ -49,91 +353,84 @@ def compare_tv_schedules(path_1, path_2, output_path, channel='9.1', start_date=
                if both columns exist and have values:
                 - If they match, the row is marked as checked by setting the value of MISMATCH to 'NO'.
                 - If they don't match, the value of MISMATCH is set to 'YES'.
-            3. If no mismatch was found in the previous steps, "Program Name - (file 1 name)" and "Program Name - (file 2 name)" are compared:
-                - If they match, MISMATCH is leaft as empty ('').
-                - If they don't match, the value of MISMATCH is set to 'YES'.
+            3. If no mismatch was found in the previous steps, "Title Key - (file 1 name)" and "Title Key - (file 2 name)", the
+               normalized program names added by the parsers (or keys built from "Program Name" columns, if either is missing), 
+               are scored with `titles.title_scores`, after mapping any aliases from data/title_aliases.csv:
+                - If the score is at least `threshold`, MISMATCH is leaft as empty ('').
+                - If it is lower, or either name is missing, the value of MISMATCH is set to 'YES'.
         - At the end, any rows marked as 'NO' under MISMATCH is reset to an empty string ('').          
     """
     
-    # read in CSV files as dataframes
-    df_1 = pd.read_csv(path_1, dtype={'Channel': str})       
-    df_2 = pd.read_csv(path_2, dtype={'Channel': str})  
+    # read in parsed files as dataframes, filtered by channels, with a combined DateTime column
+    channels = None if channel == 'all' else [channel] if isinstance(channel, str) else list(channel)
+    # from the schedule store, get shared time frames from the index first, and then read only rows in them
+    from parsers import store
+    source_1, source_2 = Path(path_1).stem, Path(path_2).stem
 
-    # filter dfs by channel
-    df_1 = df_1[df_1['Channel'] == channel] 
-    df_2 = df_2[df_2['Channel'] == channel] 
+    if schedules is None and SCHEDULE_STORE and store.get_columns(source_1) is not None and store.get_columns(source_2) is not None:
+        bounds_1, bounds_2 = store.slot_bounds(source_1, channels), store.slot_bounds(source_2, channels)
+        if channels is None: channels = sorted(set(bounds_1.index) | set(bounds_2.index))
+        datetime_start, datetime_end = get_time_frames(bounds_1, bounds_2, channels, start_date, end_date)
 
-    # create combined DateTime column 
-    df_1['Date'] = pd.to_datetime(df_1['Date'])
-    df_1['DateTime'] = pd.to_datetime(df_1['Date'].dt.strftime('%Y-%m-%d') + ' ' + df_1['Start Time'], errors='coerce')
+        # widen by the tolerance, so slots just outside a time frame can still be matched to slots inside it
+        margin = pd.Timedelta(seconds=tolerance or 0)
+        with profiler.stage('compare.read') as stage:
+            df_1 = from_compact(store.read_slots(source_1, channels, datetime_start - margin, datetime_end + margin))
+            df_2 = from_compact(store.read_slots(source_2, channels, datetime_start - margin, datetime_end + margin))
+            stage.rows = len(df_1) + len(df_2)
 
-    df_2['Date'] = pd.to_datetime(df_2['Date'])
-    df_2['DateTime'] = pd.to_datetime(df_2['Date'].dt.strftime('%Y-%m-%d') + ' ' + df_2['Start Time'], errors='coerce')
+    else:
+        with profiler.stage('compare.read') as stage:
+            if schedules is not None: df_1, df_2 = (from_compact(df, channels) for df in schedules)
+            else: df_1, df_2 = read_schedule(path_1, channels), read_schedule(path_2, channels)
+            stage.rows = len(df_1) + len(df_2)
+        if channels is None: channels = sorted(set(df_1['Channel']) | set(df_2['Channel']))
 
-    # get shared time frame
-    datetime_start = max(df_1['DateTime'].min(), df_2['DateTime'].min())
-    datetime_end = min(df_1['DateTime'].max(), df_2['DateTime'].max())
+        # get shared time frame for each channel
+        datetime_start, datetime_end = get_time_frames(slot_bounds(df_1), slot_bounds(df_2), channels, start_date, end_date)
 
-    # if user set start and end dates, use those if they are, respectively, later and earlier
-    if start_date and start_date > datetime_start: datetime_start = start_date
-    if end_date and end_date < datetime_end: datetime_end = end_date
+    # give both schedules the same categories, so their columns merge and compare by code
+    df_1, df_2 = share_categories([df_1, df_2])
 
-    # create column suffixes
-    file_1_name = Path(path_1).stem
-    file_2_name = Path(path_2).stem 
-    suffixes = [f' - {file_1_name}', f' - {file_2_name}']
-
-    # add suffixes to unique columns in each df
-    merge_cols = ['Channel', 'Date', 'Start Time', 'DateTime']
-    df_1_unique = [col for col in df_1.columns if col not in df_2.columns and col not in merge_cols]
-    df_2_unique = [col for col in df_2.columns if col not in df_1.columns and col not in merge_cols]
-    df_1 = df_1.rename(columns={col: col + suffixes[0] for col in df_1_unique})
-    df_2 = df_2.rename(columns={col: col + suffixes[1] for col in df_2_unique}) 
-
-    # merge on Channel, Date, Start Time and DateTime    
-    df = pd.merge(df_1, df_2, on=merge_cols, how='outer', suffixes=suffixes)
-
-    # trim for time frame, and then sort by DateTime before dropping that column
-    df = df[(df['DateTime'] >= datetime_start) & (df['DateTime'] <= datetime_end)]
-    df = df.sort_values(by='DateTime')
-    df.drop(columns=['DateTime'], inplace=True)
-
-    # create MISMATCH column
-    df.insert(0, 'MISMATCH', '')
-
-    # Compare Nola Episode, if both columns exist
-    nola_episode_col_1 = f'Nola Episode - {file_1_name}'
-    nola_episode_col_2 = f'Nola Episode - {file_2_name}'
-    if nola_episode_col_1 in df.columns and nola_episode_col_2 in df.columns:
-        mask_nola_episode_exist = df[f'Nola Episode - {file_1_name}'].notna() & df[f'Nola Episode - {file_2_name}'].notna()
-        mask_nola_episode = df[f'Nola Episode - {file_1_name}'] != df[f'Nola Episode - {file_2_name}']
-
-        # set MISMATCH column to 'NO' or 'YES'
-        df.loc[mask_nola_episode_exist, 'MISMATCH'] = 'NO'
-        df.loc[mask_nola_episode_exist & mask_nola_episode, 'MISMATCH'] = 'YES'
-
-    # compare Episode Number, if both columns exist, and only if no Nola Episode mismatch was found
-    episode_col_1 = f'Episode Number - {file_1_name}'
-    episode_col_2 = f'Episode Number - {file_2_name}'
-    if episode_col_1 in df.columns and episode_col_2 in df.columns:
-        mask_not_checked_yet = df['MISMATCH'] == ''
-        mask_episodes_exist = df[episode_col_1].notna() & df[episode_col_2].notna()
-        mask_episodes = df[episode_col_1] != df[episode_col_2]
-
-        # set MISMATCH column to 'NO' or 'YES'
-        df.loc[mask_not_checked_yet & mask_episodes_exist, 'MISMATCH'] = 'NO'
-        df.loc[mask_not_checked_yet & mask_episodes_exist & mask_episodes, 'MISMATCH'] = 'YES'
-
-    # compare program names, only if no mismatch was found in either Nola Episode or Episode Number
-    mask_not_checked_yet = df['MISMATCH'] == ''
-    mask_names = df[f'Program Name - {file_1_name}'].str.lower() != df[f'Program Name - {file_2_name}'].str.lower()
-    df.loc[mask_not_checked_yet & mask_names, 'MISMATCH'] = 'YES' # set MISMATCH column to 'YES' or leave as ''
-
-    # convert each 'NO' value in MISMATCH column back to an empty string
-    df.loc[df['MISMATCH'] == 'NO', 'MISMATCH'] = ''      
+    # merge and check each slot, reusing the last run's results for days whose rows in both files are unchanged
+    from comparators import incremental
+    from parsers import cache
+    name = Path(output_path).stem
+    state = cache.load_compare_state(name)
+    with profiler.stage('compare.compare_days') as stage:
+        df, new_state = incremental.compare_days(df_1, df_2, [source_1, source_2], datetime_start, datetime_end,
+                                                 tolerance, threshold, state if use_cache else None)
+        changes = incremental.mismatch_changes(state, new_state)
+        stage.rows = len(df)
+    df = df.drop(columns=['DateTime'])
 
     # compile only mismatches
     df_mis = df[df['MISMATCH'] == 'YES']
 
-    df.to_csv(output_path, index=False)
-    df_mis.to_csv(output_path.replace('.csv', '_mismatches.csv'), index=False)
+    # save one channel to output_path, or each of several channels to its own file, plus all mismatches
+    if len(channels) == 1: files = [(output_path, df, channels)]
+    else:
+        files = [(output_path.replace('.csv', f'_{ch}{suffix}.csv'), data[data['Channel'] == ch], [ch])
+                 for ch in channels for suffix, data in [('', df), ('_mismatches', df_mis)]]
+    files.append((output_path.replace('.csv', '_mismatches.csv'), df_mis, channels))
+
+    # skip files an earlier run saved from the same days, if they have not been changed or removed since
+    with profiler.stage('compare.write') as stage:
+        written = 0
+        for path, data, file_channels in files:
+            digest = incremental.days_digest(new_state, file_channels)
+            if new_state['written'].get(path) != (digest, incremental.file_stamp(path)):
+                data.to_csv(path, index=False)
+                written += len(data)
+            new_state['written'][path] = (digest, incremental.file_stamp(path))
+        cache.save_compare_state(name, new_state)
+        stage.rows = written
+
+    # save mismatches that are new, resolved or still present since the last run, on days both runs compared
+    changes_path = output_path.replace('.csv', '_changes.csv')
+    if changes is not None:
+        changes.to_csv(changes_path, index=False)
+        counts = changes['CHANGE'].value_counts()
+        print(f"\nMismatches since the last run: {counts.get('NEW', 0)} new, {counts.get('RESOLVED', 0)} resolved, "
+              f"{counts.get('STILL PRESENT', 0)} still present, saved to {Path(changes_path).name}")
+    else: Path(changes_path).unlink(missing_ok=True)
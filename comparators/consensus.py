@@ -0,0 +1,170 @@
+from pathlib import Path
+import pandas as pd
+from comparators.compare import read_schedule, from_compact, in_time_frames
+from parsers.columnar import share_categories
+from comparators.titles import load_aliases, apply_aliases, similarity
+from parsers.normalize import title_key
+from config import TITLE_MATCH_THRESHOLD
+
+FIELDS = ['Nola Episode', 'Episode Number', 'Title Key']
+KEYS = ['Channel', 'DateTime', 'Occurrence']
+
+def group_sources(values, sources, threshold=None):
+    """
+    Groups sources by the value they have for one field in one slot.
+
+    Args:
+        values (tuple): Value from each source, or a missing value if a source has none.
+        sources (list[str]): Source names, in the same order as `values`.
+        threshold (float, optional): For title keys, the lowest similarity score, from `titles.similarity`
+            rounded to 2 decimals as `titles.title_scores` does, for a value to join a group. Defaults to `None`,
+            which groups equal values only.
+
+    Returns:
+        list[list[str]]: Sources with the same value, largest group first, leaving out sources with no value.
+
+    Notes:
+        - With a threshold, each value joins the first group whose first value it matches, as two files
+          compared by `compare.compare_tv_schedules` would match them.
+    """
+
+    groups = {}
+    for source, value in zip(sources, values):
+        if pd.isna(value): continue
+        if threshold is not None: value = next((key for key in groups if round(similarity(key, value), 2) >= threshold), value)
+        groups.setdefault(value, []).append(source)
+    return sorted(groups.values(), key=len, reverse=True)
+
+def odd_sources(groups):
+    """
+    Finds the sources that disagree with the majority for one field in one slot.
+
+    Arg:
+        groups (list[list[str]]): Sources grouped by value, from `group_sources`.
+
+    Returns:
+        list[str]: Sources outside the largest group, or an empty list if all agree or no group is largest.
+    """
+
+    if len(groups) < 2 or len(groups[0]) == len(groups[1]): return []
+    return [source for group in groups[1:] for source in group]
+
+def consensus_tv_schedules(paths, output_path, channel='9.1', start_date=None, end_date=None, schedules=None,
+                           threshold=TITLE_MATCH_THRESHOLD):
+    """
+    Compares three or more parsed TV schedules in one pass, to find day and time slots where the sources
+    do not all agree, and which source is the odd one out.
+
+    Args:
+        paths (list[str]): Paths to the parsed CSV files, each named after its source (e.g., 'output/pbs.csv'),
+            and each with the columns described in `compare.compare_tv_schedules`.
+        output_path (str): Path where the output CSV file will be saved.
+        channel (str | list[str], optional): TV channel to filter the comparison, a list of channels, or 'all'
+            for every channel in any file. Defaults to '9.1'.
+        start_date (datetime, optional): The start date for retrieving data. Defaults to `None`.
+        end_date (datetime, optional): The end date for retrieving data. Defaults to `None`.
+        schedules (list[pd.DataFrame], optional): Parsed schedules to compare, as returned by the parsers, in the same
+            order as `paths`, instead of reading them. `paths` then only name the sources. Defaults to `None`.
+        threshold (float, optional): Lowest similarity score, from 0 to 1, for two program names to match.
+            Defaults to `TITLE_MATCH_THRESHOLD` in config.py.
+
+    Output:
+        A CSV file at `output_path`, and its mismatches at `<output_path name>_mismatches.csv`, with one row per slot:
+            - MISMATCH (str): 'YES' if the sources with a value for the checked field do not all agree, or if
+              a source has no program in the slot, or an empty string if they agree.
+            - ODD SOURCE (str): Sources that disagree with the majority on the checked field, or have no program
+              in the slot, separated by spaces.
+            - Channel (str): The TV channel.
+            - Date (datetime): The broadcast date.
+            - Start Time (str): The program's start time.
+            - Nola Episode Agreement, Episode Number Agreement, Title Agreement (str): Sources grouped by the
+              value they have for each field, largest group first, with groups separated by ' | '
+              (e.g., 'protrack titan | pbs'). Empty if fewer than two sources have a value.
+            - All other columns from each file, with names concatenated with " - (file name)".
+
+    Notes:
+        - All sources are aligned on Channel, DateTime and occurrence in the slot in a single outer join, so a
+          slot listed twice in one file lines up with a slot listed twice in another, instead of multiplying rows.
+        - Each channel is trimmed to the time frame every source with data for it shares, narrowed by any
+          start and end dates.
+        - As in `compare.compare_tv_schedules`, fields are checked in order: Nola Episode, then Episode Number
+          if fewer than two sources have a Nola Episode, and then Title Key (the normalized program name, with
+          aliases from data/title_aliases.csv mapped to one title), with names matched at `threshold`.
+        - Slots are aligned on exact start times. Unlike two files, there is no tolerance for start times that differ.
+    """
+
+    if len(set(paths)) < len(paths): raise ValueError(f'Each source can only be compared once: {paths}')
+
+    sources = [Path(path).stem for path in paths]
+    aliases = load_aliases()
+    channels = None if channel == 'all' else [channel] if isinstance(channel, str) else list(channel)
+
+    # read each parsed file once, with the same categories in each, so channels line up by code
+    dfs = [read_schedule(path, channels) if schedules is None else from_compact(schedules[i], channels) for i, path in enumerate(paths)]
+
+    # index each by slot and occurrence in the slot, with source names on columns
+    frames = []
+    for df, source in zip(share_categories(dfs), sources):
+        if 'Title Key' not in df.columns: df['Title Key'] = title_key(df['Program Name'])
+        df['Title Key'] = apply_aliases(df['Title Key'], aliases)
+        df['Occurrence'] = df.groupby(['Channel', 'DateTime']).cumcount()
+        df = df.set_index(KEYS)
+        frames.append(df.add_suffix(f' - {source}'))
+
+    # shared time frame for each channel, across sources with data for it
+    slots = [df.index.to_frame(index=False).groupby('Channel')['DateTime'] for df in frames]
+    starts = pd.concat([slot.min() for slot in slots], axis=1, keys=sources)
+    ends = pd.concat([slot.max() for slot in slots], axis=1, keys=sources)
+    datetime_start, datetime_end = starts.max(axis=1), ends.min(axis=1)
+    if start_date: datetime_start = datetime_start.mask(start_date > datetime_start, start_date)
+    if end_date: datetime_end = datetime_end.mask(end_date < datetime_end, end_date)
+
+    # align all sources in one outer join, then trim for each channel's time frame and sort
+    df = pd.concat(frames, axis=1, join='outer').reset_index()
+    df = df[in_time_frames(df, datetime_start, datetime_end)]
+    df = df.sort_values(by=KEYS).reset_index(drop=True)
+
+    # a source has a program in a slot if any of its columns has a value, and a source with no data
+    # for a channel is not counted as missing from its slots
+    present = pd.DataFrame({
+        source: df[[col for col in df.columns if col.endswith(f' - {source}')]].notna().any(axis=1)
+                | ~df['Channel'].isin(starts[source].dropna().index)
+        for source in sources
+    })
+
+    # group sources by value for each field, for sources that have the field
+    groups = {}
+    for field in FIELDS:
+        cols = [f'{field} - {source}' for source in sources if f'{field} - {source}' in df.columns]
+        names = [col[len(field) + 3:] for col in cols]
+        field_threshold = threshold if field == 'Title Key' else None
+        if cols: groups[field] = [group_sources(values, names, field_threshold) for values in zip(*(df[col] for col in cols))]
+        else: groups[field] = [[] for _ in range(len(df))]
+
+    # check each slot on the first field at least two sources have, and flag the odd sources out
+    mismatch, odd = [], []
+    for i, row_present in enumerate(present.itertuples(index=False)):
+        checked = next((groups[field][i] for field in FIELDS if sum(map(len, groups[field][i])) >= 2), [])
+        missing = [source for source, is_present in zip(sources, row_present) if not is_present]
+        odd_out = odd_sources(checked) + missing
+        mismatch.append('YES' if len(checked) > 1 or missing else '')
+        odd.append(' '.join(source for source in sources if source in odd_out))
+
+    # build output, with status columns first
+    agreement = {
+        f'{field.replace(" Key", "")} Agreement': [' | '.join(' '.join(g) for g in row) if sum(map(len, row)) >= 2 else ''
+                                                   for row in groups[field]]
+        for field in FIELDS
+    }
+    df.insert(0, 'MISMATCH', mismatch)
+    df.insert(1, 'ODD SOURCE', odd)
+    df.insert(3, 'Date', df['DateTime'].dt.normalize())
+    df.insert(4, 'Start Time', df.pop('DateTime').dt.strftime('%H:%M:%S'))
+    for i, (col, values) in enumerate(agreement.items()): df.insert(5 + i, col, values)
+    df = df.drop(columns=['Occurrence'])
+
+    # compile only mismatches
+    df_mis = df[df['MISMATCH'] == 'YES']
+
+    df.to_csv(output_path, index=False)
+    df_mis.to_csv(output_path.replace('.csv', '_mismatches.csv'), index=False)
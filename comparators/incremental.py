@@ -0,0 +1,240 @@
+from pathlib import Path
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+from comparators.compare import COMPARE_VERSION, compare_frames
+from comparators.titles import load_aliases
+from config import COMPARE_CACHE_DAYS
+
+DAY = pd.Timedelta(days=1)
+KEYS = ['Channel', 'DateTime', 'Occurrence'] # a mismatch, as the same row of the same slot from run to run
+
+def settings_key(df_1, df_2, file_names, tolerance, threshold):
+    """
+    Builds a key for everything other than schedule rows that a comparison's results depend on.
+
+    Args:
+        df_1 (pd.DataFrame): First schedule, from `compare.read_schedule`.
+        df_2 (pd.DataFrame): Second schedule, with the same layout.
+        file_names (list[str]): Names of the first and second file.
+        tolerance (float): Seconds start times can differ and still be matched to the nearest slot.
+        threshold (float): Lowest similarity score for two program names to match.
+
+    Returns:
+        str: A hex key that changes when columns, file names, options, title aliases or `COMPARE_VERSION` change.
+    """
+
+    settings = [COMPARE_VERSION, list(file_names), list(df_1.columns), list(df_2.columns),
+                tolerance, threshold, sorted(load_aliases().items())]
+    return hashlib.sha256(json.dumps(settings, default=str).encode('utf-8')).hexdigest()
+
+def day_hashes(df):
+    """
+    Hashes a schedule's rows on each channel and day, in order.
+
+    Arg:
+        df (pd.DataFrame): Schedule, from `compare.read_schedule`, with a "DateTime" column.
+
+    Returns:
+        dict: One unsigned 64-bit hash per (channel, day), with days as midnight timestamps.
+
+    Notes:
+        - Each row's hash is multiplied by its position in the day before they are added, so reordering
+          rows changes the hash, as it can change the order of rows in the output.
+    """
+
+    if df.empty: return {}
+
+    days = df['DateTime'].dt.normalize()
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    positions = df.groupby(['Channel', days]).cumcount().to_numpy().astype('uint64') + np.uint64(1)
+    return pd.Series(hashes * positions).groupby([df['Channel'].to_numpy(), days.to_numpy()]).sum().to_dict()
+
+def fingerprint_days(df_1, df_2, datetime_start, datetime_end, tolerance):
+    """
+    Fingerprints each channel and day in the time frames, from both schedules' rows that the day's results depend on.
+
+    Args:
+        df_1 (pd.DataFrame): First schedule, from `compare.read_schedule`.
+        df_2 (pd.DataFrame): Second schedule, with the same layout.
+        datetime_start (pd.Series): First slot of each channel's time frame, indexed by channel.
+        datetime_end (pd.Series): Last slot of each channel's time frame, indexed by channel.
+        tolerance (float): Seconds start times can differ and still be matched to the nearest slot.
+
+    Returns:
+        dict: A hex fingerprint for each (channel, day), with days as midnight timestamps.
+
+    Notes:
+        - A day's fingerprint covers both schedules' rows that day, and with a tolerance, the day before and after
+          too, as slots near midnight can be matched across days. It also covers where a time frame starts or ends,
+          if that is during the day.
+    """
+
+    sides = [day_hashes(df_1), day_hashes(df_2)]
+    fingerprints = {}
+
+    for channel, start in datetime_start.items():
+        end = datetime_end[channel]
+        if pd.isna(start) or pd.isna(end): continue
+
+        for day in pd.date_range(start.normalize(), end.normalize()):
+            near = [day - DAY, day, day + DAY] if tolerance else [day]
+            parts = [int(side.get((channel, d), 0)) for side in sides for d in near]
+            parts += [str(start) if start > day else '', str(end) if end < day + DAY else '']
+            fingerprints[(channel, day)] = hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+    return fingerprints
+
+def in_days(df, days):
+    """
+    Finds the rows of a schedule, or of comparison results, on some channels and days.
+
+    Args:
+        df (pd.DataFrame): Rows with "Channel" and "DateTime" columns.
+        days (set): (channel, day) pairs to find, with days as midnight timestamps.
+
+    Returns:
+        np.ndarray: True for each row of `df` on `days`.
+    """
+
+    return pd.MultiIndex.from_arrays([df['Channel'], df['DateTime'].dt.normalize()]).isin(list(days))
+
+def compare_days(df_1, df_2, file_names, datetime_start, datetime_end, tolerance, threshold, state=None,
+                 keep_days=COMPARE_CACHE_DAYS):
+    """
+    Compares two schedules with `compare.compare_frames`, only recomputing days whose fingerprint changed
+    since the last run, and reusing that run's results for every other day.
+
+    Args:
+        df_1 (pd.DataFrame): Schedule with the correct programs, from `compare.read_schedule`.
+        df_2 (pd.DataFrame): Schedule to check for any mismatches, with the same layout.
+        file_names (list[str]): Names of the first and second file.
+        datetime_start (pd.Series): First slot of each channel's time frame, indexed by channel.
+        datetime_end (pd.Series): Last slot of each channel's time frame, indexed by channel.
+        tolerance (float): Seconds start times can differ and still be matched to the nearest slot.
+        threshold (float): Lowest similarity score, from 0 to 1, for two program names to match.
+        state (dict, optional): State saved by the last run, from `cache.load_compare_state`. Defaults to `None`,
+            which compares every day.
+        keep_days (int, optional): Days before the first and after the last day of this run's time frames whose
+            results are kept in the state. Defaults to `COMPARE_CACHE_DAYS` in config.py.
+
+    Returns:
+        Tuple[pd.DataFrame, dict]: The same results as `compare.compare_frames`, and the state to save for the
+        next run, with day fingerprints and results, the days this run compared, this run's mismatches, and
+        output files saved so far, with a digest of their days from `days_digest` and their `file_stamp`.
+
+    Notes:
+        - Results are kept for every day compared so far within `keep_days` of this run's days, so a run on other
+          channels or nearby dates can still reuse them, and the state does not grow with every day ever compared.
+        - Changed days are compared from rows on those days, plus a day on each side with a tolerance, and only
+          rows on changed days are kept from that comparison.
+    """
+
+    settings = settings_key(df_1, df_2, file_names, tolerance, threshold)
+    fingerprints = fingerprint_days(df_1, df_2, datetime_start, datetime_end, tolerance)
+
+    if state is None or state['settings'] != settings: state = {'fingerprints': {}, 'results': None, 'written': {}}
+    changed = {day for day, fingerprint in fingerprints.items() if state['fingerprints'].get(day) != fingerprint}
+    reused = set(fingerprints) - changed
+    print(f'\nCompare cache: {len(reused)} days reused, {len(changed)} days compared')
+
+    # compare changed days, from only their rows when other days are reused
+    computed = None
+    if changed or not reused:
+        if reused:
+            near = {(channel, day + shift) for channel, day in changed for shift in [-DAY, 0 * DAY, DAY]} if tolerance else changed
+            computed = compare_frames(df_1[in_days(df_1, near)], df_2[in_days(df_2, near)], file_names,
+                                      datetime_start, datetime_end, tolerance, threshold)
+            computed = computed[in_days(computed, changed)]
+        else: computed = compare_frames(df_1, df_2, file_names, datetime_start, datetime_end, tolerance, threshold)
+
+    # assemble results from reused and changed days, which sort into the same order a full comparison has
+    frames = [state['results'][in_days(state['results'], reused)]] if reused else []
+    if computed is not None: frames.append(computed)
+    df = frames[0] if len(frames) == 1 else pd.concat(frames).sort_values(by=['Channel', 'DateTime'], kind='stable')
+
+    # keep results of days compared so far near this run's days, replacing results of changed days
+    results = state['results']
+    if results is not None and changed: results = results[~in_days(results, changed)]
+    if computed is not None: results = computed if results is None else pd.concat([results, computed], ignore_index=True)
+
+    kept = {**state['fingerprints'], **fingerprints}
+    if fingerprints:
+        first = min(day for _, day in fingerprints) - keep_days * DAY
+        last = max(day for _, day in fingerprints) + keep_days * DAY
+        kept = {(channel, day): fingerprint for (channel, day), fingerprint in kept.items() if first <= day <= last}
+        if results is not None: results = results[results['DateTime'].between(first, last + DAY, inclusive='left')]
+
+    occurrence = df.groupby(['Channel', 'DateTime']).cumcount().to_numpy()
+    is_mismatch = (df['MISMATCH'] == 'YES').to_numpy()
+    new_state = {
+        'settings': settings,
+        'fingerprints': kept,
+        'results': results,
+        'days': set(fingerprints),
+        'mismatches': df[is_mismatch].assign(Occurrence=occurrence[is_mismatch]),
+        'written': dict(state.get('written', {}))
+    }
+
+    return df, new_state
+
+def days_digest(state, channels):
+    """
+    Digests the fingerprints of the days a run compared on some channels, to tell if an output file
+    saved from those days would be the same.
+
+    Args:
+        state (dict): State of the run, from `compare_days`.
+        channels (list[str]): Channels in the output file.
+
+    Returns:
+        str: A hex digest of the run's settings, and the fingerprint of each day it compared on `channels`.
+    """
+
+    days = sorted((channel, str(day), state['fingerprints'][(channel, day)]) for channel, day in state['days'] if channel in channels)
+    return hashlib.sha256(repr([state['settings'], days]).encode('utf-8')).hexdigest()
+
+def file_stamp(path):
+    """
+    Gets the size and modification time of a file, to tell if it changed since it was saved.
+
+    Arg:
+        path (str): Path to the file.
+
+    Returns:
+        tuple: Size in bytes and modification time in nanoseconds, or None if there is no file.
+    """
+
+    path = Path(path)
+    if not path.exists(): return None
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+def mismatch_changes(state, new_state):
+    """
+    Finds mismatches that are new, resolved or still present since the last run, on days both runs compared.
+
+    Args:
+        state (dict): State saved by the last run, or `None` if there was none.
+        new_state (dict): State of this run, from `compare_days`.
+
+    Returns:
+        pd.DataFrame: Each mismatch from either run, with a CHANGE column first instead of MISMATCH: 'NEW', 'RESOLVED'
+        (with the last run's row) or 'STILL PRESENT'. `None` if there was no last run, or it compared none of the same days.
+    """
+
+    if not state or 'days' not in state: return None
+    days = state['days'] & new_state['days']
+    if not days: return None
+
+    before = state['mismatches'][in_days(state['mismatches'], days)]
+    after = new_state['mismatches'][in_days(new_state['mismatches'], days)]
+    keys_before = pd.MultiIndex.from_frame(before[KEYS])
+    keys_after = pd.MultiIndex.from_frame(after[KEYS])
+
+    after = after.assign(MISMATCH=np.where(keys_after.isin(keys_before), 'STILL PRESENT', 'NEW'))
+    resolved = before[~keys_before.isin(keys_after)].assign(MISMATCH='RESOLVED')
+    changes = pd.concat([after, resolved]).sort_values(by=KEYS, kind='stable')
+
+    return changes.rename(columns={'MISMATCH': 'CHANGE'}).drop(columns=['DateTime', 'Occurrence'])
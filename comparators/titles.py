@@ -0,0 +1,99 @@
+from pathlib import Path
+from functools import lru_cache
+from difflib import SequenceMatcher
+import pandas as pd
+from parsers.normalize import title_key
+
+ALIASES_PATH = Path(__file__).resolve().parent.parent / 'data' / 'title_aliases.csv'
+PREFIX_MIN_LENGTH_RATIO = 2 / 3 # a shorter name that starts a longer one must be at least this long, relative to it
+
+def load_aliases(path=ALIASES_PATH):
+    """
+    Loads the alias table, which maps other names a program goes by to one title, for names that
+    normalizing and scoring titles cannot match (e.g., 'DW The Day' and 'The Day').
+
+    Arg:
+        path (Path, optional): Path to a CSV file with "Title" and "Alias" columns. Defaults to `ALIASES_PATH`.
+
+    Returns:
+        dict: Title key of each alias, mapped to the title key of its title. Empty if there is no file.
+    """
+
+    if not Path(path).exists(): return {}
+
+    df = pd.read_csv(path, dtype=str).dropna()
+    return dict(zip(title_key(df['Alias']), title_key(df['Title'])))
+
+def apply_aliases(keys, aliases):
+    """
+    Replaces title keys that are aliases with the title key they map to.
+
+    Args:
+        keys (pd.Series): Title keys, from `parsers.normalize.title_key`.
+        aliases (dict): Alias title keys mapped to title keys, from `load_aliases`.
+
+    Returns:
+        pd.Series: Title keys, with aliases replaced. Missing values stay missing.
+
+    Notes:
+        - Categorical keys are replaced once per category, and stay categorical unless two categories become one.
+    """
+
+    if not aliases: return keys
+    if isinstance(keys.dtype, pd.CategoricalDtype): return keys.map(lambda key: aliases.get(key, key))
+    return keys.where(~keys.isin(list(aliases)), keys.map(aliases))
+
+@lru_cache(maxsize=None)
+def similarity(key_1, key_2):
+    """
+    Scores how similar two title keys are, from 0 (nothing in common) to 1 (the same title).
+
+    Args:
+        key_1 (str): First title key.
+        key_2 (str): Second title key.
+
+    Returns:
+        float: 1 if the keys are equal, or if the shorter key has at least two words, starts the longer one
+        at a word boundary and is at least `PREFIX_MIN_LENGTH_RATIO` as long (a title with a short subtitle
+        added), or else difflib's similarity ratio.
+
+    Notes:
+        - Memoized, so each distinct pair of titles is only scored once per run.
+        - Other names that start another, like 'pbs news' and 'pbs newshour', or 'great performances' and
+          'great performances at the met', are different programs as often as not, so they are scored by ratio.
+    """
+
+    if key_1 == key_2: return 1.0
+
+    shorter, longer = sorted([key_1, key_2], key=len)
+    if (' ' in shorter and longer.startswith(shorter) and longer[len(shorter)] == ' '
+            and len(shorter) >= PREFIX_MIN_LENGTH_RATIO * len(longer)): return 1.0
+
+    return SequenceMatcher(None, key_1, key_2).ratio()
+
+def title_scores(keys_1, keys_2, aliases=None):
+    """
+    Scores title keys from two aligned schedules, row by row, scoring each distinct pair of titles once.
+
+    Args:
+        keys_1 (pd.Series): Title keys from the first schedule.
+        keys_2 (pd.Series): Title keys from the second schedule, aligned with `keys_1`.
+        aliases (dict, optional): Alias title keys mapped to title keys. Defaults to the table from `load_aliases`.
+
+    Returns:
+        pd.Series: Similarity of each row's titles, rounded to 2 decimals, with the index of `keys_1`, or
+        missing where either title is missing.
+    """
+
+    aliases = load_aliases() if aliases is None else aliases
+    pairs = pd.DataFrame({
+        'key_1': apply_aliases(keys_1, aliases).to_numpy(dtype=object),
+        'key_2': apply_aliases(keys_2, aliases).to_numpy(dtype=object)
+    }, index=keys_1.index)
+
+    # score distinct pairs with both titles, then map scores back to every row
+    distinct = pairs.dropna().drop_duplicates()
+    scores = [round(similarity(key_1, key_2), 2) for key_1, key_2 in zip(distinct['key_1'], distinct['key_2'])]
+    distinct['Title Score'] = pd.Series(scores, index=distinct.index, dtype=float)
+
+    return pairs.merge(distinct, on=['key_1', 'key_2'], how='left').set_index(pairs.index)['Title Score']
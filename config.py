@@ -6,6 +6,7 @@ load_dotenv()
 # dictionary mapping parser names to lists of raw file names to parse.
 # each parser corresponds to a specific file format.
 # example: {'parser': ['file_name_1.pdf', 'file_name_2.pdf']}
+# list files oldest first: where files overlap, a later file replaces an earlier file's rows for each slot
 FILES = {
     'protrack': [  # pdf format
         'Protrack_2025-04-13_2025-05-03.pdf'
@@ -23,3 +24,60 @@ FILES = {
 PBS_TV_SCHEDULE_API_KEY = os.getenv('PBS_TV_SCHEDULE_API_KEY') 
 PBS_TV_SCHEDULE_ENDPOINT = 'https://tvss.services.pbs.org/tvss/'
 STATION_CALL_SIGN = 'klrn'
+
+# PBS TV Schedules API requests: maximum requests in flight, timeout in seconds, and
+# retries with exponential backoff (in seconds) on connection errors and 429/5xx responses
+PBS_MAX_IN_FLIGHT = 4
+PBS_TIMEOUT = 30
+PBS_RETRIES = 3
+PBS_BACKOFF = 0.5
+
+# days already stored in data/pbs_days are not requested again until they are older than
+# this many hours. stale days are re-requested with their ETag/Last-Modified validators
+PBS_FRESHNESS_HOURS = 12
+
+# read pbs json incrementally with ijson, so memory stays flat however many days or feeds
+# the file has, instead of loading the whole file with json.load
+PBS_STREAMING_PARSE = True
+
+# maximum size of the parse cache in cache/, in megabytes. least recently used
+# entries are evicted after each parse, or with `python run.py cache prune`
+CACHE_MAX_MB = 500
+
+# protrack pdfs: number of worker processes that extract pages, and whether to cache
+# extracted page text, so re-parsing an unchanged pdf skips pdf decoding
+PROTRACK_PAGE_WORKERS = 1
+PROTRACK_PAGE_CACHE = True
+
+# comparisons: seconds a start time can differ between two sources and still be matched to
+# the nearest slot. 0 matches exact start times only
+COMPARE_TOLERANCE_SECONDS = 0
+
+# comparisons: days before and after a comparison's time frames whose cached results are kept in cache/compare,
+# for a later run on other dates to reuse. results of days further away are dropped when the cache is saved
+COMPARE_CACHE_DAYS = 31
+
+# comparisons: lowest similarity score, from 0 to 1, for two program names to match. names are
+# normalized first, and names in data/title_aliases.csv are mapped to one title. 1 matches equal names only
+TITLE_MATCH_THRESHOLD = 0.85
+
+# keep every parsed slot in a sqlite schedule store at output/schedules.db, keyed by source, channel
+# and slot, and have comparisons read only the channels and dates they need from it
+SCHEDULE_STORE = True
+
+# watch mode: raw files in data/ are routed to a parser by name pattern, instead of FILES. the folder is
+# scanned every WATCH_INTERVAL_SECONDS, and changes are handled once no file has changed for
+# WATCH_DEBOUNCE_SECONDS. each pair in WATCH_COMPARISONS is compared again when either source changes
+WATCH_PATTERNS = {'protrack': 'Protrack*.pdf', 'titan': 'MediaStar*.mhtml', 'pbs': 'pbs*.json'}
+WATCH_INTERVAL_SECONDS = 2
+WATCH_DEBOUNCE_SECONDS = 3
+WATCH_COMPARISONS = [('protrack', 'titan'), ('protrack', 'pbs')]
+WATCH_CHANNEL = 'all'
+
+# benchmark suite: (days, channels, slots per day) of each synthetic scale, and the drop in rows per
+# second, or rise in peak memory, as a share of a saved baseline, that is flagged as a regression
+BENCHMARK_SCALES = [(7, 1, 48), (28, 4, 48), (91, 4, 48)]
+BENCHMARK_REGRESSION = 0.1
+
+# pipeline command: number of stages (get, parse and compare) that run at once, in threads
+PIPELINE_MAX_CONCURRENT = 4
@@ -0,0 +1,211 @@
+from pathlib import Path
+from importlib import import_module
+import hashlib
+import os
+import shutil
+import pandas as pd
+from config import CACHE_MAX_MB
+
+CACHE_ROOT = Path(__file__).resolve().parent.parent / 'cache'
+CACHE_DIR = CACHE_ROOT / 'parsed'
+PAGES_DIR = CACHE_ROOT / 'pages'
+COMPARE_DIR = CACHE_ROOT / 'compare'
+
+def file_hash(input_path):
+    """
+    Hashes the content of a file in chunks, so large inputs are not read into memory at once.
+
+    Arg:
+        input_path (Path): Path to the file to hash.
+
+    Returns:
+        str: The SHA-256 hex digest of the file content.
+    """
+
+    digest = hashlib.sha256()
+    with open(input_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_key(input_path, module_name):
+    """
+    Builds a cache key from a file's content hash, the parser module, and its PARSER_VERSION.
+
+    Args:
+        input_path (Path): Path to the raw input file.
+        module_name (str): Dotted name of the parser module (e.g., 'parsers.titan.process').
+
+    Returns:
+        str: A hex key that changes when the file content, parser module or parser version changes.
+    """
+
+    version = getattr(import_module(module_name), 'PARSER_VERSION', 0)
+    key = f'{file_hash(input_path)}:{module_name}:{version}'
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def load(key):
+    """
+    Loads a cached DataFrame, and marks it as recently used for eviction.
+
+    Arg:
+        key (str): Cache key from `cache_key`.
+
+    Returns:
+        pd.DataFrame: The cached DataFrame, or None if there is no entry for `key`.
+    """
+
+    path = CACHE_DIR / f'{key}.pkl'
+    if not path.exists(): return None
+
+    try:
+        df = pd.read_pickle(path)
+    except Exception as e:  # treat an unreadable entry as a miss, and drop it
+        print(f'Could not read cache entry {path.name}: {e}')
+        path.unlink(missing_ok=True)
+        return None
+
+    os.utime(path)  # refresh modification time, so eviction removes least recently used first
+    return df
+
+def save(key, df):
+    """
+    Saves a parsed DataFrame to the cache as a pickle, which keeps column dtypes intact.
+
+    Args:
+        key (str): Cache key from `cache_key`.
+        df (pd.DataFrame): The parsed DataFrame to store.
+    """
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / f'{key}.pkl'
+    tmp_path = path.with_suffix('.tmp')
+    df.to_pickle(tmp_path)
+    tmp_path.replace(path)  # write then rename, so readers never see a partial file
+
+def load_page_texts(pdf_hash):
+    """
+    Loads the extracted text of every page of a PDF from the page cache.
+
+    Arg:
+        pdf_hash (str): Content hash of the PDF, from `file_hash`.
+
+    Returns:
+        list[str]: Text of each page, in page order, or None if the PDF or any of its pages is not cached.
+    """
+
+    page_dir = PAGES_DIR / pdf_hash
+    count_path = page_dir / 'num_pages'
+    if not count_path.exists(): return None
+
+    texts = []
+    for page_index in range(int(count_path.read_text())):
+        path = page_dir / f'{page_index}.txt'
+        if not path.exists(): return None
+        os.utime(path)  # refresh modification time, so eviction removes least recently used first
+        texts.append(path.read_text(encoding='utf-8'))
+
+    return texts
+
+def save_page_texts(pdf_hash, texts):
+    """
+    Saves the extracted text of each page of a PDF to the page cache, one file per page index.
+
+    Args:
+        pdf_hash (str): Content hash of the PDF, from `file_hash`.
+        texts (list[str]): Text of each page, in page order.
+    """
+
+    page_dir = PAGES_DIR / pdf_hash
+    page_dir.mkdir(parents=True, exist_ok=True)
+
+    for page_index, text in enumerate(texts):
+        tmp_path = page_dir / f'{page_index}.tmp'
+        tmp_path.write_text(text, encoding='utf-8')
+        tmp_path.replace(page_dir / f'{page_index}.txt')
+
+    (page_dir / 'num_pages').write_text(str(len(texts))) # written last, so it marks a complete entry
+
+def load_compare_state(name):
+    """
+    Loads what the last comparison saved to an output name, to reuse its results for unchanged days.
+
+    Arg:
+        name (str): Name of the comparison's output file, without extension (e.g., 'protrack_titan').
+
+    Returns:
+        dict: State from `comparators.incremental.compare_days`, or None if there is none for `name`.
+    """
+
+    path = COMPARE_DIR / f'{name}.pkl'
+    if not path.exists(): return None
+
+    try:
+        state = pd.read_pickle(path)
+    except Exception as e:  # treat an unreadable entry as a miss, and drop it
+        print(f'Could not read cache entry {path.name}: {e}')
+        path.unlink(missing_ok=True)
+        return None
+
+    os.utime(path)  # refresh modification time, so eviction removes least recently used first
+    return state
+
+def save_compare_state(name, state):
+    """
+    Saves a comparison's state, with its day fingerprints, results and mismatches, for the next run.
+
+    Args:
+        name (str): Name of the comparison's output file, without extension (e.g., 'protrack_titan').
+        state (dict): State from `comparators.incremental.compare_days`.
+    """
+
+    COMPARE_DIR.mkdir(parents=True, exist_ok=True)
+    path = COMPARE_DIR / f'{name}.pkl'
+    tmp_path = path.with_suffix('.tmp')
+    pd.to_pickle(state, tmp_path)
+    tmp_path.replace(path)  # write then rename, so readers never see a partial file
+
+def prune(max_mb=CACHE_MAX_MB, clear=False):
+    """
+    Evicts least recently used entries, from parsed files, PDF page texts and comparison states, until the cache fits in `max_mb`.
+
+    Args:
+        max_mb (float, optional): Maximum cache size in megabytes. Defaults to `CACHE_MAX_MB` in config.py.
+        clear (bool, optional): Remove every entry, regardless of size. Defaults to False.
+
+    Returns:
+        int: Number of entries removed.
+
+    Notes:
+        - Each PDF's page texts are one entry, used when any of its pages was last used, and removed as a whole,
+          since `load_page_texts` needs every page and the "num_pages" marker.
+    """
+
+    if not CACHE_ROOT.exists(): return 0
+
+    entries, pages = [], {}
+    for path in CACHE_ROOT.rglob('*'):
+        try: stat = path.stat()
+        except FileNotFoundError: continue # renamed or removed by another run, or pipeline stage, while listing
+        if not path.is_file(): continue
+
+        if path.parent.parent == PAGES_DIR: # group a PDF's page files into one entry for its folder
+            used, size = pages.get(path.parent, (0, 0))
+            pages[path.parent] = (max(used, stat.st_mtime), size + stat.st_size)
+        else:
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    entries += [(used, size, page_dir) for page_dir, (used, size) in pages.items()]
+    entries.sort(key=lambda entry: entry[0]) # oldest first
+    total = sum(size for _, size, _ in entries)
+    max_bytes = 0 if clear else max_mb * 1024 * 1024
+    removed = 0
+
+    for _, size, path in entries:
+        if total <= max_bytes: break
+        total -= size
+        if path.is_dir(): shutil.rmtree(path, ignore_errors=True)
+        else: path.unlink(missing_ok=True)
+        removed += 1
+
+    return removed
@@ -0,0 +1,182 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# the compact schema every parser returns, and parse_files and comparisons work in: a slot is one datetime64
+# value, a row without a start time keeps its date in a Date column, columns whose values repeat from slot
+# to slot are dictionary-encoded, so each distinct value is stored once, and other text is Arrow-backed
+CATEGORY_COLUMNS = ('Channel', 'Program Name', 'Nola Episode', 'Title Key')
+TEXT = pd.StringDtype('pyarrow', na_value=np.nan)
+SLOT = 'datetime64[s]'
+
+def compact(df):
+    """
+    Converts a schedule to the compact schema.
+
+    Arg:
+        df (pd.DataFrame): Schedule with "Channel" and "Slot" (the broadcast date and start time, as datetime64)
+            columns, an optional "Date" (datetime64) column, and text columns.
+
+    Returns:
+        pd.DataFrame: A DataFrame with the same index and `attrs`, and these columns:
+        - Channel (category): The TV channel.
+        - Slot (datetime64[s]): The broadcast date and start time, or NaT if either is missing.
+        - Date (datetime64[s], optional): The broadcast date of a row without a slot, when it has one, and NaT
+          for every other row, since their slot holds it. Only when `df` has a "Date" column.
+        - Program Name, Nola Episode, Title Key (category): Dictionary-encoded, when present.
+        - Other columns (string): Arrow-backed strings, in the same order as in `df`.
+
+    Notes:
+        - Empty strings become missing values, as they do when the CSV export is read.
+    """
+
+    columns = {'Channel': df['Channel'].astype(TEXT).astype('category'), 'Slot': df['Slot'].astype(SLOT)}
+    if 'Date' in df.columns: columns['Date'] = df['Date'].astype(SLOT).where(columns['Slot'].isna())
+    for col in df.columns.drop(['Channel', 'Slot', 'Date'], errors='ignore'):
+        values = df[col].astype(TEXT)
+        values = values.where(values != '')
+        columns[col] = values.astype('category') if col in CATEGORY_COLUMNS else values
+
+    compacted = pd.DataFrame(columns, index=df.index)
+    compacted.attrs = df.attrs
+    return compacted
+
+def to_slots(dates, times, date_format, time_format):
+    """
+    Converts columns of date and start time strings to slots, converting each distinct date and time once,
+    since a schedule repeats both from row to row.
+
+    Args:
+        dates (pd.Series): Date strings.
+        times (pd.Series): Start time strings, aligned with `dates`.
+        date_format (str): Format of the dates (e.g., '%Y%m%d').
+        time_format (str): Format of the start times (e.g., '%H%M').
+
+    Returns:
+        pd.Series: Slots as datetime64[s], with the index of `dates`, or NaT where a date or start time is missing.
+    """
+
+    date_codes, unique_dates = pd.factorize(dates)
+    time_codes, unique_times = pd.factorize(times)
+    days = pd.to_datetime(unique_dates, format=date_format).to_numpy(SLOT)
+    seconds = (pd.to_datetime(unique_times, format=time_format) - pd.Timestamp('1900-01-01')).to_numpy('timedelta64[s]')
+
+    slots = pd.Series(days[date_codes] + seconds[time_codes], index=dates.index)
+    return slots.where((date_codes >= 0) & (time_codes >= 0))
+
+def to_dates(dates, slots, date_format=None):
+    """
+    Converts the date strings of rows without a slot to dates, so a row whose start time is missing
+    keeps its date.
+
+    Args:
+        dates (pd.Series): Date strings.
+        slots (pd.Series): Slots from `to_slots`, aligned with `dates`.
+        date_format (str, optional): Format of the dates (e.g., '%Y%m%d'). Defaults to inferring it.
+
+    Returns:
+        pd.Series: Dates as datetime64[s] for rows without a slot, with the index of `dates`, or NaT for
+        rows with a slot, or without a date that can be read.
+    """
+
+    codes, unique_dates = pd.factorize(dates.where(slots.isna()))
+    days = pd.to_datetime(unique_dates, format=date_format, errors='coerce').to_numpy(SLOT)
+    days = np.append(days, np.datetime64('NaT', 's')) # code -1, for rows with a slot or no date, indexes NaT
+    return pd.Series(days[codes], index=dates.index)
+
+def expand(df):
+    """
+    Converts a schedule in the compact schema to the layout of the CSV export.
+
+    Arg:
+        df (pd.DataFrame): Schedule in the compact schema, from `compact`.
+
+    Returns:
+        pd.DataFrame: The schedule, with "Date" ('YYYY-MM-DD') and "Start Time" ('HH:MM:SS') columns in place of "Slot".
+        A row without a slot has the date from its "Date" column, if any, and no start time.
+    """
+
+    position = df.columns.get_loc('Slot')
+    slot = df['Slot']
+    dates = slot.fillna(df['Date']) if 'Date' in df.columns else slot
+    df = df.drop(columns=['Slot', 'Date'], errors='ignore')
+    df.insert(position, 'Date', dates.dt.strftime('%Y-%m-%d'))
+    df.insert(position + 1, 'Start Time', slot.dt.strftime('%H:%M:%S'))
+    return df
+
+def read_csv(csv_path):
+    """
+    Reads a parsed CSV file into the compact schema.
+
+    Arg:
+        csv_path (Path): Path of the parsed CSV file, with "Channel", "Date" and "Start Time" columns.
+
+    Returns:
+        pd.DataFrame: The schedule in the compact schema, from `compact`.
+    """
+
+    df = pd.read_csv(csv_path, dtype={'Channel': str})
+    dates = df.pop('Date')
+    slot = pd.to_datetime(dates + ' ' + df.pop('Start Time'), errors='coerce')
+    df.insert(1, 'Slot', slot)
+    df.insert(2, 'Date', to_dates(dates, slot, '%Y-%m-%d'))
+    return compact(df)
+
+def share_categories(frames):
+    """
+    Gives the categorical columns of several schedules the same categories, so they can be concatenated,
+    merged and compared without falling back to plain strings.
+
+    Arg:
+        frames (list[pd.DataFrame]): Schedules in the compact schema.
+
+    Returns:
+        list[pd.DataFrame]: The schedules, in the same order, with each categorical column's categories
+        being every value it has in any of them, sorted, so channels sort by their codes.
+    """
+
+    dtypes = {}
+    for df in frames:
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype): dtypes.setdefault(col, []).append(df[col].cat.categories)
+
+    dtypes = {col: pd.CategoricalDtype(categories[0].append(categories[1:]).unique().sort_values())
+              for col, categories in dtypes.items()}
+    return [df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns}) for df in frames]
+
+def write_parquet(df, output_path):
+    """
+    Saves a parsed schedule as a Parquet file in the compact schema, next to its CSV export.
+
+    Args:
+        df (pd.DataFrame): Parsed TV schedule data, in the compact schema.
+        output_path (Path): Path of the CSV export. The Parquet file gets the same name, with a '.parquet' extension.
+
+    Returns:
+        Path: Path of the Parquet file.
+    """
+
+    parquet_path = Path(output_path).with_suffix('.parquet')
+    df.to_parquet(parquet_path, index=False)
+    return parquet_path
+
+def read_parquet_if_fresh(csv_path):
+    """
+    Reads the Parquet file saved next to a parsed CSV file, if it exists and is not older than the CSV.
+
+    Arg:
+        csv_path (Path): Path of the parsed CSV file.
+
+    Returns:
+        pd.DataFrame: The schedule in the compact schema, or None if there is no fresh Parquet file.
+    """
+
+    csv_path = Path(csv_path)
+    parquet_path = csv_path.with_suffix('.parquet')
+    if not parquet_path.exists(): return None
+    if csv_path.exists() and csv_path.stat().st_mtime > parquet_path.stat().st_mtime: return None
+
+    df = pd.read_parquet(parquet_path)
+    if 'Start Time' in df.columns: return None # saved before the compact schema, so read the CSV
+    # Parquet has no unit of seconds, so slots and dates are read back in milliseconds
+    return df.astype({col: SLOT for col in ('Slot', 'Date') if col in df.columns})
@@ -0,0 +1,74 @@
+import pandas as pd
+
+# every character that Python's `\s` matches, written out so the same class also works with the
+# RE2 engine behind Arrow-backed string columns, whose `\s` is ASCII only
+WHITESPACE = '[\t\n\x0b\x0c\r\x1c-\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]+'
+
+def clean_text(series):
+    """
+    Strips a column of strings, and collapses runs of whitespace to one space, with vectorized string
+    operations.
+
+    Arg:
+        series (pd.Series): A column whose non-missing values are all strings.
+
+    Returns:
+        pd.Series: The cleaned column. Missing values stay missing.
+    """
+
+    return series.str.replace(WHITESPACE, ' ', regex=True).str.strip(' ')
+
+# combining accent marks, left after unicode decomposition (e.g., 'é' becomes 'e' and a mark)
+ACCENTS = '[\u0300-\u036f]'
+
+def title_key(series):
+    """
+    Builds a normalized title key for matching program names across sources, with vectorized string
+    operations.
+
+    Arg:
+        series (pd.Series): A column of program names.
+
+    Returns:
+        pd.Series: Lowercased names without accents, punctuation or a leading article, with '&' spelled
+        out as 'and', and single spaces between words. Missing values stay missing.
+
+    Notes:
+        - Apostrophes are dropped, so "Antonio's" keys as "antonios", while other punctuation, such as
+          hyphens and colons, becomes a space, so "Marie-Antoinette" keys as "marie antoinette".
+        - Only letters a-z and digits are kept, so keys are the same under Python and Arrow regex engines.
+    """
+
+    key = series.str.normalize('NFKD').str.replace(ACCENTS, '', regex=True).str.lower()
+    key = key.str.replace('&', ' and ', regex=False).str.replace("['\u2019]", '', regex=True)
+    key = key.str.replace('[^0-9a-z]+', ' ', regex=True).str.strip(' ')
+    return key.str.replace('^(the|a|an) ', '', regex=True)
+
+def normalize(df):
+    """
+    Cleans whitespace in the text columns of a parsed schedule, and adds a normalized title column.
+    Shared by all parsers, in place of a per-cell regex over every column.
+
+    Arg:
+        df (pd.DataFrame): Parsed TV schedule data, including a "Program Name" column.
+
+    Returns:
+        pd.DataFrame: The DataFrame with cleaned text columns and a "Title Key" column, which is the
+        program name normalized by `title_key`, for comparisons to reuse.
+
+    Notes:
+        - Only columns holding strings are cleaned. Columns of dates and times are left as they are.
+        - Columns that mix strings with other values fall back to cleaning cell by cell.
+    """
+
+    df = df.copy()
+
+    for col in df.columns:
+        kind = pd.api.types.infer_dtype(df[col], skipna=True)
+        if kind == 'string': df[col] = clean_text(df[col])
+        elif kind.startswith('mixed'):
+            is_str = df[col].map(lambda x: isinstance(x, str)).astype(bool)
+            df.loc[is_str, col] = clean_text(df.loc[is_str, col].astype(str))
+
+    df['Title Key'] = title_key(df['Program Name'])
+    return df
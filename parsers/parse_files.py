@@ -1,20 +1,211 @@
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from itertools import repeat
+from pathlib import Path
+import multiprocessing
+import threading
+import numpy as np
 import pandas as pd
+from config import SCHEDULE_STORE
+from parsers.columnar import share_categories, expand
+from utils import profiler
 
 PARSERS = {
     'protrack': 'parsers.protrack.process',
     'titan': 'parsers.titan.process',
     'pbs': 'parsers.pbs.process'
-}   
+}
 
-def parse(input_paths, output_path, source):
+KEY = ['Channel', 'Slot'] # a slot, which the newest file has the final say on
+
+def get_parser(source):
+    """
+    Gets the parse function from the parser module mapped to `source`.
+
+    Arg:
+        source (str): The source module to use ('pbs', 'protrack' or 'titan').
+
+    Returns:
+        Callable: The module's parse function, which takes an input path and returns a DataFrame.
+    """
+
+    if source in PARSERS: return getattr(import_module(PARSERS[source]), 'parse')
+    else: raise ValueError(f"Unknown source: {source}")
+
+def parse_file(source, input_path):
+    """
+    Parses one file with the parser for `source`. Defined at module level so it can be sent to
+    worker processes.
+
+    Args:
+        source (str): The source module to use ('pbs', 'protrack' or 'titan').
+        input_path (Path): Path to the file to parse.
+
+    Returns:
+        pd.DataFrame: The parsed TV schedule data for the file.
+    """
+
+    with profiler.stage('parse_files.parse_file') as stage:
+        df = get_parser(source)(input_path)
+        stage.rows = None if df is None else len(df)
+    return df
+
+def pool_context():
+    """
+    Gets the context worker processes are started with, for a process pool created now.
+
+    Returns:
+        multiprocessing.context.BaseContext: The 'spawn' context when other threads are running, as they are
+        in a pipeline, since 'fork' can copy a lock another thread holds into the worker, or else `None`,
+        for the platform's default.
+    """
+
+    return multiprocessing.get_context('spawn') if threading.active_count() > 1 else None
+
+def parse_all(input_paths, source, workers=1):
+    """
+    Parses each file for a given source, either one after another or in a process pool.
+
+    Args:
+        input_paths (list[Path]): List of file paths to parse.
+        source (str): The source module to use ('pbs', 'protrack' or 'titan').
+        workers (int, optional): Number of worker processes. Defaults to 1, which parses serially.
+
+    Returns:
+        list[pd.DataFrame]: One DataFrame per input path, in the same order as `input_paths`.
+
+    Notes:
+        - `executor.map` returns results in submission order, so output matches the serial path.
+        - A pool is only started when there is more than one file and more than one worker.
+    """
+
+    get_parser(source) # fail fast on unknown source, before starting any workers
+
+    if workers > 1 and len(input_paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(input_paths)), mp_context=pool_context()) as executor:
+            return list(executor.map(parse_file, repeat(source), input_paths))
+
+    return [parse_file(source, path) for path in input_paths]
+
+def parse_cached(input_paths, source, workers=1):
+    """
+    Parses each file for a given source, reusing cached DataFrames for files whose content,
+    parser module and parser version are unchanged since they were last parsed.
+
+    Args:
+        input_paths (list[Path]): List of file paths to parse.
+        source (str): The source module to use ('pbs', 'protrack' or 'titan').
+        workers (int, optional): Number of worker processes used to parse cache misses. Defaults to 1.
+
+    Returns:
+        list[pd.DataFrame]: One DataFrame per input path, in the same order as `input_paths`.
+    """
+
+    from parsers import cache
+
+    get_parser(source) # fail fast on unknown source
+    with profiler.stage('parse_files.cache_load') as stage:
+        keys = [cache.cache_key(path, PARSERS[source]) for path in input_paths]
+        dfs = [cache.load(key) for key in keys]
+        stage.rows = sum(len(df) for df in dfs if df is not None)
+
+    # parse only cache misses, and store results that parsed into data
+    misses = [i for i, df in enumerate(dfs) if df is None]
+    parsed = parse_all([input_paths[i] for i in misses], source, workers)
+    for i, df in zip(misses, parsed):
+        dfs[i] = df
+        if df is not None: cache.save(keys[i], df)
+
+    print(f'\nParse cache: {len(input_paths) - len(misses)} hits, {len(misses)} misses')
+    if misses: cache.prune()
+
+    return dfs
+
+def merge_files(dfs, input_paths):
+    """
+    Merges parsed files, each sorted by Channel and Slot, into one sorted DataFrame, keeping only the
+    newest file's rows for each Channel and Slot.
+
+    Args:
+        dfs (list[pd.DataFrame]): One parsed DataFrame per input path, in the compact schema from
+            `columnar.compact`, or None for a file with no data.
+        input_paths (list[Path]): Paths of the parsed files, oldest first, as listed in config.py.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: The merged schedule, and a report of conflicts, which are slots
+        that more than one file has with different rows. The report has every file's rows for those slots,
+        with "File" and "Kept" columns in front.
+
+    Notes:
+        - A later file in `input_paths` is newer, and replaces every row an older file has for the same slot.
+        - Each slot becomes one integer key, from the channel's code and the slot's seconds, and a stable sort
+          of the keys merges the files' sorted runs (timsort finds and merges the runs, like a k-way merge),
+          keeping file order among equal keys.
+        - Categorical columns get every file's categories first, so the merged columns stay categorical.
+        - Rows are compared by hash, and only within a slot, to drop exact duplicates from the same file
+          and to find conflicts, instead of comparing every column of every row.
+        - Files do not have to be sorted, but sorted files merge fastest. Rows missing part of the key go last,
+          without exact duplicates.
+    """
+
+    frames, ranks, unkeyed = [], [], []
+    for rank, df in enumerate(dfs):
+        if df is None or df.empty: continue
+        has_key = df[KEY].notna().all(axis=1)
+        if not has_key.all(): unkeyed.append(df[~has_key])
+        frames.append(df[has_key])
+        ranks.append(np.full(has_key.sum(), rank))
+
+    encoded = share_categories(frames + unkeyed)
+    frames, unkeyed = encoded[:len(frames)], encoded[len(frames):]
+    if not frames: return pd.concat(unkeyed or [pd.DataFrame(columns=KEY)]).drop_duplicates().reset_index(drop=True), pd.DataFrame()
+
+    # one integer key per slot: channel code, in sorted order, then seconds since the epoch
+    combined = pd.concat(frames, ignore_index=True)
+    channels = combined['Channel'].cat.codes.to_numpy().astype('int64')
+    keys = channels * 10**11 + combined['Slot'].to_numpy('datetime64[s]').astype('int64')
+
+    # merge sorted runs, and mark the newest file in each slot
+    order = np.argsort(keys, kind='stable')
+    keys, ranks = keys[order], np.concatenate(ranks)[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(keys)])
+    newest = np.repeat(np.maximum.reduceat(ranks, starts), sizes)
+    oldest = np.repeat(np.minimum.reduceat(ranks, starts), sizes)
+
+    # hash rows by slot and content, only in slots with more than one row, since other rows are always kept
+    shared = np.repeat(sizes > 1, sizes)
+    rows = np.zeros(len(keys), dtype='uint64')
+    hashes = pd.util.hash_pandas_object(combined.take(order[shared]), index=False).to_numpy()
+    rows[shared] = hashes ^ (keys[shared].astype('uint64') * np.uint64(0x9E3779B97F4A7C15)) # slot and row content
+
+    # keep the newest file's rows, once each, and find slots where an older file has a row the newest does not
+    is_kept = ranks == newest
+    is_kept[shared & is_kept] = ~pd.Series(rows[shared & is_kept]).duplicated().to_numpy()
+    is_replaced = (ranks != newest) & ~np.isin(rows, rows[shared & is_kept])
+    in_conflict = (oldest != newest) & np.isin(keys, keys[is_replaced])
+
+    df = combined.take(order[is_kept])
+    if unkeyed: df = pd.concat([df, pd.concat(unkeyed).drop_duplicates()])
+    df = df.reset_index(drop=True)
+    report = combined.take(order[in_conflict]).reset_index(drop=True)
+    if len(report):
+        report.insert(0, 'File', np.array([Path(path).name for path in input_paths])[ranks[in_conflict]])
+        report.insert(1, 'Kept', np.where(ranks[in_conflict] == newest[in_conflict], 'YES', 'NO'))
+
+    return df, report
+
+def parse(input_paths, output_path, source, workers=1, use_cache=True):
     """
-    Parses multiple files for a given source (pbs, protrack, titan), concatenates their data, 
-    removes duplicates, and saves the final result to a CSV file.
+    Parses multiple files for a given source (pbs, protrack, titan), merges their data, keeping the
+    newest file's rows for each slot, and saves the final result to a CSV file.
 
     Args:
         input_paths (list[Path]): List of file paths to parse.
-        output_path (Path): Path to save the concatenated CSV file.
+        output_path (Path): Path to save the merged CSV file.
         source (str): The source module to use ('pbs', 'protrack' or 'titan').
+        workers (int, optional): Number of worker processes used to parse files. Defaults to 1.
+        use_cache (bool, optional): Reuse parsed DataFrames from cache/parsed for unchanged files. Defaults to True.
 
     Output:
         A CSV file containing parsed TV schedule data with the following columns:
@@ -24,24 +215,98 @@ def parse(input_paths, output_path, source):
         - Program Name (str): The name of the TV program.
         - Episode Name (str): The name of the TV program episode.
         - Nola Episode (str, optional): The Nola episode number if available.
-        - Description (str, optional): A brief description of the program.         
+        - Description (str, optional): A brief description of the program.
+        - Title Key (str): The program name normalized by `normalize.title_key` (lowercased, without accents,
+          punctuation or a leading article), which comparisons score, after mapping aliases from
+          data/title_aliases.csv to one title.
+
+        A copy in the compact schema from `columnar.compact` is saved as `<output name>.parquet`, with
+        a categorical Channel, a datetime64 Slot (date and start time), dictionary-encoded program names,
+        Nola episodes and title keys, and string columns, which comparisons read instead of the CSV.
+
+        If a parser rejects any lines, they are saved alongside, as `<output name>_rejects.csv`.
+
+        If an older file has different rows for a slot than a newer file, both files' rows are saved
+        alongside, as `<output name>_conflicts.csv`.
+
+        With `SCHEDULE_STORE` set in config.py, rows are also saved to the schedule store, keyed by source,
+        channel and slot, replacing what the source had on each channel from its first to last slot.
     """
 
-    # import parse
-    if source in PARSERS: parse = getattr(__import__(PARSERS[source], fromlist=['parse']), 'parse')
-    else: raise ValueError(f"Unknown source: {source}")
-    
     # parse each file using the selected parsing function
-    dfs = []
-    for path in input_paths:
-        df = parse(path)
-        dfs.append(df)
-    
-    # concatenate all DataFrames, remove duplicates, and sort 
-    df = pd.concat(dfs, ignore_index=True)
-    df = df.drop_duplicates()
-    df = df.sort_values(by=['Channel', 'Date', 'Start Time'])
-
-    # save result to output_path
-    df.to_csv(output_path, index=False)
-    print(f"\nData from {len(input_paths)} files concatenated and saved to {output_path}")
+    if use_cache: dfs = parse_cached(input_paths, source, workers)
+    else: dfs = parse_all(input_paths, source, workers)
+
+    save_parsed(dfs, input_paths, output_path, source)
+
+def save_parsed(dfs, input_paths, output_path, source):
+    """
+    Merges parsed files for a given source, keeping the newest file's rows for each slot, and saves the
+    result, as described in `parse`.
+
+    Args:
+        dfs (list[pd.DataFrame]): One parsed DataFrame per input path, in the compact schema, or None for a file with no data.
+        input_paths (list[Path]): Paths of the parsed files, oldest first.
+        output_path (Path): Path to save the merged CSV file.
+        source (str): The source module the files were parsed with ('pbs', 'protrack' or 'titan').
+
+    Returns:
+        pd.DataFrame: The merged schedule, in the compact schema.
+    """
+
+    # save lines a parser could not read, if any, to a sidecar file
+    rejects = [row for df in dfs if df is not None for row in df.attrs.get('rejects', [])]
+    rejects_path = output_path.with_name(f'{output_path.stem}_rejects.csv')
+    if rejects:
+        pd.DataFrame(rejects).to_csv(rejects_path, index=False)
+        print(f"\n{len(rejects)} rejected lines saved to {rejects_path}")
+    else: rejects_path.unlink(missing_ok=True)
+
+    # merge sorted DataFrames, keeping the newest file's rows for each slot, and save any conflicts
+    with profiler.stage('parse_files.merge') as stage:
+        df, conflicts = merge_files(dfs, input_paths)
+        stage.rows = len(df)
+    conflicts_path = output_path.with_name(f'{output_path.stem}_conflicts.csv')
+    if len(conflicts):
+        expand(conflicts).to_csv(conflicts_path, index=False)
+        print(f"\n{conflicts['Kept'].eq('NO').sum()} rows replaced by newer files, saved to {conflicts_path}")
+    else: conflicts_path.unlink(missing_ok=True)
+
+    # save result to output_path, with a date and start time for each slot, and a compact copy for comparisons
+    from parsers.columnar import write_parquet
+    with profiler.stage('parse_files.write_csv') as stage:
+        expand(df).to_csv(output_path, index=False)
+        stage.rows = len(df)
+    with profiler.stage('parse_files.write_parquet') as stage:
+        parquet_path = write_parquet(df, output_path)
+        stage.rows = len(df)
+    print(f"\nData from {len(input_paths)} files merged and saved to {output_path} and {parquet_path.name}")
+
+    # save result to the schedule store, replacing the source's slots in the time frame it covers
+    if SCHEDULE_STORE:
+        from parsers import store
+        with profiler.stage('parse_files.store_upsert') as stage:
+            rows = stage.rows = store.upsert(source, df)
+        print(f"{rows} rows saved to {store.STORE_PATH.name}")
+
+    return df
+
+def remove_parsed(output_path, source):
+    """
+    Removes what `save_parsed` saved for a source, for when none of its raw files are left, so comparisons
+    do not read a schedule from files that are gone.
+
+    Args:
+        output_path (Path): Path of the source's merged CSV file.
+        source (str): The source module the files were parsed with ('pbs', 'protrack' or 'titan').
+    """
+
+    names = [output_path.name, output_path.with_suffix('.parquet').name,
+             f'{output_path.stem}_rejects.csv', f'{output_path.stem}_conflicts.csv']
+    for name in names: output_path.with_name(name).unlink(missing_ok=True)
+    print(f"\nNo {source} files are left, so {output_path.name} and its sidecar files were removed")
+
+    if SCHEDULE_STORE:
+        from parsers import store
+        rows = store.delete_source(source)
+        print(f"{rows} rows removed from {store.STORE_PATH.name}")
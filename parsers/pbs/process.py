@@ -1,9 +1,137 @@
 import json
 import pandas as pd
-from datetime import datetime
-import re
+from parsers.normalize import normalize
+from parsers.columnar import compact, to_slots, to_dates
+from utils import profiler
+from config import PBS_STREAMING_PARSE
 
-def parse(input_path):
+# bump when parse() output changes, so cached results from older versions are not reused
+PARSER_VERSION = 5
+
+VALID_CHANNELS = {'9.1', '9.2', '9.3', '9.4'}
+LISTING_FIELDS = ('start_time', 'title', 'nola_episode', 'episode_title', 'description')
+COLUMNS = [
+    'Channel', 'Date', 'Start Time', 'Program Name', 'Nola Episode', 
+    'Episode Name', 'Description'
+]
+
+def listing_row(digital_channel, date_key, listing):
+    """
+    Builds a row from a listing, with date and start time left as raw strings for bulk conversion.
+
+    Args:
+        digital_channel (str): The channel number (e.g., "9.1").
+        date_key (str): The listing's day, in "yyyymmdd" format.
+        listing (dict): The listing, with any of the keys in `LISTING_FIELDS`.
+
+    Returns:
+        list: Values for `COLUMNS`.
+    """
+
+    return [
+        digital_channel,
+        date_key,
+        listing['start_time'],
+        listing.get('title', ''),
+        f"#{listing.get('nola_episode', '')}" if listing.get('nola_episode') else '',
+        listing.get('episode_title', ''),
+        listing.get('description', '')
+    ]
+
+def read_rows(input_path):
+    """
+    Reads rows for target channels by loading the whole JSON file.
+
+    Arg:
+        input_path (Path): Path to the input JSON file.
+
+    Returns:
+        list[list]: Values for `COLUMNS`, with raw date and start time strings.
+    """
+
+    with open(input_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    rows = []
+    for date_key, date_value in data.items():
+        if date_key == 'start_date' or not date_value: continue  # skip metadata and failed days
+        
+        for feed in date_value.get('feeds', []):
+            digital_channel = str(feed.get('digital_channel', ''))
+            if digital_channel not in VALID_CHANNELS: continue
+
+            for listing in feed.get('listings') or []:
+                if not listing.get('start_time'): continue # skip if not start time
+                rows.append(listing_row(digital_channel, date_key, listing))
+
+    return rows
+
+def stream_rows(input_path):
+    """
+    Reads rows for target channels with an event-based JSON reader, so memory does not grow with the
+    number of days or feeds in the file.
+
+    Arg:
+        input_path (Path): Path to the input JSON file.
+
+    Returns:
+        list[list]: Values for `COLUMNS`, with raw date and start time strings.
+
+    Notes:
+        - Each feed's "digital_channel" comes after its "listings", so a first pass reads only channels,
+          and a second pass builds listings only for feeds on target channels.
+        - Nesting is tracked by depth: 1 is the top object, 2 a day, 3 its feeds, 4 a feed, 5 its 
+          listings, and 6 a listing. Only the scalar fields in `LISTING_FIELDS` are kept from a listing.
+    """
+
+    import ijson
+
+    # first pass: map (day, feed number) to channel
+    channels = {}
+    with open(input_path, 'rb') as f:
+        depth, key, date_key, feed_index = 0, None, None, -1
+        for event, value in ijson.basic_parse(f):
+            if event == 'map_key':
+                key = value
+                if depth == 1: date_key, feed_index = value, -1
+            elif event == 'start_map' or event == 'start_array':
+                depth += 1
+                if depth == 4: feed_index += 1
+            elif event == 'end_map' or event == 'end_array':
+                depth -= 1
+            elif depth == 4 and key == 'digital_channel':
+                channel = str(value) if value is not None else ''
+                if channel in VALID_CHANNELS: channels[(date_key, feed_index)] = channel
+
+    rows = []
+    if not channels: return rows
+
+    # second pass: build listings of target feeds only
+    with open(input_path, 'rb') as f:
+        depth, key, date_key, feed_index = 0, None, None, -1
+        channel, listing = None, None
+        for event, value in ijson.basic_parse(f):
+            if event == 'map_key':
+                key = value
+                if depth == 1: date_key, feed_index = value, -1
+            elif event == 'start_map' or event == 'start_array':
+                depth += 1
+                if depth == 4: 
+                    feed_index += 1
+                    channel = channels.get((date_key, feed_index))
+                elif depth == 6 and channel and event == 'start_map':
+                    listing = {}
+            elif event == 'end_map' or event == 'end_array':
+                if depth == 6 and listing is not None:
+                    if listing.get('start_time'): rows.append(listing_row(channel, date_key, listing))
+                    listing = None
+                depth -= 1
+            elif depth == 6 and listing is not None and key in LISTING_FIELDS:
+                listing[key] = str(value) if event == 'number' else value
+
+    return rows
+
+def parse(input_path, streaming=PBS_STREAMING_PARSE):
     """
     Parses a JSON TV schedule file, extracts relevant TV listings, and returns a DataFrame.
 
@@ -12,64 +140,45 @@ def parse(input_path):
         - "digital_channel": The channel number (e.g., "9.1", "9.2").
         - "listings": A list of program listings for that channel on that date.
 
-    Arg:
+    Args:
         input_path (Path): Path to the input JSON file containing the TV schedule.
+        streaming (bool, optional): Read the file incrementally with ijson, instead of loading it whole.
+            Defaults to `PBS_STREAMING_PARSE` in config.py.
 
     Notes:
         - Filters listings for digital channels 9.1, 9.2, 9.3, and 9.4.
         - Extracts the relevant fields: channel, date, start time, program name, episode details, and description.
-        - Formats the date as MM/DD/YYYY and the time as HH:MM:SS.
-        - Sorts the listings by Channel (ascending), Date (ascending), and Start Time (ascending).        
+        - Converts each day key and HHMM start time to a slot, converting each distinct day and time once.
+        - Sorts the listings by Channel (ascending) and Slot (ascending).
 
     Returns:
-        pd.DataFrame: A DataFrame containing parsed TV schedule data with the following columns:
-        - Channel (str): The TV channel identifier.
-        - Date (datetime.date): The broadcast date.
-        - Start Time (datetime.time): The program's start time.
-        - Program Name (str): The name of the TV program.
+        pd.DataFrame: A DataFrame containing parsed TV schedule data, in the compact schema from
+        `columnar.compact`, with the following columns:
+        - Channel (category): The TV channel identifier.
+        - Slot (datetime64): The broadcast date and start time.
+        - Date (datetime64): The broadcast date of a row without a start time, which has no slot.
+        - Program Name (category): The name of the TV program.
+        - Nola Episode (category, optional): The Nola episode number if available.
         - Episode Name (str): The name of the TV program episode.
-        - Nola Episode (str, optional): The Nola episode number if available.
         - Description (str, optional): A brief description of the program.
+        - Title Key (category): The normalized program name, from `normalize.title_key`.
     """
 
-    with open(input_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    valid_channels = {'9.1', '9.2', '9.3', '9.4'}
-    rows = []
-    
-    for date_key, date_value in data.items():
-        if date_key == 'start_date': continue  # skip metadata        
-        feeds = date_value.get('feeds', [])
-        
-        for feed in feeds:
-            digital_channel = str(feed.get('digital_channel', ''))
-            if digital_channel in valid_channels:
-                listings = feed.get('listings', [])
-                if not listings: continue  # skip if no listings
-                
-                for listing in listings:
-                    start_time = listing.get('start_time', '')
-                    if not start_time: continue # skip if not start time
-                    date = pd.to_datetime(date_key, format="%Y%m%d").date()
-                    start_time = pd.to_datetime(listing["start_time"], format="%H%M").time()  
-                    
-                    rows.append([
-                        digital_channel,
-                        date,
-                        start_time,                     
-                        listing.get('title', ''),
-                        f"#{listing.get('nola_episode', '')}" if listing.get('nola_episode') else '',
-                        listing.get('episode_title', ''),                        
-                        listing.get('description', '')
-                    ])
-    
-    df = pd.DataFrame(rows, columns=[
-        'Channel', 'Date', 'Start Time', 'Program Name', 'Nola Episode', 
-        'Episode Name', 'Description'
-    ])
+    with profiler.stage('pbs.read_listings') as stage:
+        rows = stream_rows(input_path) if streaming else read_rows(input_path)
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        stage.rows = len(df)
+
+    # convert day keys and start times to slots in bulk
+    with profiler.stage('pbs.convert_dates_times') as stage:
+        dates = df.pop('Date')
+        df.insert(1, 'Slot', to_slots(dates, df.pop('Start Time'), '%Y%m%d', '%H%M'))
+        df.insert(2, 'Date', to_dates(dates, df['Slot'], '%Y%m%d')) # kept for rows without a start time
+        stage.rows = len(df)
 
-    df = df.sort_values(by=['Channel', 'Date', 'Start Time']) # sort
-    df = df.map(lambda x: re.sub(r'\s+', ' ', x.strip()) if isinstance(x, str) else x) # remove extra white spaces
+    with profiler.stage('pbs.sort_normalize') as stage:
+        df = compact(normalize(df)) # remove extra white spaces, add Title Key, and encode columns
+        df = df.sort_values(by=['Channel', 'Slot']) # sort by channel code and slot
+        stage.rows = len(df)
     
-    return df 
+    return df
@@ -1,86 +1,186 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
 from pypdf import PdfReader
-import re
 import pandas as pd
+from parsers.normalize import normalize
+from parsers.columnar import compact, to_slots, to_dates
+from utils import profiler
 import re
+from config import PROTRACK_PAGE_WORKERS, PROTRACK_PAGE_CACHE
+
+# bump when parse() output changes, so cached results from older versions are not reused
+PARSER_VERSION = 6
 
-def parse(input_path):
+# one scan of a report line, from the air time (dropping frames) to the channel and air date. the
+# episode number, if any, sits right before the air time, and the program title is the text before both
+PATTERN_LINE = re.compile(r"""
+    (?:(?P<episode>\#\d+)\s*)?                  # episode number
+    (?P<time>\d{2}:\d{2}:\d{2}):\d{2}            # air time, as HH:MM:SS:FF
+    (?:.*KLRN(?P<channel>\d+\.\d+|\w{2}))?      # source and type, then channel
+    (?:.*?(?P<date>\b\d{2}/\d{2}/\d{4}\b))?      # air date
+""", re.VERBOSE)
+
+def parse_lines(lines):
     """
-    Parses a PDF TV schedule file and returns a DataFrame.
+    Classifies lines of ProTrack report text and extracts schedule fields, with one compiled pattern
+    scanning each line once.
 
     Arg:
+        lines (list[str]): Lines of text from one or more report pages.
+
+    Returns:
+        Tuple[list, list]:
+        - One list per schedule line, with Channel, Date, Start Time, Program Name and Nola Episode
+          as strings.
+        - Rejected lines, which have an air time but no channel or air date.
+
+    Notes:
+        - Lines without an air time (page headers, column titles) are skipped.
+    """
+
+    data = []
+    rejects = []
+    search_line = PATTERN_LINE.search
+
+    for line in lines:
+        match = search_line(line)
+        if not match: continue
+
+        channel, date = match.group('channel', 'date')
+        if not channel or not date:
+            rejects.append(line)
+            continue
+
+        data.append([
+            channel,
+            date,
+            match.group('time'),
+            line[:match.start()].strip(),
+            match.group('episode') or ''
+        ])
+
+    return data, rejects
+
+def extract_pages(input_path, page_indexes):
+    """
+    Extracts the text of a chunk of PDF pages, and parses their lines. Defined at module level so it
+    can be sent to worker processes, which each open their own PdfReader.
+
+    Args:
         input_path (Path): Path to the input PDF file.
+        page_indexes (list[int]): Zero-based page numbers to extract, in order.
+
+    Returns:
+        list[Tuple[int, str, list, list]]: Page number, page text, parsed rows and rejected lines for each page.
+    """
+
+    reader = PdfReader(input_path)
+    pages = []
+    for x in page_indexes:
+        text = reader.pages[x].extract_text()
+        pages.append((x, text, *parse_lines(text.split('\n'))))
+    return pages
+
+def extract_all_pages(input_path, num_pages, workers=1):
+    """
+    Extracts and parses all pages of a PDF, splitting the page range into contiguous chunks for
+    worker processes when `workers` is more than 1.
+
+    Args:
+        input_path (Path): Path to the input PDF file.
+        num_pages (int): Number of pages in the PDF.
+        workers (int, optional): Number of worker processes. Defaults to 1.
+
+    Returns:
+        list[Tuple[int, str, list, list]]: Page number, page text, parsed rows and rejected lines for each page,
+        in page order.
+    """
+
+    if workers <= 1 or num_pages < 2: return extract_pages(input_path, range(num_pages))
+
+    workers = min(workers, num_pages)
+    size = -(-num_pages // workers) # ceiling division
+    chunks = [list(range(i, min(i + size, num_pages))) for i in range(0, num_pages, size)]
+
+    from parsers.parse_files import pool_context
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as executor:
+        results = executor.map(extract_pages, repeat(input_path), chunks) # returned in chunk order
+        return [page for chunk in results for page in chunk]
+
+def parse(input_path, workers=PROTRACK_PAGE_WORKERS, use_cache=PROTRACK_PAGE_CACHE):
+    """
+    Parses a PDF TV schedule file and returns a DataFrame.
+
+    Args:
+        input_path (Path): Path to the input PDF file.
+        workers (int, optional): Number of worker processes that extract pages. Defaults to 
+            `PROTRACK_PAGE_WORKERS` in config.py.
+        use_cache (bool, optional): Reuse extracted page text cached by PDF hash and page number, and
+            cache newly extracted pages. Defaults to `PROTRACK_PAGE_CACHE` in config.py.
 
     Notes:
-        - Extracts text from each page of the PDF file.
-        - Identifies structured data using regex patterns.
+        - Extracts text from each page of the PDF file, in chunks of pages across worker processes.
+        - Skips PDF decoding entirely when every page's text is already cached.
+        - Identifies structured data using one compiled regex pattern per line.
+        - Lines with an air time but no channel or air date are counted, and kept in `df.attrs['rejects']`.
         - Cleans and formats extracted data.
-        - Converts dates and times to appropriate formats.
-        - Sorts the output by Channel, Date, and Start Time.
+        - Converts each air date and time to a slot, converting each distinct date and time once.
+        - Sorts the output by Channel and Slot.
 
     Returns:
-        pd.DataFrame: A DataFrame containing parsed TV schedule data with the following columns: 
-        - Channel (str): The TV channel identifier.
-        - Date (datetime.date): The broadcast date.
-        - Start Time (datetime.time): The program's start time.
-        - Program Name (str): The name of the TV program.
-        - Nola Episode (str, optional): The Nola episode number if available.               
+        pd.DataFrame: A DataFrame containing parsed TV schedule data, in the compact schema from
+        `columnar.compact`, with the following columns:
+        - Channel (category): The TV channel identifier.
+        - Slot (datetime64): The broadcast date and start time.
+        - Date (datetime64): The broadcast date of a row without a start time, which has no slot.
+        - Program Name (category): The name of the TV program.
+        - Nola Episode (category, optional): The Nola episode number if available.
+        - Title Key (category): The normalized program name, from `normalize.title_key`.
     """
-        
-    reader = PdfReader(input_path)
-    num_pages = len(reader.pages)
-    line_count = 0
-    
-    print('\nEXTRACTING DATA FROM ' + str(num_pages) + ' PAGES')
-    
-    data = []
+
+    texts = None
+    if use_cache:
+        from parsers import cache
+        pdf_hash = cache.file_hash(input_path)
+        texts = cache.load_page_texts(pdf_hash)
+
+    if texts is not None:
+        print('\nUSING CACHED TEXT FROM ' + str(len(texts)) + ' PAGES')
+        with profiler.stage('protrack.parse_lines') as stage:
+            pages = [(x, text, *parse_lines(text.split('\n'))) for x, text in enumerate(texts)]
+            stage.rows = sum(len(page[2]) for page in pages)
+
+    else:
+        num_pages = len(PdfReader(input_path).pages)
+        print('\nEXTRACTING DATA FROM ' + str(num_pages) + ' PAGES')
+
+        # pages are extracted and parsed together, so this stage covers both
+        with profiler.stage('protrack.extract_pages') as stage:
+            pages = extract_all_pages(input_path, num_pages, workers)
+            stage.rows = sum(len(page[2]) for page in pages)
+        if use_cache: cache.save_page_texts(pdf_hash, [page[1] for page in pages])
+
+    data = [row for page in pages for row in page[2]]
+    rejects = [{'File': Path(input_path).name, 'Page': page[0] + 1, 'Line': line} for page in pages for line in page[3]]
+    line_count = len(data)
     columns = ['Channel', 'Date', 'Start Time', 'Program Name', 'Nola Episode']
-    pattern_time = r'\d{2}:\d{2}:\d{2}:\d{2}'
-    pattern_channel = r'KLRN(\d+\.\d+|\w{2})'
-    pattern_date = r'\b\d{2}/\d{2}/\d{4}\b'
-    pattern_episode = r'#(\d+)'
-    
-    for x in range(num_pages):
-        page = reader.pages[x]
-        text = page.extract_text()
-        lines = text.split('\n')    
-        
-        #print('\n\n============================== PAGE', x+1 ,'==============================\n')  
-        
-        for line in lines:
-            time = re.search(pattern_time, line)
-            if time:                 
-                line_count += 1    
-                
-                channel = re.search(pattern_channel, line)
-                date = re.search(pattern_date, line) 
-                program = line.split(time.group())[0].strip()
-                episode = re.search(pattern_episode, program)
-                
-                if episode: 
-                    episode = episode.group()
-                    program = program.split(episode)[0].rstrip()
-                else: episode = ''     
-                
-                fields = [
-                    channel.group(1),
-                    date.group(),
-                    time.group(),
-                    program,
-                    episode
-                ]
-                
-                data.append(fields)
-                #print('\n\n========== LINE ' + str(line_count) + ' ==========\n\n', line, '\n\n', fields)
-    
-    df = pd.DataFrame(data, columns=columns)  
-    df['Channel'] = df['Channel'].astype(str) 
-    df['Date'] = pd.to_datetime(df['Date']).dt.date
-    df['Start Time'] = df['Start Time'].str.rsplit(':', n=1).str[0]  # remove last ':00'
-    df['Start Time'] = pd.to_datetime(df['Start Time'], format='%H:%M:%S').dt.time
-    df = df.sort_values(by=['Channel', 'Date', 'Start Time']) # sort
-    df = df.map(lambda x: re.sub(r'\s+', ' ', x.strip()) if isinstance(x, str) else x) # remove extra white spaces
+
+    with profiler.stage('protrack.convert_dates_times') as stage:
+        df = pd.DataFrame(data, columns=columns)  
+        dates = df.pop('Date')
+        df.insert(1, 'Slot', to_slots(dates, df.pop('Start Time'), '%m/%d/%Y', '%H:%M:%S'))
+        df.insert(2, 'Date', to_dates(dates, df['Slot'], '%m/%d/%Y')) # kept for rows without a start time
+        stage.rows = len(df)
+
+    with profiler.stage('protrack.sort_normalize') as stage:
+        df = compact(normalize(df)) # remove extra white spaces, add Title Key, and encode columns
+        df = df.sort_values(by=['Channel', 'Slot']) # sort by channel code and slot
+        stage.rows = len(df)
+    df.attrs['rejects'] = rejects # written to a sidecar file by parse_files.parse
     
     print('\n' + str(line_count) + ' LINES EXTRACTED')
+    if rejects: print(str(len(rejects)) + ' LINES REJECTED, WITH AN AIR TIME BUT NO CHANNEL OR AIR DATE')
     print('\n', df.head())  
   
     return df  
@@ -0,0 +1,198 @@
+from pathlib import Path
+from datetime import datetime
+import json
+import sqlite3
+import pandas as pd
+from parsers.columnar import compact
+
+STORE_PATH = Path(__file__).resolve().parent.parent / 'output' / 'schedules.db'
+SLOT_FORMAT = '%Y-%m-%d %H:%M:%S' # text slots in this format sort in time order
+
+def connect(path=STORE_PATH):
+    """
+    Opens the schedule store, creating its tables if they do not exist yet.
+
+    Arg:
+        path (Path, optional): Path to the SQLite database file. Defaults to `STORE_PATH`.
+
+    Returns:
+        sqlite3.Connection: An open connection to the store.
+
+    Notes:
+        - The schedules table is keyed and indexed on source, channel, slot (date and start time), and
+          occurrence, which numbers programs a source lists more than once in the same slot.
+        - Parsed columns other than the key are added as TEXT columns the first time a source has them.
+    """
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(path)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS schedules (
+            "Source" TEXT NOT NULL,
+            "Channel" TEXT NOT NULL,
+            "Slot" TEXT NOT NULL,
+            "Occurrence" INTEGER NOT NULL,
+            PRIMARY KEY ("Source", "Channel", "Slot", "Occurrence")
+        ) WITHOUT ROWID
+    """)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS sources (
+            "Source" TEXT PRIMARY KEY,
+            "Columns" TEXT NOT NULL,
+            "Updated" TEXT NOT NULL
+        )
+    """)
+    return con
+
+def upsert(source, df, path=STORE_PATH):
+    """
+    Saves a parsed schedule to the store, replacing whatever the source had on each channel from the
+    schedule's first to last slot on that channel, and keeping slots outside that time frame.
+
+    Args:
+        source (str): The source of the schedule ('pbs', 'protrack' or 'titan').
+        df (pd.DataFrame): Parsed TV schedule data, in the compact schema from `columnar.compact`.
+        path (Path, optional): Path to the SQLite database file. Defaults to `STORE_PATH`.
+
+    Returns:
+        int: Number of rows saved. Rows without a slot are not saved.
+
+    Notes:
+        - A re-parse that moves or drops a slot inside its time frame removes the old slot, so the store does not
+          keep rows a newer parse no longer has. Slots outside it, like the early morning hours of a MediaStar
+          week's last date, which the next week's grid starts after, are kept.
+    """
+
+    typed = df.dropna(subset=['Slot'])
+    typed['Channel'] = typed['Channel'].astype(str)
+    typed['Occurrence'] = typed.groupby(['Channel', 'Slot']).cumcount()
+    typed['Slot'] = typed['Slot'].dt.strftime(SLOT_FORMAT)
+    frames = typed.groupby('Channel')['Slot'].agg(['min', 'max']) # text slots sort in time order
+
+    columns = [col for col in typed.columns if col not in ('Channel', 'Slot', 'Occurrence', 'Date')] # dates only of rows without a slot
+    key = ['Channel', 'Slot', 'Occurrence']
+    rows = typed[key + columns].astype(object).where(typed[key + columns].notna(), None)
+
+    con = connect(path)
+    with con: # one transaction
+        existing = {row[1] for row in con.execute('PRAGMA table_info(schedules)')}
+        for col in columns:
+            if col not in existing: con.execute(f'ALTER TABLE schedules ADD COLUMN "{col}" TEXT')
+
+        names = ', '.join(f'"{col}"' for col in ['Source'] + key + columns)
+        marks = ', '.join('?' * (len(key) + len(columns) + 1))
+        con.executemany('DELETE FROM schedules WHERE "Source" = ? AND "Channel" = ? AND "Slot" BETWEEN ? AND ?',
+                        ((source, *frame) for frame in frames.itertuples()))
+        con.executemany(f'INSERT INTO schedules ({names}) VALUES ({marks})',
+                        ((source, *row) for row in rows.itertuples(index=False)))
+        con.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?)',
+                    (source, json.dumps(columns), datetime.now().isoformat(timespec='seconds')))
+    con.close()
+
+    return len(rows)
+
+def delete_source(source, path=STORE_PATH):
+    """
+    Removes everything the store has from a source, for when none of its raw files are left.
+
+    Args:
+        source (str): The source of the schedule ('pbs', 'protrack' or 'titan').
+        path (Path, optional): Path to the SQLite database file. Defaults to `STORE_PATH`.
+
+    Returns:
+        int: Number of rows removed.
+    """
+
+    if not Path(path).exists(): return 0
+
+    con = connect(path)
+    with con: # one transaction
+        removed = con.execute('DELETE FROM schedules WHERE "Source" = ?', (source,)).rowcount
+        con.execute('DELETE FROM sources WHERE "Source" = ?', (source,))
+    con.close()
+
+    return removed
+
+def get_columns(source, path=STORE_PATH):
+    """
+    Gets the parsed columns the store holds for a source, other than its key.
+
+    Args:
+        source (str): The source of the schedule ('pbs', 'protrack' or 'titan').
+        path (Path, optional): Path to the SQLite database file. Defaults to `STORE_PATH`.
+
+    Returns:
+        list[str]: Column names, in parsed order, or None if the store has nothing from `source`.
+    """
+
+    if not Path(path).exists(): return None
+
+    con = connect(path)
+    row = con.execute('SELECT "Columns" FROM sources WHERE "Source" = ?', (source,)).fetchone()
+    con.close()
+    return json.loads(row[0]) if row else None
+
+def slot_bounds(source, channels=None, path=STORE_PATH):
+    """
+    Gets the first and last slot the store holds for a source, on each channel, from the index alone.
+
+    Args:
+        source (str): The source of the schedule ('pbs', 'protrack' or 'titan').
+        channels (list[str], optional): Channels to get bounds for. Defaults to all channels.
+        path (Path, optional): Path to the SQLite database file. Defaults to `STORE_PATH`.
+
+    Returns:
+        pd.DataFrame: "min" and "max" slots as datetime64, indexed by channel.
+    """
+
+    query = 'SELECT "Channel", MIN("Slot") AS min, MAX("Slot") AS max FROM schedules WHERE "Source" = ?'
+    params = [source]
+    if channels is not None:
+        query += f' AND "Channel" IN ({", ".join("?" * len(channels))})'
+        params += list(channels)
+
+    con = connect(path)
+    df = pd.read_sql_query(query + ' GROUP BY "Channel"', con, params=params, index_col='Channel')
+    con.close()
+
+    return df.apply(pd.to_datetime, format=SLOT_FORMAT)
+
+def read_slots(source, channels=None, datetime_start=None, datetime_end=None, path=STORE_PATH):
+    """
+    Reads a source's schedule from the store, for only the channels and time frames asked for.
+
+    Args:
+        source (str): The source of the schedule ('pbs', 'protrack' or 'titan').
+        channels (list[str], optional): Channels to read. Defaults to all channels, or the channels of the time frames.
+        datetime_start (pd.Series, optional): First slot to read, indexed by channel. Defaults to `None`.
+        datetime_end (pd.Series, optional): Last slot to read, indexed by channel. Defaults to `None`.
+        path (Path, optional): Path to the SQLite database file. Defaults to `STORE_PATH`.
+
+    Returns:
+        pd.DataFrame: The schedule, in the compact schema from `columnar.compact`, sorted by channel and slot.
+
+    Notes:
+        - With time frames, each channel is read with its own range on the index. A channel without a
+          start or end (NaT) is not read.
+    """
+
+    columns = get_columns(source, path) or []
+    names = ', '.join(f'"{col}"' for col in ['Channel', 'Slot'] + columns)
+    query = f'SELECT {names} FROM schedules WHERE "Source" = ?'
+    params = [source]
+
+    if datetime_start is not None and datetime_end is not None:
+        ranges = [(channel, start, datetime_end[channel]) for channel, start in datetime_start.items()
+                  if (channels is None or channel in channels) and pd.notna(start) and pd.notna(datetime_end[channel])]
+        query += ' AND (' + (' OR '.join(['("Channel" = ? AND "Slot" BETWEEN ? AND ?)'] * len(ranges)) or '0') + ')'
+        for channel, start, end in ranges: params += [channel, start.strftime(SLOT_FORMAT), end.strftime(SLOT_FORMAT)]
+    elif channels is not None:
+        query += f' AND "Channel" IN ({", ".join("?" * len(channels))})'
+        params += list(channels)
+
+    con = connect(path)
+    df = pd.read_sql_query(query + ' ORDER BY "Channel", "Slot", "Occurrence"', con, params=params)
+    con.close()
+
+    df['Slot'] = pd.to_datetime(df['Slot'], format=SLOT_FORMAT)
+    return compact(df)
@@ -1,10 +1,24 @@
-import sys
 from pathlib import Path
 import email
-from bs4 import BeautifulSoup
+from email.parser import BytesParser
+import base64
+import quopri
+import lxml.html
 import pandas as pd
+from parsers.normalize import normalize
+from parsers.columnar import compact
+from utils import profiler
+import numpy as np
 import re
 
+# bump when parse() output changes, so cached results from older versions are not reused
+PARSER_VERSION = 5
+
+# compiled patterns for splitting Program Info cells, matching those in split_cell
+PATTERN_NAME_TIME = re.compile(r"(?s)^(.*?)(\d{1,2}:\d{2})")  # text before first time, and the time
+PATTERN_EPISODE = re.compile(r"Epi#:\s*(\d+[a-zA-Z]?)")
+PATTERN_DESCRIPTION = re.compile(r"Epi#:\s*\d+[a-zA-Z]?\s*(.*)")
+
 def split_cell(row):
     """
     Extracts time, program name, episode number, and episode description from a TV schedule row cell.
@@ -49,108 +63,243 @@ def split_cell(row):
 
     return pd.Series([start_time, program_name, episode, description]) 
 
+def split_program_info(program_info):
+    """
+    Extracts time, program name, episode number, and episode description from a column of TV schedule
+    cells in one columnar pass. Produces the same values as applying `split_cell` to each cell.
+
+    Arg:
+        program_info (pandas.Series): Strings containing program information details.
+
+    Returns:
+        pandas.DataFrame: A DataFrame with the same index as `program_info`, and the columns:
+            - Start Time (str or NaN): The extracted start time (HH:MM), or NaN if missing.
+            - Program Name (str): The extracted program name.
+            - Nola Episode (str): The formatted episode number (e.g., "#12") or an empty string if not found.
+            - Description (str): The episode description or an empty string if not found.
+
+    Notes:
+        - Uses compiled patterns with `.str.extract`, instead of per-row `re.search` calls and Series.
+        - Rows without a time or program name are printed once, in a summary, instead of a print per row.
+    """
+
+    name_time = program_info.str.extract(PATTERN_NAME_TIME)
+    episode = program_info.str.extract(PATTERN_EPISODE)[0]
+    description = program_info.str.extract(PATTERN_DESCRIPTION)[0]
+
+    start_time = pd.to_datetime(name_time[1], format='%H:%M', errors='coerce').dt.strftime('%H:%M')
+    program_name = name_time[0].fillna('').str.strip()
+
+    df = pd.DataFrame({
+        'Start Time': start_time,
+        'Program Name': program_name,
+        'Nola Episode': ('#' + episode).fillna(''),
+        'Description': description.fillna('')
+    }, index=program_info.index)
+
+    # summarize rows that could not be split
+    missing_time = program_info[name_time[1].isna()]
+    missing_name = program_info[program_name == '']
+    if len(missing_time): 
+        print(f'Could not find time, or split for name, in {len(missing_time)} rows:')
+        for row in missing_time: print('   ', row)
+    if len(missing_name): 
+        print(f'Could not find name in {len(missing_name)} rows:')
+        for row in missing_name: print('   ', row)
+
+    return df
+
+class ScheduleSyncError(ValueError):
+    """Raised when an adjusted date gets more than one day ahead of a row's "Date" column."""
+
 def adjust_dates_times(df):
     """
     Adjusts dates and times in a DataFrame to handle AM/PM transitions correctly.
 
     Args:
-        df (pandas.DataFrame): A DataFrame that includes columns "Date" and "Start Time".
+        df (pandas.DataFrame): A DataFrame that includes columns "Date" and "Start Time", with rows for
+            each date in one contiguous block, in grid order.
 
     Returns:
         pandas.DataFrame: A modified copy of the input DataFrame with adjusted "Date" and "Start Time" columns.
 
+    Raises:
+        ScheduleSyncError: If the adjusted date gets more than one day ahead of a row's "Date".
+
     Notes:
-        - Ensures that the "Date" column remains synchronized with "Start Time".
-        - Detects AM/PM transitions and updates "Start Time" accordingly.
-        - If the current date gets more than one day ahead of the row's "Date", the script exits with an error message.
-        - Uses a flag (`is_am`) to track transitions between AM and PM.
-        - Adjusts "Start Time" when crossing from PM back to AM.
-        - When transitioning back to AM (after PM), the day is incremented.
+        - Each block of rows with the same "Date" (one grid column) is processed independently, starting
+          in AM on that date, so blocks can be split across channels or weeks and run in parallel.
+        - A transition is detected when a time is earlier than the one before it, or is in the 12 o'clock
+          hour, unless the time before it was also in the 12 o'clock hour.
+        - The AM/PM state is the parity of a cumulative count of transitions, and every second transition
+          (PM back to AM) adds a day, so the whole pass is computed with NumPy array operations.
+        - In AM, the 12 o'clock hour becomes 00. In PM, hours before 12 get 12 hours added.
     """
 
-    print_variables = False
+    df = df.copy()
+    if df.empty: return df
 
-    df = df.copy()  
+    times = df['Start Time']
+    hours = times.dt.hour.to_numpy(dtype=float) # NaN for NaT, so comparisons with it are False
+    minutes = hours * 60 + times.dt.minute.to_numpy(dtype=float)
+
+    # mark the first row of each date block, where the previous time is the row's own time
+    dates = df['Date'].to_numpy()
+    block_start = np.r_[True, dates[1:] != dates[:-1]]
+    last_hours = np.where(block_start, hours, np.roll(hours, 1))
+    last_minutes = np.where(block_start, minutes, np.roll(minutes, 1))
+
+    # count am/pm transitions within each block
+    toggles = ((minutes < last_minutes) | (hours == 12)) & (last_hours != 12)
+    toggles[block_start] = False
+    counts = np.cumsum(toggles)
+    counts -= np.maximum.accumulate(np.where(block_start, counts, 0)) # restart count at each block
+    is_am = counts % 2 == 0
+    days_ahead = counts // 2 # a day is added each time pm switches back to am
+
+    # ensure adjusted date does not get more than a day ahead of row['Date']
+    out_of_sync = np.flatnonzero(days_ahead > 1)
+    if len(out_of_sync):
+        i = out_of_sync[0]
+        row = df.iloc[i]
+        raise ScheduleSyncError(
+            f"Adjusted date is out of sync with row['Date'] at row {df.index[i]} "
+            f"({len(out_of_sync)} rows affected): Date {row['Date']}, Start Time {row['Start Time']}, "
+            f"{days_ahead[i]} days ahead"
+        )
+
+    # modify time and/or date based on am/pm transitions
+    shift_hours = np.where(is_am & (hours == 12), -12, np.where(~is_am & (hours < 12), 12, 0))
+    df['Start Time'] = times + pd.to_timedelta(shift_hours, unit='h')
+    df['Date'] = pd.to_datetime(df['Date']) + pd.to_timedelta(days_ahead, unit='D')
 
-    new_dates = []
-    new_times = []
-    
-    is_am = True 
-    current_date = None
-    last_time = None
-
-    for i, row in df.iterrows():
-        if not current_date: current_date = row['Date']
-        if not last_time: last_time = row['Start Time']
-        start_time = row['Start Time']
-        new_time = start_time
-        
-        # ensure current_date does not get more than a day ahead of row['Date']
-        if current_date > (row['Date'] + pd.Timedelta(days=1)):
-            print('==================================================')
-            print('==================================================')
-            print(f"current_date is out of sync with row['Date'] at row {i}.")
-            print()
-            print('current_date:', current_date)
-            print('last_time:', last_time)
-            print('is_am:', is_am)
-            print()
-            print('ROW:\n')
-            print(row)   
-            print()        
-            sys.exit('Exiting due to mismatch.')
-
-        if print_variables:
-            print('==================================================')
-            print('==================================================')
-            print('current_date:', current_date)
-            print('start_time:', start_time)
-            print('last_time:', last_time)
-            print('is_am:', is_am)  
-            print()  
-            print('start_time < last_time:', start_time < last_time)
-            print('start_time.hour == 12:', start_time.hour == 12)
-            print('last_time.hour != 12:', last_time.hour != 12)
-            print('is_am:', is_am)
-            print()
-            print('is_am and start_time.hour == 12:', is_am and start_time.hour == 12)
-            print('not is_am and start_time.hour < 12:', not is_am and start_time.hour >= 12)
-            print()        
-            print('ROW:\n')
-            print(row)  
-            print()                
-
-        # track transition from am to pm and back
-        if (start_time < last_time or start_time.hour == 12) and last_time.hour != 12:
-            is_am = not is_am #toggle am/pm flag
-
-            # transition to a new day (am coming after pm)
-            if is_am: 
-                current_date += pd.Timedelta(days=1) # add a day when switching back to am   
-
-        # modify time and/or date based on am/pm transitions
-        if is_am and start_time.hour == 12: # hour after midnight should be 00, so subract 12 hours
-            new_time = start_time - pd.Timedelta(hours=12) 
-
-        elif not is_am and start_time.hour < 12: # time is am but should be pm, so add 12 hours
-                new_time = start_time + pd.Timedelta(hours=12) 
-
-        if print_variables:
-            print('==================================================')
-            print('current_date:', current_date)
-            print('new_time:', new_time)
-            print('start_time:', start_time)
-            print('is_am:', is_am)  
-            print()       
-        
-        new_dates.append(current_date)
-        new_times.append(new_time)
-        last_time = start_time
-
-    df["Date"] = new_dates
-    df["Start Time"] = new_times
     return df
 
+def read_headers(f):
+    """
+    Reads MIME header lines from an open binary file, up to and including the blank line that ends them.
+
+    Arg:
+        f (BinaryIO): File positioned at the start of a header block.
+
+    Returns:
+        email.message.Message: The parsed headers, with no payload.
+    """
+
+    lines = []
+    for line in f:
+        lines.append(line)
+        if not line.strip(): break
+    return BytesParser().parsebytes(b''.join(lines), headersonly=True)
+
+def read_html(input_path):
+    """
+    Streams the MIME parts of an .mhtml file and decodes only the last "text/html" part, which holds
+    the schedule grid.
+
+    Arg:
+        input_path (Path): Path to the input .mhtml file.
+
+    Returns:
+        str: The decoded HTML, or None if the file has no "text/html" part.
+
+    Notes:
+        - Reads the file line by line, keeping only lines of "text/html" parts, so images, CSS and other
+          parts are skipped without being stored or decoded.
+        - Falls back to `email.message_from_binary_file` if the file is not multipart.
+    """
+
+    html = None
+
+    with open(input_path, 'rb') as f:
+        boundary = read_headers(f).get_boundary()
+
+        if not boundary:
+            f.seek(0)
+            msg = email.message_from_binary_file(f)
+            for part in msg.walk():
+                if part.get_content_type() == 'text/html':
+                    html = part.get_payload(decode=True).decode("utf-8", errors="ignore")
+            return html
+
+        delimiter = b'--' + boundary.encode('ascii')
+        headers, body = None, None
+
+        for line in f:
+            if line.startswith(delimiter):
+                if body is not None: html = decode_part(headers, body)
+                headers = read_headers(f)
+                body = [] if headers.get_content_type() == 'text/html' else None
+            elif body is not None:
+                body.append(line)
+
+        if body is not None: html = decode_part(headers, body)
+
+    return html
+
+def decode_part(headers, body):
+    """
+    Decodes the body of a MIME part based on its Content-Transfer-Encoding.
+
+    Args:
+        headers (email.message.Message): The part's headers.
+        body (list[bytes]): The part's raw lines.
+
+    Returns:
+        str: The decoded body.
+    """
+
+    payload = b''.join(body)
+    if payload.endswith(b'\r\n'): payload = payload[:-2] # line break before a boundary belongs to the boundary
+    elif payload.endswith(b'\n'): payload = payload[:-1]
+    encoding = headers.get('Content-Transfer-Encoding', '').strip().lower()
+    if encoding == 'quoted-printable': payload = quopri.decodestring(payload)
+    elif encoding == 'base64': payload = base64.b64decode(payload)
+    return payload.decode("utf-8", errors="ignore")
+
+def extract_grid(html):
+    """
+    Extracts program cells from the grid form, and dates from the date header, of a MediaStar page.
+
+    Arg:
+        html (str): The decoded HTML of the page.
+
+    Returns:
+        Tuple[dict, list]: Cell texts keyed by grid column id (e.g., 'gCol0'), and the column dates.
+
+    Notes:
+        - Uses lxml and XPath directly, which is several times faster than building a BeautifulSoup tree.
+        - Cell text is the cell's stripped text nodes joined by a space, as with BeautifulSoup's
+          `get_text(separator=' ', strip=True)`.
+    """
+
+    root = lxml.html.fromstring(html)
+    data = {}
+    dates = []
+
+    grid = root.xpath('//form[@id="gridForm"]')
+    if grid:
+        # get columns and data
+        for div in grid[0].iterdescendants('div'):
+            id = div.get('id')
+            if id and id.startswith('gCol'):
+                cells = div.xpath('.//div[@class="cellBase normal pointerCursor"]')
+                data[id] = [' '.join(text.strip() for text in cell.itertext() if text.strip()) for cell in cells]
+
+        # get headers
+        header_div = root.xpath('//div[@id="dateHeaderDiv"]')
+        if header_div:
+            headers = header_div[0].xpath(
+                './/div[contains(concat(" ", normalize-space(@class), " "), " cellBase ")'
+                ' and contains(concat(" ", normalize-space(@class), " "), " dateHdrCell ")]'
+            )
+            for header in headers:
+                date_parts = header.get('title', '').split(' - ')
+                if len(date_parts) == 2:
+                    dates.append(date_parts[1])
+
+    return data, dates
+
 def parse(input_path):
     """
     Parses a TV schedule file, in Edge's .mhtml format, and returns a DataFrame.
@@ -159,54 +308,29 @@ def parse(input_path):
         input_path (Path): Path to the input .mhtml file.
 
     Notes:
-        - Extracts program schedule data from the .mhtml file.
+        - Extracts program schedule data from the .mhtml file, decoding only its HTML part.
         - Adjusts dates and times for AM/PM transitions.
         - Cleans up extra whitespace in extracted data.
         - Splits "Program Info" into separate columns.        
+        - Keeps rows in grid order. A row without a start time has no slot (NaT).
 
     Output:
-        pd.DataFrame: A DataFrame containing parsed TV schedule data with the following columns:
-        - Channel (str): The TV channel.
-        - Date (datetime.date): The broadcast date.
-        - Start Time (datetime.time): The program's start time.
-        - Program Name (str): The name of the TV program.
-        - Nola Episode (str, optional): The episode number, if available.
+        pd.DataFrame: A DataFrame containing parsed TV schedule data, in the compact schema from
+        `columnar.compact`, with the following columns:
+        - Channel (category): The TV channel.
+        - Slot (datetime64): The broadcast date and start time.
+        - Date (datetime64): The broadcast date of a row without a start time, which has no slot.
+        - Program Name (category): The name of the TV program.
+        - Nola Episode (category, optional): The episode number, if available.
         - Description (str, optional): A brief description of the program.
+        - Title Key (category): The normalized program name, from `normalize.title_key`.
     """     
     
-    with open(input_path, 'rb') as f:        
-        msg = email.message_from_binary_file(f) 
- 
-    html = None
-    for part in msg.walk():
-        if part.get_content_type() == 'text/html':
-            html = part.get_payload(decode=True).decode("utf-8", errors="ignore")     
+    with profiler.stage('titan.read_html'): html = read_html(input_path)
 
     if html:
-        soup = BeautifulSoup(html, 'lxml')
-        
-        data = {}
-        
-        grid = soup.find('form', id='gridForm')
-        if grid:
-            # get columns and data
-            for div in grid.find_all('div', id=True):
-                id = div['id']
-                if id.startswith('gCol'):
-                    cells = div.find_all('div', class_='cellBase normal pointerCursor')
-                    data[id] = [cell.get_text(separator=' ', strip=True) for cell in cells]  
-                    
-            #get headers
-            dates = []
-            header_div = soup.find('div', id='dateHeaderDiv') 
-            if header_div:
-                headers = headers = header_div.select('div.cellBase.dateHdrCell')
-                for header in headers:
-                    date = header['title']
-                    date_parts = date.split(' - ')
-                    if len(date_parts) == 2:
-                        dates.append(date_parts[1])
-                    
+        with profiler.stage('titan.extract_grid'): data, dates = extract_grid(html)
+
         if data:
             df = pd.DataFrame.from_dict(data, orient='index').transpose()            
             
@@ -217,7 +341,7 @@ def parse(input_path):
               
             # collapse headers into one column, and data from columns into second column  
             df = df.melt(var_name='Date', value_name='Program Info').dropna(subset=['Program Info'])
-            df['Date'] = pd.to_datetime(df['Date']).dt.date
+            df['Date'] = pd.to_datetime(df['Date'])
             
             # get TV channel from file name, and add as column to df
             file_name = Path(input_path).name
@@ -227,17 +351,23 @@ def parse(input_path):
             df['Channel'] = df['Channel'].astype(str)
 
             # split Program Info column
-            new_cols = ['Start Time', 'Program Name', 'Nola Episode', 'Description']
-            df[new_cols] = df['Program Info'].apply(split_cell)
-            df.drop(columns=['Program Info'], inplace=True)
-            df['Start Time'] = pd.to_datetime(df['Start Time'], format='%H:%M', errors='coerce') # transform to pd.Timestamp
+            with profiler.stage('titan.split_cells') as stage:
+                new_cols = ['Start Time', 'Program Name', 'Nola Episode', 'Description']
+                df[new_cols] = split_program_info(df['Program Info'])
+                df.drop(columns=['Program Info'], inplace=True)
+                df['Start Time'] = pd.to_datetime(df['Start Time'], format='%H:%M', errors='coerce') # transform to pd.Timestamp
+                stage.rows = len(df)
 
             # adjust times in afternoons, and dates past midnight
-            df = adjust_dates_times(df)
-            df['Start Time'] = df['Start Time'].dt.strftime('%H:%M:%S').apply(pd.to_datetime).dt.time # dt.time for later comparison 
+            with profiler.stage('titan.adjust_dates_times') as stage:
+                df = adjust_dates_times(df)
+                times, dates = df.pop('Start Time'), df.pop('Date')
+                df.insert(1, 'Slot', dates + (times - times.dt.normalize())) # time of day, on the adjusted date
+                df.insert(2, 'Date', dates) # kept for rows without a start time
+                stage.rows = len(df)
 
             # remove extra white spaces
-            df = df.map(lambda x: re.sub(r'\s+', ' ', x.strip()) if isinstance(x, str) else x)  
+            with profiler.stage('titan.normalize'): df = compact(normalize(df)) # remove extra white spaces, add Title Key, and encode columns
  
             return df 
             
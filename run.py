@@ -28,24 +28,25 @@ def get_input_output_paths(source):
 
     return input_paths, output_path  
 
-def parse_schedule(source):
+def parse_schedule(source, workers=1, use_cache=True):
     """
     Parses TV schedule by running process.parse() from a module in parsers. The module is
     determined by `source`, which comes from a command-line argument. The result is
     saved as 'output/{source}.csv'. 
 
-    Arg:
+    Args:
         source (str): Name of module in parsers, from which process.parse() will be run. 
-        input_path (str, optional): Path to the input file. Defaults to an empty string.
-        output_path (str, optional): Path to the output file. Defaults to an empty string.   
+        workers (int, optional): Number of worker processes used to parse input files. Defaults to 1.
+        use_cache (bool, optional): Reuse cached results for unchanged input files. Defaults to True.
     """
 
     from parsers.parse_files import parse
     
     input_paths, output_path = get_input_output_paths(source)
-    parse(input_paths, output_path, source)
+    parse(input_paths, output_path, source, workers, use_cache)
 
-def compare_schedules(source_1, source_2, channel='9.1', start_date=None, end_date=None, ):
+def compare_schedules(source_1, source_2, channel='9.1', start_date=None, end_date=None, workers=1, use_cache=True,
+                      tolerance=None, threshold=None):
     """
     Compares two TV schedules by running compare.compare_tv_schedules from a module in comparators. 
     The files are determined by `source_1` and `source_2`, which comes from a command-line argument. 
@@ -54,33 +55,81 @@ def compare_schedules(source_1, source_2, channel='9.1', start_date=None, end_da
     Args:
         source_1 (str): Name of first parsed file, excluding the '.csv' extension.
         source_2 (str): Name of second parsed file, excluding the '.csv' extension.
-        channel (str, optional): TV channel to filter the comparison. Defaults to '9.1'.
+        channel (str, optional): TV channel to filter the comparison, a comma-separated list of channels, 
+            or 'all'. Defaults to '9.1'.
         start_date (datetime, optional): The start date for retrieving data. Defaults to `None`.
         end_date (datetime, optional): The end date for retrieving data. Defaults to `None`.
+        workers (int, optional): Number of worker processes used if a source must be parsed first. Defaults to 1.
+        use_cache (bool, optional): Reuse cached results if a source must be parsed first, and the last run's
+            results for days whose rows are unchanged. Defaults to True.
+        tolerance (float, optional): Seconds start times can differ and still be matched to the nearest slot.
+            Defaults to `COMPARE_TOLERANCE_SECONDS` in config.py.
+        threshold (float, optional): Lowest similarity score, from 0 to 1, for two program names to match.
+            Defaults to `TITLE_MATCH_THRESHOLD` in config.py.
     """    
 
     from comparators.compare import compare_tv_schedules as compare
+    from utils.pipeline import resolve_channel
 
     # get first parsed file
-    input_paths_1, parsed_path_1 = get_input_output_paths(source_1)
-    if not Path(parsed_path_1).exists(): parse_schedule(source_1, input_paths_1, parsed_path_1)
+    _, parsed_path_1 = get_input_output_paths(source_1)
+    if not Path(parsed_path_1).exists(): parse_schedule(source_1, workers, use_cache)
 
     # get second parsed file
-    input_paths_2, parsed_path_2 = get_input_output_paths(source_2)
-    if not Path(parsed_path_2).exists(): parse_schedule(source_2, input_paths_2, parsed_path_2)
+    _, parsed_path_2 = get_input_output_paths(source_2)
+    if not Path(parsed_path_2).exists(): parse_schedule(source_2, workers, use_cache)
     
     # compare files
     output_dir = Path(parsed_path_1).parent
     output_file = f'{source_1}_{source_2}.csv'
     output_path = str(output_dir / output_file)
 
-    # handle channel assignment
-    channel = '9.1' if channel == '9' else channel
+    # handle channel assignment, for one channel, a comma-separated list, or 'all'
+    channel = resolve_channel(channel)
+
+    # run comparison
+    options = {'tolerance': tolerance, 'threshold': threshold}
+    options = {name: value for name, value in options.items() if value is not None} # else use config defaults
+    compare(parsed_path_1, parsed_path_2, output_path, channel, start_date, end_date, use_cache=use_cache, **options)
+
+def compare_many_schedules(sources, channel='9.1', start_date=None, end_date=None, workers=1, use_cache=True, threshold=None):
+    """
+    Compares three or more TV schedules in one pass by running consensus.consensus_tv_schedules from a module 
+    in comparators. The files are determined by `sources`, which comes from a command-line argument. The result
+    is saved as 'output/{source_1}_{source_2}_..._{source_n}.csv'.
+
+    Args:
+        sources (list[str]): Names of parsed files, excluding the '.csv' extension.
+        channel (str, optional): TV channel to filter the comparison, a comma-separated list of channels, 
+            or 'all'. Defaults to '9.1'.
+        start_date (datetime, optional): The start date for retrieving data. Defaults to `None`.
+        end_date (datetime, optional): The end date for retrieving data. Defaults to `None`.
+        workers (int, optional): Number of worker processes used if a source must be parsed first. Defaults to 1.
+        use_cache (bool, optional): Reuse cached results if a source must be parsed first. Defaults to True.
+        threshold (float, optional): Lowest similarity score, from 0 to 1, for two program names to match.
+            Defaults to `TITLE_MATCH_THRESHOLD` in config.py.
+    """
+
+    from comparators.consensus import consensus_tv_schedules as consensus
+    from utils.pipeline import resolve_channel
+
+    # get parsed files, parsing any that are missing
+    parsed_paths = []
+    for source in sources:
+        _, parsed_path = get_input_output_paths(source)
+        if not Path(parsed_path).exists(): parse_schedule(source, workers, use_cache)
+        parsed_paths.append(str(parsed_path))
+
+    output_path = str(Path(parsed_paths[0]).parent / f"{'_'.join(sources)}.csv")
+
+    # handle channel assignment, for one channel, a comma-separated list, or 'all'
+    channel = resolve_channel(channel)
 
     # run comparison
-    compare(parsed_path_1, parsed_path_2, output_path, channel, start_date, end_date)
+    options = {'threshold': threshold} if threshold is not None else {} # else use config default
+    consensus(parsed_paths, output_path, channel, start_date, end_date, **options)
 
-def get_schedule_from_api(source, start_date, days):
+def get_schedule_from_api(source, start_date, days, max_in_flight=None, freshness_hours=None):
     """
     Retrieve raw TV schedule data from an API and store it for later processing.
 
@@ -88,17 +137,23 @@ def get_schedule_from_api(source, start_date, days):
         source (str): The source of the TV schedule data (e.g., 'pbs').
         start_date (str): The start date for retrieving schedule data in 'YYYYMMDD' format.
         days (int): The number of days of data to retrieve.
+        max_in_flight (int, optional): Maximum number of days requested at once. Defaults to `PBS_MAX_IN_FLIGHT` in config.py.
+        freshness_hours (float, optional): Stored days fetched within this many hours are not requested again.
+            Defaults to `PBS_FRESHNESS_HOURS` in config.py.
 
     Returns:
-        None: The retrieved data is saved to a designated location.
+        None: The retrieved data is saved to a designated location, and each day to a per-day store.
     """
 
     from api.pbs import get_schedule
     input_paths, _ = get_input_output_paths(source) # output will go to data folder, as an input later
     input_path = input_paths[0] # get the first path in the list
-    get_schedule(input_path, start_date, days)
+    options = {}
+    if max_in_flight: options['max_in_flight'] = max_in_flight
+    if freshness_hours is not None: options['freshness_hours'] = freshness_hours
+    get_schedule(input_path, start_date, days, **options)
 
-def explore_file(input_path, level=3, items=3):
+def explore_file(input_path, level=3, items=3, load=False, schema=False):
     """
     Explore a JSON file by calling the `explore_json` function with specified levels and items.
 
@@ -106,28 +161,160 @@ def explore_file(input_path, level=3, items=3):
         input_path (str): Path to the JSON file to explore.
         level (int): Number of levels to explore in the JSON structure.
         items (int): Number of items to show from each list in the JSON data.
+        load (bool, optional): Load the whole file first, instead of streaming it. Defaults to False.
+        schema (bool, optional): Print a schema summary of every path in the file instead. Defaults to False.
     """
 
-    from utils.json_explorer import explore_json_file
+    from utils.json_explorer import explore_json_file, stream_json_file, summarize_json_file, print_schema
     base_dir = Path(__file__).resolve().parent
     input_path = base_dir / input_path
-    explore_json_file(input_path, max_level=level, max_items=items)   
+
+    if schema:
+        stats = summarize_json_file(input_path)
+        if stats is not None: print_schema(stats)
+    elif load: explore_json_file(input_path, max_level=level, max_items=items)
+    else: stream_json_file(input_path, max_level=level, max_items=items)
+
+def benchmark_parse(source, max_workers=None, repeats=1):
+    """
+    Times parsing the files of a source with an increasing number of worker processes.
+
+    Args:
+        source (str): Name of module in parsers to benchmark.
+        max_workers (int, optional): Highest worker count to time. Defaults to the number of CPUs.
+        repeats (int, optional): Number of timed runs per worker count, keeping the fastest. Defaults to 1.
+    """
+
+    from utils.benchmark import benchmark_workers
+    input_paths, _ = get_input_output_paths(source)
+    benchmark_workers(input_paths, source, max_workers, repeats)
+
+def benchmark_all(scales=None, repeats=1, mismatch_rate=0.05, save_path=None, baseline_path=None):
+    """
+    Times each parser and comparisons on synthetic files at several scales, and flags regressions against a baseline.
+
+    Args:
+        scales (str, optional): Comma-separated scales, each as days x channels x slots per day (e.g., '7x1x48,28x4x48').
+            Defaults to `BENCHMARK_SCALES` in config.py.
+        repeats (int, optional): Number of timed runs per stage, keeping the fastest. Defaults to 1.
+        mismatch_rate (float, optional): Share of slots the second sources disagree with ProTrack on. Defaults to 0.05.
+        save_path (str, optional): Path to save results to as JSON. Defaults to `None`.
+        baseline_path (str, optional): Path to results saved by an earlier run, to compare with. Defaults to `None`.
+
+    Returns:
+        int: Number of regressions found, for the exit status.
+    """
+
+    from utils.benchmark import benchmark_suite
+
+    options = {}
+    if scales: options['scales'] = [tuple(int(n) for n in scale.strip().split('x')) for scale in scales.split(',')]
+    _, diff = benchmark_suite(repeats=repeats, mismatch_rate=mismatch_rate, save_path=save_path, baseline_path=baseline_path, **options)
+
+    regressions = int((diff['Flag'] != '').sum()) if len(diff) else 0
+    if regressions: print(f'\n{regressions} regressions found')
+    return regressions
+
+def generate_data(days=7, channels=1, slots=48, mismatch_rate=0.05, start_date=None, output_dir='data/synthetic'):
+    """
+    Writes synthetic ProTrack, MediaStar and TVSS files, for trying out or timing the parsers and comparisons.
+
+    Args:
+        days (int, optional): Number of days of schedule. Defaults to 7.
+        channels (int, optional): Number of channels, from 9.1 up. Defaults to 1.
+        slots (int, optional): Number of slots per day on each channel. Defaults to 48.
+        mismatch_rate (float, optional): Share of slots the MediaStar and TVSS files each disagree with ProTrack on. Defaults to 0.05.
+        start_date (str, optional): First day in 'YYYYMMDD' format. Defaults to `None`, which uses the generator's default.
+        output_dir (str, optional): Folder for the files, relative to the project folder. Defaults to 'data/synthetic'.
+    """
+
+    from utils.synthetic import generate
+
+    options = {'start_date': start_date} if start_date else {}
+    files = generate(Path(__file__).resolve().parent / output_dir, days, channels, slots, mismatch_rate, **options)
+    print(f"Wrote {files['rows']} slots to {len(files['protrack']) + len(files['titan']) + len(files['pbs'])} files in {output_dir}, "
+          f"with {files['titan_changed']} MediaStar and {files['pbs_changed']} TVSS mismatches")
+
+def run_pipeline_file(spec_path):
+    """
+    Runs get, parse and compare stages from a job file in one process, passing parsed schedules in memory.
+
+    Arg:
+        spec_path (str): Path to the job file, in JSON, relative to the project folder.
+
+    Returns:
+        int: Number of stages that failed or were skipped, for the exit status.
+    """
+
+    from utils.pipeline import run_pipeline
+    status = run_pipeline(Path(__file__).resolve().parent / spec_path)
+    return sum(state != 'done' for state, _ in status.values())
+
+def watch_data(interval=None, debounce=None, channel=None, workers=1):
+    """
+    Watches the data folder, and parses and compares new or changed raw files as they are saved.
+
+    Args:
+        interval (float, optional): Seconds between scans of the folder. Defaults to `WATCH_INTERVAL_SECONDS` in config.py.
+        debounce (float, optional): Seconds no file must change for before changes are handled. Defaults to 
+            `WATCH_DEBOUNCE_SECONDS` in config.py.
+        channel (str, optional): Channel to compare, a comma-separated list of channels, or 'all'. Defaults to 
+            `WATCH_CHANNEL` in config.py.
+        workers (int, optional): Number of worker processes used to parse files. Defaults to 1.
+    """
+
+    from utils.watch import watch
+    from utils.pipeline import resolve_channel
+
+    # handle channel assignment, for one channel, a comma-separated list, or 'all'
+    if channel: channel = resolve_channel(channel)
+
+    options = {'interval': interval, 'debounce': debounce, 'channel': channel}
+    options = {name: value for name, value in options.items() if value is not None} # else use config defaults
+    try:
+        watch(workers=workers, **options)
+    except KeyboardInterrupt:
+        print('\nStopped watching')
+
+def prune_cache(max_mb=None, clear=False):
+    """
+    Evicts least recently used entries from the parse cache.
+
+    Args:
+        max_mb (float, optional): Maximum cache size in megabytes. Defaults to `CACHE_MAX_MB` in config.py.
+        clear (bool, optional): Remove every entry. Defaults to False.
+    """
+
+    from parsers.cache import prune, CACHE_ROOT
+    removed = prune(max_mb, clear) if max_mb is not None else prune(clear=clear)
+    print(f'Removed {removed} entries from {CACHE_ROOT}')
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Parse or compare TV schedules, or get schedule data')
+    parser.add_argument('--profile', action='store_true', help='Time and measure each stage, print a summary, and save a JSON trace')
+    parser.add_argument('--trace', default='output/profile.json', help='Path to save the trace to, with --profile (default: output/profile.json)')
     subparsers = parser.add_subparsers(dest='command', required=True)
     choices = list(FILES.keys()) 
 
     # parse command
     parse = subparsers.add_parser('parse', help='Parse a TV schedule from source')
     parse.add_argument('source', choices=choices, help='Source to parse')
+    parse.add_argument('--workers', type=int, default=1, help='Number of worker processes to parse files (default: 1)')
+    parse.add_argument('--no-cache', action='store_true', help='Re-parse every file, ignoring cached results')
 
     # compare command
-    compare = subparsers.add_parser('compare', help='Compare two parsed TV schedules')
-    compare.add_argument('sources', nargs=2, choices=choices, help='Sources to compare')
-    compare.add_argument('--channel', default='9.1', help='Optional channel to filter for (default: 9.1)')
+    compare = subparsers.add_parser('compare', help='Compare two or more parsed TV schedules')
+    compare.add_argument('sources', nargs='+', choices=choices, help='Sources to compare (two, or more for one N-way comparison)')
+    compare.add_argument('--channel', default='9.1', help="Optional channel to filter for, a comma-separated list (e.g. 9.1,9.2), or 'all' (default: 9.1)")
     compare.add_argument('--startdate', type=str, help="Start date in 'YYYYMMDD' format")
     compare.add_argument('--enddate', type=str, help="End date in 'YYYYMMDD' format (inclusive)")    
+    compare.add_argument('--workers', type=int, default=1, help='Number of worker processes if a source must be parsed first (default: 1)')
+    compare.add_argument('--no-cache', action='store_true', help='Ignore cached results if a source must be parsed first, '
+                         'and compare every day, for two sources')
+    compare.add_argument('--tolerance', type=float, help='Seconds start times can differ and still be matched to the nearest slot, '
+                         'for two sources only (default: COMPARE_TOLERANCE_SECONDS in config.py)')
+    compare.add_argument('--threshold', type=float, help='Lowest similarity score, from 0 to 1, for program names to match '
+                         '(default: TITLE_MATCH_THRESHOLD in config.py)')
 
     # get command
     get_parser = subparsers.add_parser('get', help='Get raw TV schedule data from a source')
@@ -136,22 +323,88 @@ if __name__ == '__main__':
     get_parser.add_argument('--startdate', type=str, default=datetime.now().strftime('%Y%m%d'),
                             help="Start date in 'YYYYMMDD' format (default: today's date)")
     get_parser.add_argument('--enddate', type=str, help="End date in 'YYYYMMDD' format (inclusive)")
+    get_parser.add_argument('--max-in-flight', type=int, help='Maximum number of days requested at once (default: PBS_MAX_IN_FLIGHT in config.py)')
+    get_parser.add_argument('--ttl', type=float, help='Hours a stored day stays fresh (default: PBS_FRESHNESS_HOURS in config.py)')
+    get_parser.add_argument('--force', action='store_true', help='Request every day, even if fresh (same as --ttl 0)')
     
     # explore json data command
     explore = subparsers.add_parser('explore', help='Explore a JSON file')
     explore.add_argument('file', help='Relative path to the JSON file from root directory')
     explore.add_argument('--level', type=int, default=4, help='Number of levels to explore (default: 4)')
     explore.add_argument('--items', type=int, default=6, help='Number of items to show per list (default: 6)')
+    explore.add_argument('--load', action='store_true', help='Load the whole file first, instead of streaming it')
+    explore.add_argument('--schema', action='store_true', help='Summarize every path in the file: key frequency, types, lengths and samples')
+
+    # benchmark command
+    benchmark = subparsers.add_parser('benchmark', help="Time parsing a source by number of worker processes, or run the "
+                                      "benchmark suite on synthetic files with 'suite'")
+    benchmark.add_argument('source', choices=choices + ['suite'], help="Source to benchmark, or 'suite'")
+    benchmark.add_argument('--workers', type=int, help='Highest number of worker processes to time (default: CPU count)')
+    benchmark.add_argument('--repeats', type=int, default=1, help='Timed runs per worker count, or per stage, keeping the fastest (default: 1)')
+    benchmark.add_argument('--scales', help="Suite scales, as days x channels x slots per day (e.g. 7x1x48,28x4x48) (default: BENCHMARK_SCALES in config.py)")
+    benchmark.add_argument('--mismatch-rate', type=float, default=0.05, help='Share of synthetic slots that mismatch, for the suite (default: 0.05)')
+    benchmark.add_argument('--save', help='Path to save suite results to as JSON')
+    benchmark.add_argument('--baseline', help='Path to saved suite results to compare with; exits with status 1 on regressions')
+
+    # pipeline command
+    pipeline = subparsers.add_parser('pipeline', help='Run get, parse and compare stages from a job file in one process')
+    pipeline.add_argument('spec', help='Path to the job file (JSON), with sources, channels, date windows and pairs to compare')
+
+    # generate command
+    generate = subparsers.add_parser('generate', help='Write synthetic raw files for all three parsers')
+    generate.add_argument('--days', type=int, default=7, help='Number of days (default: 7)')
+    generate.add_argument('--channels', type=int, default=1, help='Number of channels, from 9.1 up (default: 1)')
+    generate.add_argument('--slots', type=int, default=48, help='Slots per day on each channel, at least 3 (default: 48)')
+    generate.add_argument('--mismatch-rate', type=float, default=0.05, help='Share of slots that mismatch ProTrack (default: 0.05)')
+    generate.add_argument('--startdate', type=str, help="First day in 'YYYYMMDD' format (default: 20250101)")
+    generate.add_argument('--output', default='data/synthetic', help='Folder for the files (default: data/synthetic)')
+
+    # watch command
+    watch = subparsers.add_parser('watch', help='Parse and compare raw files as they are saved to the data folder')
+    watch.add_argument('--interval', type=float, help='Seconds between scans of the data folder (default: WATCH_INTERVAL_SECONDS in config.py)')
+    watch.add_argument('--debounce', type=float, help='Seconds no file must change for before changes are handled '
+                       '(default: WATCH_DEBOUNCE_SECONDS in config.py)')
+    watch.add_argument('--channel', help="Channel to compare, a comma-separated list, or 'all' (default: WATCH_CHANNEL in config.py)")
+    watch.add_argument('--workers', type=int, default=1, help='Number of worker processes to parse files (default: 1)')
+
+    # cache command
+    cache = subparsers.add_parser('cache', help='Manage the cache of parsed files and PDF page texts')
+    cache.add_argument('action', choices=['prune'], help='Cache action to run')
+    cache.add_argument('--max-size', type=float, help='Maximum cache size in MB (default: CACHE_MAX_MB in config.py)')
+    cache.add_argument('--all', action='store_true', help='Remove every cache entry')
 
     args = parser.parse_args()
 
-    if args.command == 'parse': parse_schedule(args.source)
-    elif args.command == 'explore': explore_file(args.file, args.level, args.items)
+    # time and measure named stages, and save a trace and print a summary when the command ends
+    if args.profile:
+        import atexit, sys
+        from utils import profiler
+        profiler.enable()
+        atexit.register(profiler.report, args.trace, ' '.join(sys.argv[1:]))
+
+    if args.command == 'parse': parse_schedule(args.source, args.workers, not args.no_cache)
+    elif args.command == 'explore': explore_file(args.file, args.level, args.items, args.load, args.schema)
+    elif args.command == 'benchmark' and args.source == 'suite':
+        if benchmark_all(args.scales, args.repeats, args.mismatch_rate, args.save, args.baseline): raise SystemExit(1)
+    elif args.command == 'benchmark': benchmark_parse(args.source, args.workers, args.repeats)
+    elif args.command == 'pipeline':
+        if run_pipeline_file(args.spec): raise SystemExit(1)
+    elif args.command == 'generate':
+        generate_data(args.days, args.channels, args.slots, args.mismatch_rate, args.startdate, args.output)
+    elif args.command == 'cache': prune_cache(args.max_size, args.all)
+    elif args.command == 'watch': watch_data(args.interval, args.debounce, args.channel, args.workers)
 
     elif args.command == 'compare': 
         start_date = datetime.strptime(args.startdate, "%Y%m%d") if args.startdate else None
         end_date = datetime.strptime(args.enddate, "%Y%m%d") if args.enddate else None
-        compare_schedules(args.sources[0], args.sources[1], args.channel, start_date, end_date)
+
+        if len(args.sources) < 2: compare.error('at least two sources are required')
+        elif len(set(args.sources)) < len(args.sources): compare.error(f"each source can only be compared once: {' '.join(args.sources)}")
+        elif len(args.sources) == 2: 
+            compare_schedules(args.sources[0], args.sources[1], args.channel, start_date, end_date, args.workers, not args.no_cache,
+                              args.tolerance, args.threshold)
+        elif args.tolerance: compare.error('--tolerance only applies to two sources, since three or more are aligned on exact start times')
+        else: compare_many_schedules(args.sources, args.channel, start_date, end_date, args.workers, not args.no_cache, args.threshold)
 
     elif args.command == 'get': 
         start_date = datetime.strptime(args.startdate, "%Y%m%d") 
@@ -164,4 +417,5 @@ if __name__ == '__main__':
         else:
             days = args.days      
         
-        get_schedule_from_api(args.source, args.startdate, days)    
+        freshness_hours = 0 if args.force else args.ttl
+        get_schedule_from_api(args.source, args.startdate, days, args.max_in_flight, freshness_hours)    
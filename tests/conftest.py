@@ -0,0 +1,5 @@
+from pathlib import Path
+import sys
+
+# run tests from any folder, with the repo root importable as it is for run.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
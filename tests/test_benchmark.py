@@ -0,0 +1,15 @@
+from pathlib import Path
+import pandas as pd
+from parsers.columnar import read_csv, read_parquet_if_fresh
+from utils.benchmark import measure_parse
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
+def test_measure_parse_saves_the_csv_export_layout(tmp_path):
+    output_path = tmp_path / 'titan.csv'
+    run = measure_parse('titan', [DATA_DIR / 'MediaStar_2025-04-11_9.1.mhtml'], output_path)
+
+    exported = pd.read_csv(output_path, nrows=0)
+    assert list(exported.columns[:3]) == ['Channel', 'Date', 'Start Time'] and 'Slot' not in exported
+    assert len(read_csv(output_path)) == run['rows']
+    pd.testing.assert_series_equal(read_csv(output_path)['Slot'], read_parquet_if_fresh(output_path)['Slot'])
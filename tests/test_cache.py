@@ -0,0 +1,28 @@
+import os
+import pandas as pd
+from parsers import cache
+
+def use_cache_root(monkeypatch, root):
+    monkeypatch.setattr(cache, 'CACHE_ROOT', root)
+    monkeypatch.setattr(cache, 'CACHE_DIR', root / 'parsed')
+    monkeypatch.setattr(cache, 'PAGES_DIR', root / 'pages')
+
+def test_prune_removes_page_texts_of_a_pdf_as_one_entry(tmp_path, monkeypatch):
+    use_cache_root(monkeypatch, tmp_path)
+    cache.save_page_texts('old', ['a' * 400_000, 'b' * 400_000])
+    cache.save('new', pd.DataFrame({'Program Name': ['News']}))
+
+    # the marker is older than the pages, as it is after pages are loaded, and the PDF is older than the entry
+    os.utime(tmp_path / 'pages' / 'old' / 'num_pages', (1, 1))
+    for page in ('0.txt', '1.txt'): os.utime(tmp_path / 'pages' / 'old' / page, (2, 2))
+
+    assert cache.prune(max_mb=0.5) == 1
+    assert not (tmp_path / 'pages' / 'old').exists()
+    assert cache.load('new') is not None
+
+def test_prune_keeps_page_texts_that_fit(tmp_path, monkeypatch):
+    use_cache_root(monkeypatch, tmp_path)
+    cache.save_page_texts('pdf', ['a', 'b'])
+
+    assert cache.prune(max_mb=1) == 0
+    assert cache.load_page_texts('pdf') == ['a', 'b']
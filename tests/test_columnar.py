@@ -0,0 +1,17 @@
+import pandas as pd
+from parsers.columnar import compact, expand, read_csv, to_slots, to_dates, write_parquet, read_parquet_if_fresh
+
+def test_row_with_a_date_but_no_time_keeps_its_date(tmp_path):
+    dates = pd.Series(['20250401', '20250402'])
+    slots = to_slots(dates, pd.Series(['0600', None]), '%Y%m%d', '%H%M')
+    df = compact(pd.DataFrame({'Channel': '9.1', 'Slot': slots, 'Date': to_dates(dates, slots, '%Y%m%d'),
+                               'Program Name': ['News', 'Filler']}))
+
+    output_path = tmp_path / 'titan.csv'
+    expand(df).to_csv(output_path, index=False)
+    write_parquet(df, output_path)
+
+    exported = pd.read_csv(output_path, dtype=str)
+    assert exported[['Date', 'Start Time']].fillna('').values.tolist() == [['2025-04-01', '06:00:00'], ['2025-04-02', '']]
+    for read in (read_csv(output_path), read_parquet_if_fresh(output_path)):
+        pd.testing.assert_frame_equal(expand(read), expand(df))
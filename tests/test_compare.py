@@ -0,0 +1,18 @@
+import pandas as pd
+from comparators.compare import align_nearest
+
+def test_align_nearest_keeps_slots_without_a_start_time_unmatched():
+    df = pd.DataFrame({
+        'Channel': ['9.1'] * 4,
+        'DateTime': pd.to_datetime(['2025-04-01 06:00', None, '2025-04-01 06:05', None]),
+        'Program Name_titan': ['News', 'Filler', None, None],
+        'Program Name_pbs': [None, None, 'News', 'Promo'],
+        '_merge': ['left_only', 'left_only', 'right_only', 'right_only']
+    })
+
+    aligned = align_nearest(df, ['_titan', '_pbs'], pd.Timedelta(minutes=10)).sort_index()
+
+    assert aligned['_merge'].tolist() == ['both', 'left_only', 'right_only']
+    assert aligned.loc[0, 'Program Name_pbs'] == 'News'
+    assert aligned.loc[0, 'Offset'] == 300
+    assert aligned['DateTime'].isna().sum() == 2
@@ -0,0 +1,8 @@
+from comparators.consensus import group_sources
+
+def test_titles_are_grouped_at_the_threshold():
+    values = ('antiques roadshow', 'antiques roadshow tulsa', 'nova')
+    sources = ['protrack', 'titan', 'pbs']
+
+    assert group_sources(values, sources, 0.85) == [['protrack', 'titan'], ['pbs']]
+    assert group_sources(values, sources) == [['protrack'], ['titan'], ['pbs']]
@@ -0,0 +1,23 @@
+import pandas as pd
+from comparators.compare import from_compact, slot_bounds, get_time_frames
+from comparators.incremental import compare_days
+
+def compare(days, state=None):
+    """Compares two matching schedules with two programs a day on channel 9.1, keeping days within 5 days."""
+
+    slots = pd.to_datetime([f'{day} {time}' for day in days for time in ('06:00', '07:00')])
+    df = from_compact(pd.DataFrame({'Channel': '9.1', 'Slot': slots, 'Program Name': 'News', 'Title Key': 'news'}))
+    datetime_start, datetime_end = get_time_frames(slot_bounds(df), slot_bounds(df), ['9.1'])
+    return compare_days(df, df.copy(), ['protrack', 'titan'], datetime_start, datetime_end, 0, 0.85, state, keep_days=5)[1]
+
+def kept_days(state):
+    return sorted(str(day.date()) for _, day in state['fingerprints'])
+
+def test_state_keeps_only_days_near_the_last_run():
+    state = compare(['2025-04-01', '2025-04-02'])
+    state = compare(['2025-04-05', '2025-04-06'], state)
+    assert kept_days(state) == ['2025-04-01', '2025-04-02', '2025-04-05', '2025-04-06']
+
+    state = compare(['2025-05-20'], state)
+    assert kept_days(state) == ['2025-05-20']
+    assert state['results']['DateTime'].dt.strftime('%Y-%m-%d').unique().tolist() == ['2025-05-20']
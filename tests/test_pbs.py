@@ -0,0 +1,59 @@
+from functools import partial
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import json
+import threading
+import time
+import pytest
+from api import pbs
+
+class TVSSHandler(BaseHTTPRequestHandler):
+    """Serves each day as the TVSS API would, with latency, errors or a broken body, depending on the day."""
+
+    def log_message(self, *args): pass
+
+    def do_GET(self):
+        day = self.path.rsplit('/', 1)[-1]
+        hits = self.server.hits
+        hits[day] = hits.get(day, 0) + 1
+
+        if day == '20250401': time.sleep(0.1) # slow, but within the timeout
+        if day == '20250405': time.sleep(1) # slower than the timeout
+        if day == '20250402' and hits[day] < 3: return self.reply(503, b'busy') # recovers on the third try
+        if day == '20250403': return self.reply(500, b'down')
+        if day == '20250404': return self.reply(200, b'{"feeds": [') # truncated json
+
+        self.reply(200, json.dumps({'feeds': [], 'day': day}).encode())
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def tvss():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TVSSHandler)
+    server.hits = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_get_schedule_keeps_good_days_and_saves_failed_days_as_null(tvss, tmp_path, monkeypatch):
+    monkeypatch.setattr(pbs, 'create_session', partial(pbs.create_session, backoff=0))
+    output_path = tmp_path / 'pbs.json'
+
+    pbs.get_schedule(output_path, '20250401', 4, api_endpoint=f'http://127.0.0.1:{tvss.server_port}/',
+                     station='klrn', api_key='key', freshness_hours=0)
+
+    schedule = json.loads(output_path.read_text(encoding='utf-8'))
+    assert schedule['20250401'] == {'feeds': [], 'day': '20250401'}
+    assert schedule['20250402'] == {'feeds': [], 'day': '20250402'}
+    assert schedule['20250403'] is None and schedule['20250404'] is None
+    assert tvss.hits['20250402'] == 3 and tvss.hits['20250403'] == 1 + pbs.PBS_RETRIES
+
+def test_get_schedule_day_returns_none_on_timeout(tvss):
+    with pbs.create_session('key', retries=0) as session:
+        entry = pbs.get_schedule_day(f'http://127.0.0.1:{tvss.server_port}/klrn/day/', '20250405', session, timeout=0.3)
+
+    assert entry is None
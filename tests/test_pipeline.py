@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import pytest
+from parsers.parse_files import pool_context
+from utils.pipeline import plan, resolve_channel
+
+def test_plan_rejects_comparisons_saved_to_the_same_file():
+    spec = {'compare': [{'sources': ['protrack', 'titan'], 'channel': '9.1'},
+                        {'sources': ['protrack', 'titan'], 'channel': '9.2'}]}
+
+    with pytest.raises(ValueError, match='protrack_titan.csv'):
+        plan(spec)
+
+def test_plan_names_each_window():
+    spec = {'compare': [{'sources': ['protrack', 'titan'], 'channel': '9.1,9.2',
+                         'windows': [{'start': '20250401', 'end': '20250407'}, {'start': '20250408'}]}]}
+
+    assert [name for name in plan(spec) if name.startswith('compare')] == [
+        'compare protrack_titan_20250401_20250407', 'compare protrack_titan_from_20250408']
+
+def test_resolve_channel():
+    assert resolve_channel('9') == '9.1'
+    assert resolve_channel('9, 9.2') == ['9.1', '9.2']
+    assert resolve_channel(['9.2']) == '9.2'
+    assert resolve_channel('all') == 'all'
+
+def test_plan_rejects_a_source_listed_twice_or_a_tolerance_for_three_sources():
+    with pytest.raises(ValueError, match='only be compared once'):
+        plan({'compare': [{'sources': ['protrack', 'titan', 'titan']}]})
+    with pytest.raises(ValueError, match='only applies to two sources'):
+        plan({'compare': [{'sources': ['protrack', 'titan', 'pbs'], 'tolerance': 60}]})
+
+def test_parse_pools_spawn_workers_from_stage_threads():
+    with ThreadPoolExecutor(max_workers=1) as executor: context = executor.submit(pool_context).result()
+
+    assert context.get_start_method() == 'spawn'
+    assert pool_context() is None or threading.active_count() > 1 # the main thread keeps the default
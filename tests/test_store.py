@@ -0,0 +1,58 @@
+import pandas as pd
+from parsers import store
+from parsers.columnar import compact
+
+def schedule(slots, channel='9.1'):
+    """Builds a compact schedule with one program per slot."""
+
+    return compact(pd.DataFrame({
+        'Channel': channel,
+        'Slot': pd.to_datetime(slots),
+        'Program Name': [f'Program {i}' for i in range(len(slots))]
+    }))
+
+def test_moved_slot_is_replaced(tmp_path):
+    path = tmp_path / 'schedules.db'
+    store.upsert('titan', schedule(['2025-04-01 06:00', '2025-04-01 06:30', '2025-04-01 07:00']), path)
+    store.upsert('titan', schedule(['2025-04-01 06:00', '2025-04-01 06:35', '2025-04-01 07:00']), path)
+
+    slots = store.read_slots('titan', path=path)['Slot'].dt.strftime('%H:%M').tolist()
+    assert slots == ['06:00', '06:35', '07:00']
+
+def test_dropped_slot_inside_time_frame_is_removed(tmp_path):
+    path = tmp_path / 'schedules.db'
+    store.upsert('titan', schedule(['2025-04-01 06:00', '2025-04-01 06:30', '2025-04-01 07:00']), path)
+    store.upsert('titan', schedule(['2025-04-01 06:00', '2025-04-01 07:00']), path)
+
+    slots = store.read_slots('titan', path=path)['Slot'].dt.strftime('%H:%M').tolist()
+    assert slots == ['06:00', '07:00']
+
+def test_other_days_and_channels_are_kept(tmp_path):
+    path = tmp_path / 'schedules.db'
+    store.upsert('titan', schedule(['2025-04-01 06:00', '2025-04-02 06:00']), path)
+    store.upsert('titan', schedule(['2025-04-01 06:00'], channel='9.2'), path)
+    store.upsert('titan', schedule(['2025-04-02 06:00']), path)
+
+    df = store.read_slots('titan', path=path)
+    assert list(zip(df['Channel'].astype(str), df['Slot'].dt.strftime('%m-%d'))) == [
+        ('9.1', '04-01'), ('9.1', '04-02'), ('9.2', '04-01')]
+
+def test_adjacent_grid_weeks_are_both_kept(tmp_path):
+    path = tmp_path / 'schedules.db'
+    week_1 = pd.date_range('2025-04-04 06:00', '2025-04-11 05:30', freq='30min')
+    week_2 = pd.date_range('2025-04-11 06:00', '2025-04-18 05:30', freq='30min')
+    store.upsert('titan', schedule(week_1), path)
+    store.upsert('titan', schedule(week_2), path)
+
+    slots = store.read_slots('titan', path=path)['Slot']
+    assert len(slots) == 672
+    assert slots.between(pd.Timestamp('2025-04-11 00:00'), pd.Timestamp('2025-04-11 05:30')).sum() == 12
+
+def test_delete_source_keeps_other_sources(tmp_path):
+    path = tmp_path / 'schedules.db'
+    store.upsert('titan', schedule(['2025-04-01 06:00']), path)
+    store.upsert('pbs', schedule(['2025-04-01 06:00']), path)
+
+    assert store.delete_source('titan', path) == 1
+    assert store.get_columns('titan', path) is None
+    assert len(store.read_slots('pbs', path=path)) == 1
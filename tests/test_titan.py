@@ -0,0 +1,19 @@
+from pathlib import Path
+import pandas as pd
+import pytest
+from parsers.titan.process import read_html, extract_grid, split_cell, split_program_info
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
+@pytest.mark.parametrize('input_path', sorted(DATA_DIR.glob('MediaStar*.mhtml')), ids=lambda path: path.name)
+def test_split_program_info_matches_split_cell(input_path, capsys):
+    data, _ = extract_grid(read_html(input_path))
+    cells = pd.DataFrame.from_dict(data, orient='index').transpose().melt(value_name='Program Info')['Program Info'].dropna()
+
+    columnar = split_program_info(cells)
+    by_cell = cells.apply(split_cell)
+    by_cell.columns = columnar.columns
+
+    assert len(cells)
+    pd.testing.assert_frame_equal(columnar.astype(object).where(columnar.notna(), None),
+                                  by_cell.astype(object).where(by_cell.notna(), None))
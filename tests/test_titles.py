@@ -0,0 +1,10 @@
+from comparators.titles import similarity
+
+def test_name_with_short_subtitle_added_scores_1():
+    assert similarity('antiques roadshow', 'antiques roadshow tulsa') == 1.0
+
+def test_name_ending_inside_a_word_is_scored_by_ratio():
+    assert similarity('pbs news', 'pbs newshour') < 1.0
+
+def test_much_shorter_name_is_scored_by_ratio():
+    assert similarity('great performances', 'great performances at the met') < 1.0
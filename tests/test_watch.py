@@ -0,0 +1,20 @@
+from pathlib import Path
+import shutil
+from parsers import parse_files
+from utils.watch import scan, refresh
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
+def test_removing_every_file_of_a_source_removes_its_outputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_files, 'SCHEDULE_STORE', False)
+    data_dir, output_dir = tmp_path / 'data', tmp_path / 'output'
+    data_dir.mkdir(), output_dir.mkdir()
+    shutil.copy(DATA_DIR / 'MediaStar_2025-04-11_9.1.mhtml', data_dir)
+
+    frames = {}
+    assert refresh(scan(data_dir), frames, comparisons=[], output_dir=output_dir) == {'titan'}
+    assert (output_dir / 'titan.csv').exists() and (output_dir / 'titan.parquet').exists()
+
+    (data_dir / 'MediaStar_2025-04-11_9.1.mhtml').unlink()
+    assert refresh(scan(data_dir), frames, comparisons=[], output_dir=output_dir) == {'titan'}
+    assert not frames and not list(output_dir.iterdir())
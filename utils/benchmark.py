@@ -0,0 +1,273 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import pandas as pd
+from config import BENCHMARK_SCALES, BENCHMARK_REGRESSION
+
+def benchmark_workers(input_paths, source, max_workers=None, repeats=1):
+    """
+    Times parsing of the same input files with 1 up to `max_workers` worker processes, and checks
+    that every run returns the same data as the serial run.
+
+    Args:
+        input_paths (list[Path]): List of file paths to parse.
+        source (str): The source module to use ('pbs', 'protrack' or 'titan').
+        max_workers (int, optional): Highest worker count to time. Defaults to the number of CPUs.
+        repeats (int, optional): Number of timed runs per worker count, keeping the fastest. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: One row per worker count, with wall-clock seconds, speedup over the serial
+        run, and whether the output matched the serial output.
+    """
+
+    from parsers.parse_files import parse_all
+
+    max_workers = max_workers or os.cpu_count() or 1
+    rows = []
+    reference = None
+    serial_seconds = None
+
+    for workers in range(1, max_workers + 1):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            dfs = parse_all(input_paths, source, workers)
+            times.append(time.perf_counter() - start)
+
+        df = pd.concat(dfs, ignore_index=True)
+        seconds = min(times)
+        if reference is None: reference, serial_seconds = df, seconds
+
+        rows.append({
+            'Workers': workers,
+            'Seconds': round(seconds, 3),
+            'Speedup': round(serial_seconds / seconds, 2),
+            'Identical': df.equals(reference)
+        })
+        print(f'{workers} worker(s): {seconds:.3f}s')
+
+    result = pd.DataFrame(rows)
+    print(f'\nParsed {len(input_paths)} {source} files on {os.cpu_count()} CPUs\n')
+    print(result.to_string(index=False))
+
+    return result
+
+def peak_rss_mb():
+    """
+    Gets the peak resident memory of the current process so far.
+
+    Returns:
+        float: Peak RSS in megabytes, or None where the `resource` module is not available (e.g., on Windows).
+    """
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # bytes on macOS, kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def measure_parse(source, input_paths, output_path):
+    """
+    Times parsing and merging the raw files of a source, and saves the result for comparisons. Defined at
+    module level so it can run in a fresh worker process.
+
+    Args:
+        source (str): The source module to use ('pbs', 'protrack' or 'titan').
+        input_paths (list[Path]): Raw files to parse, oldest first.
+        output_path (Path): Path to save the merged CSV file, and its typed Parquet copy, after timing.
+
+    Returns:
+        dict: Rows parsed, wall-clock and CPU seconds, and the process's peak RSS in megabytes.
+
+    Notes:
+        - ProTrack page text is not cached, so every run decodes the PDF.
+    """
+
+    from parsers.parse_files import get_parser, merge_files
+    from parsers.columnar import expand, write_parquet
+
+    parser = get_parser(source)
+    options = {'use_cache': False} if source == 'protrack' else {}
+
+    with redirect_stdout(io.StringIO()): # parsers print progress
+        start, cpu_start = time.perf_counter(), time.process_time()
+        df, _ = merge_files([parser(path, **options) for path in input_paths], input_paths)
+        seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+    peak = peak_rss_mb()
+
+    expand(df).to_csv(output_path, index=False) # the CSV export layout, as save_parsed writes it
+    write_parquet(df, output_path)
+    return {'rows': len(df), 'seconds': seconds, 'cpu_seconds': cpu_seconds, 'peak_rss_mb': peak}
+
+def measure_compare(path_1, path_2, output_path):
+    """
+    Times comparing two parsed files on every channel, comparing every day. Defined at module level so it
+    can run in a fresh worker process.
+
+    Args:
+        path_1 (str): Path to the parsed CSV file with the correct schedule.
+        path_2 (str): Path to the parsed CSV file to check.
+        output_path (str): Path where the comparison is saved.
+
+    Returns:
+        dict: Rows of the first schedule, mismatches found, wall-clock and CPU seconds, and the process's peak RSS in megabytes.
+    """
+
+    from comparators.compare import compare_tv_schedules
+
+    with redirect_stdout(io.StringIO()):
+        start, cpu_start = time.perf_counter(), time.process_time()
+        compare_tv_schedules(path_1, path_2, output_path, 'all', use_cache=False)
+        seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+    peak = peak_rss_mb()
+
+    mismatches = pd.read_csv(output_path.replace('.csv', '_mismatches.csv'))
+    return {'rows': len(pd.read_csv(path_1)), 'mismatches': len(mismatches), 'seconds': seconds, 'cpu_seconds': cpu_seconds, 'peak_rss_mb': peak}
+
+def measure(function, *args, repeats=1):
+    """
+    Runs a measure function in a fresh process for each repeat, so imports are already done but each run
+    starts with its own memory, and keeps the fastest run.
+
+    Args:
+        function (Callable): `measure_parse` or `measure_compare`.
+        *args: Arguments for `function`.
+        repeats (int, optional): Number of runs, keeping the fastest. Defaults to 1.
+
+    Returns:
+        dict: Result of the fastest run.
+    """
+
+    from parsers import cache
+
+    runs = []
+    for _ in range(repeats):
+        if function is measure_compare: (cache.COMPARE_DIR / f'{Path(args[2]).stem}.pkl').unlink(missing_ok=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            runs.append(executor.submit(function, *args).result())
+    if function is measure_compare: (cache.COMPARE_DIR / f'{Path(args[2]).stem}.pkl').unlink(missing_ok=True)
+
+    return min(runs, key=lambda run: run['seconds'])
+
+def benchmark_suite(scales=BENCHMARK_SCALES, repeats=1, mismatch_rate=0.05, save_path=None, baseline_path=None,
+                    threshold=BENCHMARK_REGRESSION):
+    """
+    Times each parser and `compare_tv_schedules` on synthetic raw files at several scales, and compares
+    throughput and memory with a saved baseline.
+
+    Args:
+        scales (list[tuple], optional): (days, channels, slots per day) of each scale. Defaults to `BENCHMARK_SCALES` in config.py.
+        repeats (int, optional): Number of timed runs per stage, keeping the fastest. Defaults to 1.
+        mismatch_rate (float, optional): Share of slots MediaStar and TVSS files each disagree with ProTrack on. Defaults to 0.05.
+        save_path (Path, optional): Path to save results to as JSON. Defaults to `None`, which does not save them.
+        baseline_path (Path, optional): Path to results saved by an earlier run, to compare with. Defaults to `None`.
+        threshold (float, optional): Drop in rows per second, or rise in peak RSS, as a share of the baseline, that is 
+            flagged as a regression. Defaults to `BENCHMARK_REGRESSION` in config.py.
+
+    Returns:
+        Tuple[dict, pd.DataFrame]: The results, with one entry per stage and scale, and the comparison with the
+        baseline (empty without one), with a "Flag" column naming any regression.
+
+    Notes:
+        - Files are generated with `utils.synthetic.generate` into a temporary folder, which is removed after.
+        - Each stage runs in a fresh process, so peak RSS is the stage's own peak, including imported modules.
+        - Compare stages record the mismatches found, which should equal the slots changed in the second source.
+    """
+
+    from utils.synthetic import generate
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for days, channels, slots in scales:
+            scale = f'{days}x{channels}x{slots}'
+            scale_dir = Path(temp_dir) / scale
+            files = generate(scale_dir / 'data', days, channels, slots, mismatch_rate)
+            print(f'\nScale {scale}: {files["rows"]} slots, in {sum(len(files[source]) for source in ["protrack", "titan", "pbs"])} files')
+
+            for source in ['protrack', 'titan', 'pbs']:
+                run = measure(measure_parse, source, files[source], scale_dir / f'synthetic_{source}.csv', repeats=repeats)
+                results.append({'stage': f'parse {source}', 'scale': scale, 'files': len(files[source]), **run})
+
+            for source in ['titan', 'pbs']:
+                output_path = str(scale_dir / f'synthetic_protrack_synthetic_{source}.csv')
+                run = measure(measure_compare, str(scale_dir / 'synthetic_protrack.csv'), str(scale_dir / f'synthetic_{source}.csv'),
+                              output_path, repeats=repeats)
+                results.append({'stage': f'compare protrack {source}', 'scale': scale, 'expected_mismatches': files[f'{source}_changed'], **run})
+
+    for result in results:
+        result['rows_per_sec'] = round(result['rows'] / result['seconds'], 1) if result['seconds'] else None
+        result['seconds'], result['cpu_seconds'] = round(result['seconds'], 4), round(result['cpu_seconds'], 4)
+        print(f"{result['stage']:<24} {result['scale']:>10}: {result['rows']:>7} rows in {result['seconds']:.3f}s, "
+              f"{result['rows_per_sec']} rows/s, peak RSS {result['peak_rss_mb']} MB"
+              + (f", {result['mismatches']} of {result['expected_mismatches']} mismatches found" if 'mismatches' in result else ''))
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeats': repeats,
+        'results': results
+    }
+
+    if save_path:
+        Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(save_path).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f'\nResults saved to {save_path}')
+
+    diff = pd.DataFrame()
+    if baseline_path:
+        baseline = json.loads(Path(baseline_path).read_text(encoding='utf-8'))
+        diff = compare_to_baseline(results, baseline['results'], threshold)
+        print(f'\nCompared with {baseline_path} ({baseline.get("created")}):\n')
+        print(diff.to_string(index=False) if len(diff) else 'No stages and scales in common')
+
+    return report, diff
+
+def compare_to_baseline(results, baseline, threshold=BENCHMARK_REGRESSION):
+    """
+    Compares benchmark results with a baseline, stage by stage and scale by scale.
+
+    Args:
+        results (list[dict]): Results from `benchmark_suite`.
+        baseline (list[dict]): Results from an earlier run.
+        threshold (float, optional): Share of the baseline that rows per second can drop by, or peak RSS can rise by,
+            before it is flagged. Defaults to `BENCHMARK_REGRESSION` in config.py.
+
+    Returns:
+        pd.DataFrame: One row per stage and scale in both, with rows per second and peak RSS, their change in percent,
+        and a "Flag" column with 'SLOWER', 'MORE MEMORY', both, or an empty string.
+    """
+
+    columns = ['stage', 'scale', 'rows_per_sec', 'peak_rss_mb']
+    df = pd.DataFrame(results, columns=columns).merge(pd.DataFrame(baseline, columns=columns), on=['stage', 'scale'],
+                                                       suffixes=('', '_baseline'))
+
+    speed = df['rows_per_sec'] / df['rows_per_sec_baseline'] - 1
+    memory = df['peak_rss_mb'] / df['peak_rss_mb_baseline'] - 1
+    slower = (speed < -threshold).map({True: 'SLOWER', False: ''})
+    more_memory = (memory > threshold).map({True: 'MORE MEMORY', False: ''})
+
+    return pd.DataFrame({
+        'Stage': df['stage'],
+        'Scale': df['scale'],
+        'Rows/s': df['rows_per_sec'],
+        'Baseline Rows/s': df['rows_per_sec_baseline'],
+        'Rows/s Change %': (speed * 100).round(1),
+        'Peak RSS MB': df['peak_rss_mb'],
+        'Baseline RSS MB': df['peak_rss_mb_baseline'],
+        'RSS Change %': (memory * 100).round(1),
+        'Flag': (slower + ' ' + more_memory).str.strip()
+    })
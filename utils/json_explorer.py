@@ -12,6 +12,10 @@ def load_json(input_path):
         print(f"Error decoding JSON: {e}")
         return None
 
+def list_header(length, item_type):
+    """Describes a list by its length and the type of its first item."""
+    return f'List[{length}] -> {item_type} (if not empty)' if length else 'List[0] (empty)'
+
 def explore_json(obj, level=0, max_level=3, max_items=3):
     """
     Recursively explores a JSON object up to a specified depth.
@@ -33,7 +37,7 @@ def explore_json(obj, level=0, max_level=3, max_items=3):
             explore_json(value, level + 1, max_level, max_items)  # recurse deeper
 
     elif isinstance(obj, list):
-        print('  ' * level + f'List[{len(obj)}] -> {type(obj[0]).__name__} (if not empty)')
+        print('  ' * level + list_header(len(obj), type(obj[0]).__name__ if obj else None))
         for i, item in enumerate(obj[:max_items]):  # show up to max_items
             print('  ' * (level + 1) + f'[{i}]')
             explore_json(item, level + 1, max_level, max_items)
@@ -50,3 +54,170 @@ def explore_json_file(filepath, max_level=3, max_items=3):
     if data is not None:
         print(f"Exploring JSON file: {filepath}\n")
         explore_json(data, max_level=max_level, max_items=max_items)
+
+EVENT_TYPES = {'start_map': 'dict', 'start_array': 'list', 'string': 'str', 'boolean': 'bool', 'null': 'NoneType'}
+
+def value_type(event, value):
+    """Gets the Python type name of a value from the ijson event that starts it."""
+    if event == 'number': return type(value).__name__ # int or float
+    return EVENT_TYPES[event]
+
+def skip_value(events, event):
+    """Reads past a value, without building it, from the ijson event that starts it."""
+    depth = 1 if event in ('start_map', 'start_array') else 0
+    while depth:
+        event, _ = next(events)
+        if event in ('start_map', 'start_array'): depth += 1
+        elif event in ('end_map', 'end_array'): depth -= 1
+
+def stream_value(events, event, value, level, max_level, max_items, lines):
+    """
+    Explores one value as `explore_json` does, from the ijson event that starts it, reading its events as they come.
+
+    Args:
+        events (Iterator): ijson `basic_parse` events, positioned after `event`.
+        event (str): The event that starts the value.
+        value: The event's value, for a scalar.
+        level (int): Current depth level.
+        max_level (int): Maximum depth to explore.
+        max_items (int): Number of items to show per list.
+        lines (list[str]): Output lines, added to in place. A list's header is filled in once its length is known.
+    """
+    if level >= max_level:
+        skip_value(events, event) # past the depth limit, read on without exploring
+        return
+
+    if event == 'start_map':
+        for event, key in events:
+            if event == 'end_map': return
+            event, value = next(events)
+            shown = value if event in ('string', 'number', 'boolean') else value_type(event, value)
+            lines.append('  ' * level + f'{key}: {shown}')
+            stream_value(events, event, value, level + 1, max_level, max_items, lines)
+
+    elif event == 'start_array':
+        header, length, item_type = len(lines), 0, None
+        lines.append(None)
+        for event, value in events:
+            if event == 'end_array': break
+            if length == 0: item_type = value_type(event, value)
+            if length < max_items:
+                lines.append('  ' * (level + 1) + f'[{length}]')
+                stream_value(events, event, value, level + 1, max_level, max_items, lines)
+            else: skip_value(events, event) # past the item limit
+            length += 1
+        lines[header] = '  ' * level + list_header(length, item_type)
+
+def stream_json_file(filepath, max_level=3, max_items=3):
+    """
+    Explores a JSON file as `explore_json_file` does, but reads it as a stream of events, so the file is never
+    loaded whole, and values past the depth and item limits are read past without being built.
+
+    Args:
+        filepath (str): Path to the JSON file.
+        max_level (int): Maximum depth to explore.
+        max_items (int): Number of items to show per list.
+    """
+    import ijson
+
+    try:
+        with open(filepath, 'rb') as f:
+            events = ijson.basic_parse(f, use_float=True)
+            lines = []
+            print(f"Exploring JSON file: {filepath}\n")
+            for event, value in events: # the top-level value
+                stream_value(events, event, value, 0, max_level, max_items, lines)
+                break
+            for line in lines: print(line)
+    except FileNotFoundError:
+        print(f"Error: File '{filepath}' not found.")
+    except ijson.JSONError as e:
+        print(f"Error decoding JSON: {e}")
+
+def summarize_json_file(filepath, max_samples=3, sample_length=40):
+    """
+    Summarizes the schema of a JSON file in one streaming pass, merging every value found at the same path.
+
+    Args:
+        filepath (str): Path to the JSON file.
+        max_samples (int): Number of distinct sample values to keep per path.
+        sample_length (int): Longest sample string kept, in characters.
+
+    Returns:
+        dict: Each path (e.g., '$.*.feeds[].listings[].title') mapped to its stats: 'count' of values, 'present' as
+        the share of parent objects that have the key, 'types' counted by type name, 'min_length' and 'max_length' of
+        strings, lists (items) and objects (keys), and 'samples'. `None` if the file could not be read.
+
+    Notes:
+        - Keys made of digits only, like the day keys of a TVSS file, are merged as '*', and list items as '[]'.
+          Neither has a 'present' share.
+        - Memory grows with the number of distinct paths, not with the size of the file.
+    """
+    import ijson
+
+    stats = {}
+    stack = [] # open containers, as [path, type name, number of keys or items]
+
+    def measure(entry, length):
+        entry['min_length'] = length if entry['min_length'] is None else min(entry['min_length'], length)
+        entry['max_length'] = length if entry['max_length'] is None else max(entry['max_length'], length)
+
+    try:
+        with open(filepath, 'rb') as f:
+            key = None
+            for event, value in ijson.basic_parse(f, use_float=True):
+                if event == 'map_key':
+                    key = '*' if value.isdigit() else value
+                    continue
+                if event in ('end_map', 'end_array'):
+                    path, _, size = stack.pop()
+                    measure(stats[path], size)
+                    continue
+
+                # a value starts: find its path from its parent's, and count it in the parent
+                parent = None
+                if not stack: path = '$'
+                else:
+                    stack[-1][2] += 1
+                    if stack[-1][1] == 'list': path = f'{stack[-1][0]}[]'
+                    else: path, parent = f'{stack[-1][0]}.{key}', stack[-1][0] if key != '*' else None
+
+                type_name = value_type(event, value)
+                entry = stats.setdefault(path, {'count': 0, 'parent': parent, 'types': {}, 'min_length': None,
+                                                'max_length': None, 'samples': []})
+                entry['count'] += 1
+                entry['types'][type_name] = entry['types'].get(type_name, 0) + 1
+
+                if event in ('start_map', 'start_array'): stack.append([path, type_name, 0])
+                else:
+                    if isinstance(value, str): measure(entry, len(value))
+                    sample = value[:sample_length] if isinstance(value, str) else value
+                    if len(entry['samples']) < max_samples and sample not in entry['samples']: entry['samples'].append(sample)
+    except FileNotFoundError:
+        print(f"Error: File '{filepath}' not found.")
+        return None
+    except ijson.JSONError as e:
+        print(f"Error decoding JSON: {e}")
+        return None
+
+    # share of parent objects with each key
+    for entry in stats.values():
+        parent = entry.pop('parent')
+        entry['present'] = round(entry['count'] / stats[parent]['types']['dict'], 3) if parent else None
+
+    return stats
+
+def print_schema(stats):
+    """
+    Prints a schema summary from `summarize_json_file`, one path per line.
+
+    Arg:
+        stats (dict): Stats of each path.
+    """
+    print(f"{'Path':<50} {'Count':>8} {'Present':>8} {'Length':>10}  Types")
+    for path, entry in stats.items():
+        types = ', '.join(f'{name} {count / entry["count"]:.0%}' for name, count in entry['types'].items())
+        present = f'{entry["present"]:.0%}' if entry['present'] is not None else '-'
+        length = f'{entry["min_length"]}-{entry["max_length"]}' if entry['min_length'] is not None else '-'
+        samples = ', '.join(repr(sample) for sample in entry['samples'])
+        print(f'{path:<50} {entry["count"]:>8} {present:>8} {length:>10}  {types}' + (f'  e.g. {samples}' if samples else ''))
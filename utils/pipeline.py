@@ -0,0 +1,271 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+import json
+import re
+import time
+from config import FILES, PIPELINE_MAX_CONCURRENT
+from utils import profiler
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT_DIR / 'data'
+OUTPUT_DIR = ROOT_DIR / 'output'
+
+def resolve_date(value):
+    """
+    Converts a date from a job file to a datetime.
+
+    Arg:
+        value (str): A date in 'YYYYMMDD' format, or 'today', optionally with a number of days added or
+            subtracted (e.g., 'today+6', 'today-1').
+
+    Returns:
+        datetime: The date, at midnight.
+    """
+
+    match = re.fullmatch(r'today([+-]\d+)?', str(value).strip())
+    if match: return datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(days=int(match.group(1) or 0))
+    return datetime.strptime(str(value), '%Y%m%d')
+
+def resolve_channel(channel):
+    """
+    Converts channels from a job file, or a --channel option of run.py, to the channel option comparisons take.
+
+    Arg:
+        channel (str | list[str]): One channel, a comma-separated list of channels, a list of channels, or 'all'.
+
+    Returns:
+        str | list[str]: One channel, a list of channels, or 'all', with '9' read as '9.1'.
+    """
+
+    if channel == 'all': return channel
+    channels = channel.split(',') if isinstance(channel, str) else channel
+    channels = ['9.1' if str(ch).strip() == '9' else str(ch).strip() for ch in channels]
+    return channels[0] if len(channels) == 1 else channels
+
+def get_stage(source, start_date, days, options, inputs):
+    """
+    Gets raw schedule data from a source's API, into its raw file in data/, which its parse stage reads.
+
+    Args:
+        source (str): The source to get data from ('pbs').
+        start_date (datetime): First day to get.
+        days (int): Number of days to get.
+        options (dict): Other options for `api.pbs.get_schedule` (e.g., {'freshness_hours': 1}).
+        inputs (list): Results of stages this stage depends on, which is none.
+    """
+
+    from api.pbs import get_schedule
+    get_schedule(DATA_DIR / FILES[source][0], start_date.strftime('%Y%m%d'), days, **options)
+
+def parse_stage(source, workers, use_cache, save, inputs):
+    """
+    Parses a source's raw files, listed in `FILES` in config.py, and merges them, keeping the newest file's
+    rows for each slot.
+
+    Args:
+        source (str): The source module to use ('pbs', 'protrack' or 'titan').
+        workers (int): Number of worker processes used to parse files.
+        use_cache (bool): Reuse parsed DataFrames from cache/parsed for unchanged files.
+        save (bool): Also save the result, as `run.py parse` does, to output/<source>.csv, its Parquet copy,
+            any rejects and conflicts files, and the schedule store.
+        inputs (list): Results of stages this stage depends on, which is the source's get stage, if any.
+
+    Returns:
+        pd.DataFrame: The merged schedule.
+    """
+
+    from parsers.parse_files import parse_all, parse_cached, merge_files, save_parsed
+
+    input_paths = [DATA_DIR / file for file in FILES[source]]
+    dfs = parse_cached(input_paths, source, workers) if use_cache else parse_all(input_paths, source, workers)
+    if save: return save_parsed(dfs, input_paths, OUTPUT_DIR / f'{source}.csv', source)
+
+    df, conflicts = merge_files(dfs, input_paths)
+    rejects = sum(len(parsed.attrs.get('rejects', [])) for parsed in dfs if parsed is not None)
+    replaced = conflicts['Kept'].eq('NO').sum() if len(conflicts) else 0
+    print(f'\nData from {len(input_paths)} {source} files merged, with {rejects} rejected lines and {replaced} rows replaced by newer files')
+    return df
+
+def compare_stage(sources, output_path, channel, start_date, end_date, options, use_cache, inputs):
+    """
+    Compares parsed schedules, handed over in memory by their parse stages, and saves the results.
+
+    Args:
+        sources (list[str]): Sources to compare, the correct schedule first. Two are compared with
+            `compare.compare_tv_schedules`, and three or more with `consensus.consensus_tv_schedules`.
+        output_path (Path): Path where the comparison is saved.
+        channel (str | list[str]): Channel to compare, a list of channels, or 'all'.
+        start_date (datetime): The start date, or `None`.
+        end_date (datetime): The end date, or `None`.
+        options (dict): Other options (e.g., {'tolerance': 120, 'threshold': 0.9}), with a tolerance for two sources only.
+        use_cache (bool): Reuse results from earlier runs for unchanged days, for two sources.
+        inputs (list[pd.DataFrame]): Parsed schedule of each source, from its parse stage.
+    """
+
+    paths = [str(OUTPUT_DIR / f'{source}.csv') for source in sources] # name the sources, and are not read
+
+    if len(sources) == 2:
+        from comparators.compare import compare_tv_schedules
+        compare_tv_schedules(paths[0], paths[1], str(output_path), channel, start_date, end_date,
+                             use_cache=use_cache, schedules=tuple(inputs), **options)
+    else:
+        from comparators.consensus import consensus_tv_schedules
+        consensus_tv_schedules(paths, str(output_path), channel, start_date, end_date, schedules=inputs, **options)
+
+def plan(spec):
+    """
+    Builds the stages of a job, and the stages each one depends on, from its job file.
+
+    Arg:
+        spec (dict): The job, with these keys:
+            - compare (list[dict]): Comparisons, each with "sources" (two or more), and optional "channel" (one,
+              a comma-separated list, a list, or 'all', default '9.1'), "windows" (a list of {"start", "end"} dates,
+              either of which can be left out, each compared and saved as `<sources>_<start>_<end>.csv`), and
+              "threshold", and "tolerance" for two sources only.
+            - get (list[dict], optional): Data to get first, each with "source" ('pbs'), "start_date", "days"
+              (default 7), and optional "max_in_flight" and "ttl" (hours a stored day stays fresh).
+            - parse (list[str], optional): Sources to parse, in addition to those compared.
+            - workers (int, optional): Worker processes used to parse each source's files. Default 1.
+            - use_cache (bool, optional): Reuse cached parse and compare results. Default true.
+            - save_parsed (bool, optional): Also save parsed schedules, as `run.py parse` does. Default false.
+            - max_concurrent (int, optional): Stages run at once. Default `PIPELINE_MAX_CONCURRENT` in config.py.
+
+            Dates are in 'YYYYMMDD' format, or 'today', with optional days added or subtracted (e.g., 'today+6').
+
+    Returns:
+        dict: Each stage's name mapped to the names of the stages it depends on, and a function that takes
+        their results, in the same order.
+
+    Raises:
+        ValueError: If the job has an unknown source, a comparison with fewer than two sources, a source twice,
+            or a tolerance for three or more, or two comparisons saved to the same file (the same sources and window, on different channels), which
+            would overwrite each other, so their channels should be listed in one comparison instead.
+    """
+
+    workers, use_cache = spec.get('workers', 1), spec.get('use_cache', True)
+    stages = {}
+
+    for get in spec.get('get', []):
+        if get['source'] != 'pbs': raise ValueError(f"Unknown source to get: {get['source']}")
+        options = {'max_in_flight': get.get('max_in_flight'), 'freshness_hours': get.get('ttl')}
+        options = {name: value for name, value in options.items() if value is not None} # else use config defaults
+        run = partial(get_stage, get['source'], resolve_date(get['start_date']), get.get('days', 7), options)
+        stages[f"get {get['source']}"] = {'deps': [], 'run': run}
+
+    sources = list(spec.get('parse', [])) + [source for job in spec.get('compare', []) for source in job['sources']]
+    for source in dict.fromkeys(sources): # each source once, in order
+        if source not in FILES: raise ValueError(f'Unknown source: {source}')
+        deps = [f'get {source}'] if f'get {source}' in stages else []
+        stages[f'parse {source}'] = {'deps': deps, 'run': partial(parse_stage, source, workers, use_cache, spec.get('save_parsed', False))}
+
+    for job in spec.get('compare', []):
+        if len(job['sources']) < 2: raise ValueError(f"At least two sources are required to compare: {job['sources']}")
+        if len(set(job['sources'])) < len(job['sources']): raise ValueError(f"Each source can only be compared once: {job['sources']}")
+        if len(job['sources']) > 2 and job.get('tolerance'):
+            raise ValueError(f"A tolerance only applies to two sources, since three or more are aligned on exact start times: {job['sources']}")
+        channel = resolve_channel(job.get('channel', '9.1'))
+        options = {name: job[name] for name in ('tolerance', 'threshold') if job.get(name) is not None}
+
+        for window in job.get('windows') or [{}]:
+            start_date = resolve_date(window['start']) if window.get('start') else None
+            end_date = resolve_date(window['end']) if window.get('end') else None
+            if start_date and end_date: suffix = f'_{start_date:%Y%m%d}_{end_date:%Y%m%d}'
+            elif start_date or end_date: suffix = f'_from_{start_date:%Y%m%d}' if start_date else f'_to_{end_date:%Y%m%d}'
+            else: suffix = ''
+            output_path = OUTPUT_DIR / f"{'_'.join(job['sources'])}{suffix}.csv"
+
+            if f'compare {output_path.stem}' in stages:
+                raise ValueError(f'More than one comparison is saved to {output_path.name}: list their channels in one comparison')
+            run = partial(compare_stage, job['sources'], output_path, channel, start_date, end_date, options, use_cache)
+            stages[f'compare {output_path.stem}'] = {'deps': [f'parse {source}' for source in job['sources']], 'run': run}
+
+    return stages
+
+def run_stages(stages, max_concurrent=PIPELINE_MAX_CONCURRENT):
+    """
+    Runs stages in threads, starting each one as soon as the stages it depends on have finished.
+
+    Args:
+        stages (dict): Stages from `plan`.
+        max_concurrent (int, optional): Stages run at once. Defaults to `PIPELINE_MAX_CONCURRENT` in config.py.
+
+    Returns:
+        Tuple[dict, dict]: Each finished stage's result, and each stage's status ('done', 'failed' or 'skipped')
+        and seconds.
+
+    Notes:
+        - A stage that fails is reported, and stages that depend on it are skipped, but other stages still run.
+    """
+
+    results, status = {}, {}
+    pending, running = dict(stages), {}
+
+    def start(name, inputs): # time each stage, and record it when profiling
+        with profiler.stage(f"pipeline.{name.split(' ')[0]}"):
+            began = time.perf_counter()
+            result = stages[name]['run'](inputs)
+            return result, time.perf_counter() - began
+
+    with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+        while pending or running:
+            # skip stages whose dependencies failed, and start stages whose dependencies are done
+            waiting = len(pending)
+            for name, stage in list(pending.items()):
+                if any(status.get(dep, ('',))[0] in ('failed', 'skipped') for dep in stage['deps']):
+                    status[name] = ('skipped', 0.0)
+                    print(f'\nSkipped {name}, since a stage it depends on did not finish')
+                    del pending[name]
+                elif all(dep in results for dep in stage['deps']):
+                    running[executor.submit(start, name, [results[dep] for dep in stage['deps']])] = name
+                    del pending[name]
+
+            if not running:
+                if len(pending) == waiting: raise ValueError(f"Stages depend on stages that are not in the job: {', '.join(pending)}")
+                continue # stages were skipped, so check what depends on them
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name], seconds = future.result()
+                    status[name] = ('done', seconds)
+                except Exception as e:
+                    status[name] = ('failed', 0.0)
+                    print(f'\nFailed {name}: {e}')
+
+    return results, status
+
+def run_pipeline(spec_path):
+    """
+    Runs a job file's get, parse and compare stages in one process, handing parsed schedules to comparisons
+    in memory, and running stages that do not depend on each other at the same time.
+
+    Arg:
+        spec_path (Path): Path to the job file, in JSON, with the keys described in `plan`.
+
+    Returns:
+        dict: Each stage's status ('done', 'failed' or 'skipped') and seconds.
+
+    Notes:
+        - Only raw data from get stages, which parse stages read, and comparison results are saved, unless
+          "save_parsed" is set in the job file.
+        - Stages run in threads, so process pools that parse stages create start their workers with 'spawn'
+          instead of 'fork', from `parse_files.pool_context`, without changing the start method for the process.
+    """
+
+    spec = json.loads(Path(spec_path).read_text(encoding='utf-8'))
+    stages = plan(spec)
+    max_concurrent = spec.get('max_concurrent', PIPELINE_MAX_CONCURRENT)
+
+    print(f'\nPipeline {Path(spec_path).name}: {len(stages)} stages, up to {max_concurrent} at once')
+    for name, stage in stages.items(): print(f"    {name}" + (f" (after {', '.join(stage['deps'])})" if stage['deps'] else ''))
+
+    began = time.perf_counter()
+    _, status = run_stages(stages, max_concurrent)
+
+    print(f'\nPipeline finished in {time.perf_counter() - began:.2f}s:')
+    for name, (state, seconds) in status.items(): print(f'    {name:<50} {state:<8} {seconds:>8.2f}s')
+
+    return status
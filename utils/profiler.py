@@ -0,0 +1,199 @@
+from datetime import datetime
+from pathlib import Path
+import json
+import platform
+import threading
+import time
+import tracemalloc
+
+ENABLED = False
+STAGES = [] # stages that have ended, in the order they ended
+LOCAL = threading.local() # each thread's stages that have started but not ended, outermost first
+STARTED = None # perf_counter when profiling was enabled
+
+class Stage:
+    """
+    A named stage of a run, timed and measured while in a `with` block. Set `rows` in the block to record
+    how many rows the stage handled.
+    """
+
+    __slots__ = ('name', 'rows', 'depth', 'thread', 'start', 'wall', 'cpu', 'memory_start', 'peak')
+
+    def __init__(self, name):
+        self.name, self.rows = name, None
+
+    def __enter__(self):
+        open_stages = open_in_thread()
+        if tracemalloc.is_tracing():
+            memory, peak = tracemalloc.get_traced_memory()
+            for stage in open_stages: stage.peak = max(stage.peak, peak) # outer stages keep the peak so far
+            tracemalloc.reset_peak()
+            self.memory_start, self.peak = memory, memory
+
+        self.depth, self.thread = len(open_stages), threading.get_ident()
+        open_stages.append(self)
+        self.start, self.cpu = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall, self.cpu = time.perf_counter() - self.start, time.process_time() - self.cpu
+
+        open_stages = open_in_thread()
+        if tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            for stage in open_stages: stage.peak = max(stage.peak, peak)
+            tracemalloc.reset_peak()
+
+        open_stages.pop()
+        STAGES.append(self)
+        return False
+
+    def to_dict(self):
+        """
+        Gets the stage's measurements.
+
+        Returns:
+            dict: Name, nesting depth, start in seconds since profiling was enabled, wall-clock and CPU seconds,
+            rows, and peak memory allocated during the stage in megabytes (None without memory tracing).
+        """
+
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'start': round(self.start - STARTED, 6),
+            'wall_seconds': round(self.wall, 6),
+            'cpu_seconds': round(self.cpu, 6),
+            'rows': self.rows,
+            'peak_mb': round((self.peak - self.memory_start) / 2**20, 3) if hasattr(self, 'peak') else None
+        }
+
+class NoStage:
+    """A stage that records nothing, used while profiling is off."""
+
+    __slots__ = ()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def __setattr__(self, name, value): pass # rows are not recorded
+
+NO_STAGE = NoStage()
+
+def open_in_thread():
+    """
+    Gets the stages the current thread has started but not ended, so stages run in threads at the same time
+    each nest in their own thread's stages.
+
+    Returns:
+        list[Stage]: Open stages, outermost first.
+
+    Notes:
+        - CPU time and memory are measured for the whole process, so a stage's CPU time and peak include other
+          threads running at the same time.
+    """
+
+    if not hasattr(LOCAL, 'open'): LOCAL.open = []
+    return LOCAL.open
+
+def stage(name):
+    """
+    Times and measures a named stage of a run, as a context manager (e.g., `with profiler.stage('titan.read_html') as s:`).
+
+    Arg:
+        name (str): Name of the stage, as module and step (e.g., 'compare.merge').
+
+    Returns:
+        Stage | NoStage: A stage to use in a `with` block, or a shared stage that records nothing while
+        profiling is off, so named stages cost about as much as an attribute lookup.
+    """
+
+    return Stage(name) if ENABLED else NO_STAGE
+
+def enable(memory=True):
+    """
+    Starts recording stages, from a clean slate.
+
+    Arg:
+        memory (bool, optional): Trace Python memory allocations with `tracemalloc`, to record each stage's peak.
+            Tracing slows allocation-heavy code, so wall times are longer than without it. Defaults to True.
+    """
+
+    global ENABLED, STARTED
+    STAGES.clear()
+    LOCAL.open = []
+    ENABLED, STARTED = True, time.perf_counter()
+    if memory and not tracemalloc.is_tracing(): tracemalloc.start()
+
+def summarize(stages=None):
+    """
+    Totals stages with the same name.
+
+    Arg:
+        stages (list[Stage], optional): Stages to total. Defaults to every stage recorded.
+
+    Returns:
+        list[dict]: One entry per name, in the order each name first started, with the number of calls, total wall-clock
+        and CPU seconds, total rows, rows per second, highest peak memory, and the share of the run's wall time.
+    """
+
+    stages = sorted(STAGES if stages is None else stages, key=lambda stage: stage.start)
+    total = time.perf_counter() - STARTED
+    summary = {}
+
+    for stage in stages:
+        entry = summary.setdefault(stage.name, {'name': stage.name, 'depth': stage.depth, 'calls': 0, 'wall_seconds': 0.0,
+                                                'cpu_seconds': 0.0, 'rows': None, 'peak_mb': None})
+        entry['calls'] += 1
+        entry['depth'] = min(entry['depth'], stage.depth)
+        entry['wall_seconds'] += stage.wall
+        entry['cpu_seconds'] += stage.cpu
+        if stage.rows is not None: entry['rows'] = (entry['rows'] or 0) + stage.rows
+        peak = stage.to_dict()['peak_mb']
+        if peak is not None: entry['peak_mb'] = max(entry['peak_mb'] or 0, peak)
+
+    for entry in summary.values():
+        entry['rows_per_sec'] = round(entry['rows'] / entry['wall_seconds']) if entry['rows'] and entry['wall_seconds'] else None
+        entry['percent'] = round(100 * entry['wall_seconds'] / total, 1) if total else None
+
+    return list(summary.values())
+
+def report(output_path, command=''):
+    """
+    Saves recorded stages as a JSON trace, and prints a summary table.
+
+    Args:
+        output_path (str): Path to save the trace to.
+        command (str, optional): The command that was profiled, saved with the trace. Defaults to ''.
+
+    Output:
+        A JSON file with the command, run time, and each stage from `Stage.to_dict`, plus totals by name from `summarize`.
+        It also has a "traceEvents" list, in the Trace Event Format, so the file opens as a timeline in chrome://tracing
+        or https://ui.perfetto.dev.
+    """
+
+    stages = sorted(STAGES, key=lambda stage: stage.start)
+    summary = summarize(stages)
+
+    trace = {
+        'command': command,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'wall_seconds': round(time.perf_counter() - STARTED, 6),
+        'memory_traced': tracemalloc.is_tracing(),
+        'stages': [stage.to_dict() for stage in stages],
+        'summary': summary,
+        'traceEvents': [{'name': stage.name, 'ph': 'X', 'pid': 1, 'tid': stage.thread, 'ts': round((stage.start - STARTED) * 1e6),
+                         'dur': round(stage.wall * 1e6), 'args': {'rows': stage.rows}} for stage in stages]
+    }
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    Path(output_path).write_text(json.dumps(trace, indent=2), encoding='utf-8')
+
+    # print totals by name, indented by nesting depth
+    print(f"\n{'Stage':<40} {'Calls':>6} {'Wall s':>9} {'CPU s':>9} {'Rows':>9} {'Rows/s':>10} {'Peak MB':>9} {'% Wall':>7}")
+    for entry in summary:
+        name = '  ' * entry['depth'] + entry['name']
+        values = [entry['rows'], entry['rows_per_sec'], entry['peak_mb'], entry['percent']]
+        rows, rows_per_sec, peak, percent = ['' if value is None else value for value in values]
+        print(f"{name:<40} {entry['calls']:>6} {entry['wall_seconds']:>9.3f} {entry['cpu_seconds']:>9.3f} {rows:>9} "
+              f"{rows_per_sec:>10} {peak:>9} {percent:>7}")
+    print(f"\nTotal {trace['wall_seconds']:.3f}s. Trace saved to {output_path}")
@@ -0,0 +1,284 @@
+from pathlib import Path
+from datetime import datetime, timedelta
+import json
+import quopri
+import numpy as np
+import pandas as pd
+
+# programs to draw from, with a four-letter root like those in ProTrack source codes and PBS listings
+PROGRAMS = [
+    ('Nature', 'NAAT'), ('Nova', 'NOVA'), ('Antiques Roadshow', 'ANRO'), ('Finding Your Roots', 'FIYO'),
+    ('Masterpiece', 'MAST'), ('Frontline', 'FRON'), ('American Experience', 'AMEX'), ('Independent Lens', 'INLE'),
+    ('PBS News Hour', 'NEHR'), ('Washington Week with the Atlantic', 'WWIR'), ('Rick Steves\' Europe', 'RSEU'),
+    ('Great Performances', 'GRPE'), ('Austin City Limits', 'ACLI'), ('Sesame Street', 'SESA'), ('Wild Kratts', 'WIKR'),
+    ('Daniel Tiger\'s Neighborhood', 'DTNE'), ('Cyberchase', 'CYBE'), ('Arthur', 'ARTH'), ('Curious George', 'CUGE'),
+    ('Central Texas Gardener', 'CTXG'), ('Texas Parks and Wildlife', 'TPAW'), ('Firing Line with Margaret Hoover', 'FLMH'),
+    ('Amanpour and Company', 'AMCO'), ('Call the Midwife', 'CTMI'), ('Father Brown', 'FABR'), ('Death in Paradise', 'DEIP'),
+    ('Secrets of the Dead', 'SEDE'), ('Nature Cat', 'NACA'), ('Molly of Denali', 'MODE'), ('Lidia\'s Kitchen', 'LIKI'),
+    ('America\'s Test Kitchen', 'ATKI'), ('Cook\'s Country', 'COCO'), ('This Old House', 'TOHO'), ('Ask This Old House', 'ATOH'),
+    ('Classical Stretch: By Essentrics', 'CSBE'), ('Happy Yoga with Sarah Starr', 'HPYG'), ('Globe Trekker', 'GLTR'),
+    ('Craft in America', 'CRAM'), ('History Detectives', 'HIDE'), ('Mystery!', 'MYST')
+]
+CHANNELS = ['9.1', '9.2', '9.3', '9.4']
+GRID_START_HOUR = 6 # a MediaStar grid column starts at 6:00 AM, and runs to the next morning
+
+def make_schedule(days=7, channels=1, slots_per_day=48, start_date='20250101', seed=0):
+    """
+    Builds a synthetic TV schedule, with evenly spaced slots on each channel, starting at 6:00 AM.
+
+    Args:
+        days (int, optional): Number of days. Defaults to 7.
+        channels (int, optional): Number of channels, from 9.1 up to 9.4. Defaults to 1.
+        slots_per_day (int, optional): Number of programs per day on each channel, at least 3. Defaults to 48.
+        start_date (str, optional): First day, in 'YYYYMMDD' format. Defaults to '20250101'.
+        seed (int, optional): Seed for drawing programs. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: One row per slot, with Channel, DateTime, Program Name, Root, Nola Episode (digits only),
+        Episode Name and Description.
+    """
+
+    rng = np.random.default_rng(seed)
+    start = datetime.strptime(start_date, '%Y%m%d') + timedelta(hours=GRID_START_HOUR)
+    minutes = 24 * 60 // slots_per_day
+    slots = pd.date_range(start, periods=days * slots_per_day, freq=f'{minutes}min')
+
+    frames = []
+    for channel in CHANNELS[:channels]:
+        picks = rng.integers(0, len(PROGRAMS), len(slots))
+        episodes = rng.integers(101, 2099, len(slots))
+        frames.append(pd.DataFrame({
+            'Channel': channel,
+            'DateTime': slots,
+            'Program Name': [PROGRAMS[i][0] for i in picks],
+            'Root': [PROGRAMS[i][1] for i in picks],
+            'Nola Episode': episodes.astype(str),
+            'Episode Name': [f'Episode {e}' for e in episodes],
+            'Description': [f'{PROGRAMS[i][0]} episode {e}, with a description of what happens in it.' for i, e in zip(picks, episodes)]
+        }))
+
+    return pd.concat(frames, ignore_index=True)
+
+def add_mismatches(df, rate, seed=1):
+    """
+    Replaces the program in a share of a schedule's slots with a different program, to make a second
+    source that disagrees with the first at a known rate.
+
+    Args:
+        df (pd.DataFrame): Schedule from `make_schedule`.
+        rate (float): Share of slots to change, from 0 to 1.
+        seed (int, optional): Seed for picking slots and programs. Defaults to 1.
+
+    Returns:
+        Tuple[pd.DataFrame, int]: The changed copy of the schedule, and the number of slots changed.
+    """
+
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    changed = np.flatnonzero(rng.random(len(df)) < rate)
+    for i in changed:
+        names = [name for name, _ in PROGRAMS if name != df.at[i, 'Program Name']]
+        df.at[i, 'Program Name'] = names[rng.integers(0, len(names))]
+        df.at[i, 'Nola Episode'] = str(int(df.at[i, 'Nola Episode']) % 999 + 3000)
+
+    return df, len(changed)
+
+def pdf_text(text):
+    """
+    Escapes text for a PDF string literal, keeping only characters the standard Helvetica font encodes.
+
+    Arg:
+        text (str): Text to escape.
+
+    Returns:
+        str: The text between parentheses, with backslashes and parentheses escaped.
+    """
+
+    text = text.encode('latin-1', errors='replace').decode('latin-1')
+    return '(' + text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+def write_protrack(df, path, lines_per_page=50):
+    """
+    Writes a schedule as a ProTrack-style Air Date Search Report PDF, with one text line per slot.
+
+    Args:
+        df (pd.DataFrame): Schedule from `make_schedule`.
+        path (Path): Path of the PDF file to write.
+        lines_per_page (int, optional): Schedule lines on each page. Defaults to 50.
+
+    Notes:
+        - The PDF is written directly, with one content stream per page and the standard Helvetica font,
+          so no PDF library is needed.
+    """
+
+    df = df.sort_values(['Channel', 'DateTime'], kind='stable')
+    first, last = df['DateTime'].min(), df['DateTime'].max()
+    lines = [
+        f"{name} #{nola}{slot:%H:%M:%S}:00 {root}{nola[-4:]}HHDBAKLRN{channel} {slot:%m/%d/%Y}"
+        for channel, slot, name, root, nola in zip(df['Channel'], df['DateTime'], df['Program Name'], df['Root'], df['Nola Episode'])
+    ]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    # objects: 1 catalog, 2 page tree, 3 font, then a page and its content stream for each page
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for number, page in enumerate(pages, start=1):
+        header = [f'{first:%m/%d/%Y} - {last:%m/%d/%Y}Date:', 'Air Date Search Report', 'KLRN Digital Television',
+                  f'{first:%m/%d/%Y} Page {number} of {len(pages)}', 'Air Time Program Title SourceTypeAir DateChannel']
+        text = ' T* '.join(f'{pdf_text(line)} Tj' for line in header + page)
+        stream = f'BT /F1 8 Tf 10 TL 30 770 Td {text} ET'
+        kids.append(f'{len(objects) + 1} 0 R')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> '
+                       f'/Contents {len(objects) + 2} 0 R >>')
+        objects.append(f'<< /Length {len(stream.encode("latin-1"))} >>\nstream\n{stream}\nendstream')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+
+    # write objects, then the cross-reference table of their byte offsets
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n{obj}\nendobj\n'.encode('latin-1')
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+    out += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('latin-1')
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('latin-1')
+    Path(path).write_bytes(bytes(out))
+
+def grid_time(slot):
+    """
+    Formats a time as a MediaStar grid does, on a 12-hour clock without AM or PM.
+
+    Arg:
+        slot (pd.Timestamp): Time of the slot.
+
+    Returns:
+        str: The time as 'H:MM' (e.g., '6:30' or '12:00').
+    """
+
+    return f'{(slot.hour - 1) % 12 + 1}:{slot.minute:02d}'
+
+def write_titan(df, path):
+    """
+    Writes one channel of a schedule as a MediaStar-style grid page, saved as a single-file .mhtml.
+
+    Args:
+        df (pd.DataFrame): Schedule from `make_schedule`, for one channel.
+        path (Path): Path of the .mhtml file to write, ending with the channel (e.g., 'MediaStar_2025-01-01_9.1.mhtml').
+
+    Notes:
+        - Each grid column is a broadcast day, from 6:00 AM to the next morning, with the HTML quoted-printable
+          encoded, and a stylesheet part before it, as a browser saves the page.
+    """
+
+    df = df.sort_values('DateTime', kind='stable')
+    days = (df['DateTime'] - pd.Timedelta(hours=GRID_START_HOUR)).dt.normalize()
+    columns, headers = [], []
+
+    for number, (day, rows) in enumerate(df.groupby(days, sort=True), start=1):
+        headers.append(f'<div class="cellBase dateHdrCell g_gridHdrBgColor" title="{day:%A} - {day:%m/%d/%Y}">'
+                       f'{day:%A}<br>{day:%m/%d/%Y}</div>')
+        cells = [
+            f'<div id="gcd_{i}" class="cellBase normal pointerCursor" style="position: absolute; top: {55 * i}px;">'
+            f'<b>{name}</b><br>{grid_time(slot)} - {grid_time(slot + pd.Timedelta(minutes=30))}<br>'
+            f'Epi#: {nola}<br>{episode}<br></div>'
+            for i, (slot, name, nola, episode) in enumerate(zip(rows['DateTime'], rows['Program Name'],
+                                                                 rows['Nola Episode'], rows['Episode Name']))
+        ]
+        columns.append(f'<div id="gCol{number}" style="position:absolute;">\n' + '\n'.join(cells) + '\n</div>')
+
+    html = ('<!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>MediaStar</title></head><body>\n'
+            '<div id="dateHeaderDiv" class="dateHdrDiv">\n' + '\n'.join(headers) + '\n</div>\n'
+            '<form id="gridForm" method="post">\n' + '\n'.join(columns) + '\n</form>\n</body></html>')
+
+    boundary = '----MultipartBoundary--synthetic----'
+    parts = [
+        f'From: <Saved by Blink>\r\nSubject: MediaStar\r\nMIME-Version: 1.0\r\nContent-Type: multipart/related;\r\n'
+        f'\ttype="text/html";\r\n\tboundary="{boundary}"\r\n\r\n\r\n',
+        f'--{boundary}\r\nContent-Type: text/css\r\nContent-Transfer-Encoding: quoted-printable\r\n\r\n'
+        f'.cellBase {{ position: absolute; }}\r\n',
+        f'--{boundary}\r\nContent-Type: text/html\r\nContent-Transfer-Encoding: quoted-printable\r\n\r\n'
+        + quopri.encodestring(html.encode('utf-8')).decode('ascii').replace('\n', '\r\n') + '\r\n',
+        f'--{boundary}--\r\n'
+    ]
+    Path(path).write_bytes(''.join(parts).encode('ascii'))
+
+def write_pbs(df, path):
+    """
+    Writes a schedule as TV Schedules Service-style JSON, with a day key for each calendar day, and a feed
+    with listings for each channel.
+
+    Args:
+        df (pd.DataFrame): Schedule from `make_schedule`.
+        path (Path): Path of the JSON file to write.
+    """
+
+    df = df.sort_values(['DateTime', 'Channel'], kind='stable')
+    data = {'start_date': f"{df['DateTime'].min():%Y%m%d}"}
+
+    for day, rows in df.groupby(df['DateTime'].dt.normalize(), sort=True):
+        feeds = []
+        for channel, listings in rows.groupby('Channel', sort=True):
+            feeds.append({
+                'short_name': 'KLRN', 'full_name': 'KLRN', 'timezone': 'America/Chicago',
+                'listings': [
+                    {'start_time': f'{slot:%H%M}', 'minutes': 30, 'nola_episode': nola, 'nola_root': root,
+                     'title': name, 'episode_title': episode, 'description': description, 'type': 'episode'}
+                    for slot, name, root, nola, episode, description in zip(
+                        listings['DateTime'], listings['Program Name'], listings['Root'], listings['Nola Episode'],
+                        listings['Episode Name'], listings['Description'])
+                ],
+                'analog_channel': '', 'digital_channel': channel
+            })
+        data[f'{day:%Y%m%d}'] = {'feeds': feeds}
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+def generate(output_dir, days=7, channels=1, slots_per_day=48, mismatch_rate=0.05, start_date='20250101', seed=0):
+    """
+    Writes a synthetic schedule as raw files from all three sources: a ProTrack PDF with the correct schedule,
+    and MediaStar pages and TVSS JSON that each disagree with it in a share of slots.
+
+    Args:
+        output_dir (Path): Folder to write the files to, which is created if needed.
+        days (int, optional): Number of days. Defaults to 7.
+        channels (int, optional): Number of channels, from 9.1 up to 9.4. Defaults to 1.
+        slots_per_day (int, optional): Number of programs per day on each channel, at least 3. Defaults to 48.
+        mismatch_rate (float, optional): Share of slots MediaStar and TVSS each have a different program in. Defaults to 0.05.
+        start_date (str, optional): First day, in 'YYYYMMDD' format. Defaults to '20250101'.
+        seed (int, optional): Seed for drawing programs and mismatches. Defaults to 0.
+
+    Returns:
+        dict: Paths of the files written for each source ('protrack', 'titan' and 'pbs'), the number of rows,
+        and the number of slots changed in each of titan and pbs.
+
+    Notes:
+        - MediaStar pages hold one channel and up to 7 days each, as saved from the grid, so there is one file per
+          channel and week, named by first day and channel.
+    """
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    df = make_schedule(days, channels, slots_per_day, start_date, seed)
+    titan, titan_changed = add_mismatches(df, mismatch_rate, seed + 1)
+    pbs, pbs_changed = add_mismatches(df, mismatch_rate, seed + 2)
+
+    protrack_path = output_dir / f'Protrack_{start_date}_synthetic.pdf'
+    write_protrack(df, protrack_path)
+
+    titan_paths = []
+    weeks = (titan['DateTime'] - pd.Timedelta(hours=GRID_START_HOUR)).dt.normalize()
+    first = weeks.min()
+    for (channel, week), rows in titan.groupby([titan['Channel'], (weeks - first).dt.days // 7], sort=True):
+        path = output_dir / f"MediaStar_{first + pd.Timedelta(days=7 * week):%Y-%m-%d}_{channel}.mhtml"
+        write_titan(rows, path)
+        titan_paths.append(path)
+
+    pbs_path = output_dir / 'pbs_synthetic.json'
+    write_pbs(pbs, pbs_path)
+
+    return {
+        'protrack': [protrack_path], 'titan': titan_paths, 'pbs': [pbs_path],
+        'rows': len(df), 'titan_changed': titan_changed, 'pbs_changed': pbs_changed
+    }
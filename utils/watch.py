@@ -0,0 +1,145 @@
+from pathlib import Path
+from fnmatch import fnmatch
+import os
+import time
+from config import WATCH_PATTERNS, WATCH_INTERVAL_SECONDS, WATCH_DEBOUNCE_SECONDS, WATCH_COMPARISONS, WATCH_CHANNEL
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT_DIR / 'data'
+OUTPUT_DIR = ROOT_DIR / 'output'
+
+def route(path, patterns=WATCH_PATTERNS):
+    """
+    Finds the parser for a raw file from its name.
+
+    Args:
+        path (Path): Path to a raw file.
+        patterns (dict, optional): Name pattern of each parser's files (e.g., {'titan': 'MediaStar*.mhtml'}).
+            Defaults to `WATCH_PATTERNS` in config.py.
+
+    Returns:
+        str: The parser whose pattern matches the file name, or None if none does.
+    """
+
+    return next((source for source, pattern in patterns.items() if fnmatch(Path(path).name, pattern)), None)
+
+def scan(data_dir=DATA_DIR, patterns=WATCH_PATTERNS):
+    """
+    Lists the raw files in a folder that a parser's name pattern matches, without reading them.
+
+    Args:
+        data_dir (Path, optional): Folder to scan, not including subfolders. Defaults to data/.
+        patterns (dict, optional): Name pattern of each parser's files. Defaults to `WATCH_PATTERNS` in config.py.
+
+    Returns:
+        dict: Path of each file mapped to its size and modification time in nanoseconds, which change when
+        the file is saved again.
+    """
+
+    files = {}
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and route(entry.name, patterns):
+                stat = entry.stat()
+                files[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+def refresh(files, frames, channel=WATCH_CHANNEL, comparisons=WATCH_COMPARISONS, workers=1, output_dir=OUTPUT_DIR):
+    """
+    Parses new and changed files, saves each source they belong to again, and then runs the comparisons
+    of those sources.
+
+    Args:
+        files (dict): Raw files and their size and modification time, from `scan`.
+        frames (dict): Parsed DataFrame of each file, with the size and modification time it was parsed at,
+            kept from the last refresh, and updated in place.
+        channel (str | list[str], optional): Channels to compare. Defaults to `WATCH_CHANNEL` in config.py.
+        comparisons (list[tuple], optional): Pairs of sources to compare. Defaults to `WATCH_COMPARISONS` in config.py.
+        workers (int, optional): Number of worker processes used to parse files. Defaults to 1.
+        output_dir (Path, optional): Folder for parsed and compared files. Defaults to output/.
+
+    Returns:
+        set[str]: Sources that were saved again.
+
+    Notes:
+        - Unchanged files keep their parsed DataFrame from memory, and changed files are parsed through
+          the parse cache, so a file saved again with the same content is not parsed again.
+        - Files of a source are merged oldest first, by modification time, so a newly saved file replaces
+          older files' rows for the slots it has.
+        - When every file of a source is removed, its parsed files and store rows are removed too, and its
+          comparisons are skipped until a file of it is saved again.
+    """
+
+    from parsers.parse_files import parse_cached, save_parsed, remove_parsed
+    from comparators.compare import compare_tv_schedules
+
+    changed = sorted(path for path, stamp in files.items() if path not in frames or frames[path][0] != stamp)
+    removed = [path for path in frames if path not in files]
+    sources = {route(path) for path in changed + removed}
+
+    for path in removed: del frames[path]
+    for source in sorted(sources):
+        paths = [path for path in changed if route(path) == source]
+        if paths:
+            print(f"\nParsing {', '.join(path.name for path in paths)}")
+            for path, df in zip(paths, parse_cached(paths, source, workers)): frames[path] = (files[path], df)
+
+        # merge every file of the source, oldest first
+        input_paths = sorted([path for path in frames if route(path) == source], key=lambda path: (files[path][1], path.name))
+        if input_paths: save_parsed([frames[path][1] for path in input_paths], input_paths, output_dir / f'{source}.csv', source)
+        else: remove_parsed(output_dir / f'{source}.csv', source)
+
+    for source_1, source_2 in comparisons:
+        if not sources & {source_1, source_2}: continue
+        path_1, path_2 = output_dir / f'{source_1}.csv', output_dir / f'{source_2}.csv'
+        if not path_1.exists() or not path_2.exists(): continue
+
+        print(f'\nComparing {source_1} and {source_2}')
+        compare_tv_schedules(str(path_1), str(path_2), str(output_dir / f'{source_1}_{source_2}.csv'), channel)
+
+    return sources
+
+def watch(data_dir=DATA_DIR, interval=WATCH_INTERVAL_SECONDS, debounce=WATCH_DEBOUNCE_SECONDS, channel=WATCH_CHANNEL,
+          workers=1, max_refreshes=None):
+    """
+    Watches a folder for new, changed and removed raw files, and parses and compares them as they come in,
+    until stopped (e.g., with Ctrl+C).
+
+    Args:
+        data_dir (Path, optional): Folder to watch. Defaults to data/.
+        interval (float, optional): Seconds between scans of the folder. Defaults to `WATCH_INTERVAL_SECONDS` in config.py.
+        debounce (float, optional): Seconds no file must change for before changes are handled, so a burst of saves,
+            or a file still being written, is handled once. Defaults to `WATCH_DEBOUNCE_SECONDS` in config.py.
+        channel (str | list[str], optional): Channels to compare. Defaults to `WATCH_CHANNEL` in config.py.
+        workers (int, optional): Number of worker processes used to parse files. Defaults to 1.
+        max_refreshes (int, optional): Stop after this many refreshes. Defaults to `None`, which runs until stopped.
+
+    Notes:
+        - The folder is polled with one directory listing per scan, which reads file sizes and modification times
+          only, so an idle watch uses almost no CPU.
+        - Files are routed to parsers by `WATCH_PATTERNS` in config.py, instead of `FILES`, and parsed DataFrames
+          stay in memory between refreshes, along with the imported parsers, so each refresh starts warm.
+        - Every file is parsed when the watch starts, from the parse cache when it is unchanged.
+    """
+
+    frames = {}
+    files = scan(data_dir)
+    pending, changed_at = True, 0.0 # handle files already in the folder right away
+    refreshes = 0
+
+    print(f"\nWatching {data_dir} every {interval}s for {', '.join(WATCH_PATTERNS.values())} (Ctrl+C to stop)")
+    while max_refreshes is None or refreshes < max_refreshes:
+        if pending and time.monotonic() - changed_at >= debounce:
+            try:
+                sources = refresh(files, frames, channel, workers=workers)
+                if sources: print(f"\nUpdated {', '.join(sorted(sources))} at {time.strftime('%H:%M:%S')}")
+            except Exception as e: # keep watching, and retry on the next change
+                print(f'\nCould not update: {e}')
+            pending = False
+            refreshes += 1
+            continue
+
+        time.sleep(interval)
+        latest = scan(data_dir)
+        if latest != files:
+            files, pending, changed_at = latest, True, time.monotonic()